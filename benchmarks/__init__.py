@@ -0,0 +1 @@
+"""Performance benchmarks. See walk.py."""
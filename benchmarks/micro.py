@@ -0,0 +1,336 @@
+"""Micro-benchmarks for per-topic hot path helpers on realistic inputs:
+tracker pages from tests datafixtures (as is and enlarged), a torrent with 2,000 files,
+a configuration with 50,000 torrents.
+
+Runs offline. Timings are taken with timeit (the number of calls per round is chosen
+automatically), peak memory of a single call is taken with tracemalloc.
+
+Results may be written as JSON (in a pytest-benchmark compatible layout) and compared
+with previously written results.
+
+Usage:
+    python -m benchmarks.micro
+    python -m benchmarks.micro -k make_soup --json before.json
+    python -m benchmarks.micro -k make_soup --compare before.json
+
+"""
+import argparse
+import json
+import platform
+import sys
+import tracemalloc
+from collections.abc import Callable
+from datetime import UTC, datetime
+from pathlib import Path
+from statistics import mean, median, stdev
+from tempfile import TemporaryDirectory
+from timeit import Timer
+from typing import Any
+
+from torrentool.bencode import Bencode
+
+from torrt.trackers.eniahd import EniaHDTracker
+from torrt.trackers.kinozal import KinozalTracker
+from torrt.trackers.nnmclub import NNMClubTracker
+from torrt.utils import (
+    TorrtConfig,
+    base64encode,
+    get_url_from_string,
+    make_soup,
+    parse_torrent,
+    update_dict,
+)
+
+FIXTURES_DIR = Path(__file__).parent.parent / 'tests' / 'trackers' / 'datafixtures'
+
+PAGES = [
+    ('nnmclub.html', 'utf-8', NNMClubTracker, r'download\.php'),
+    ('kinozal.html', 'cp1251', KinozalTracker, r'download\.php'),
+    ('eniahd.html', 'utf-8', EniaHDTracker, r'dl\.php'),
+]
+
+BIG_PAGE_FACTOR = 20
+"""Big forum page is made of nnmclub.html body repeated (e.g. a long comments thread)."""
+
+CASES: dict[str, Callable[[], Callable[[], Any]]] = {}
+"""Setup functions returning functions to be measured indexed by benchmark names."""
+
+_TMP: list[TemporaryDirectory] = []
+
+
+def case(name: str) -> Callable:
+    """Registers a benchmark setup function.
+
+    :param name: benchmark name, e.g. `group[variant]`
+
+    """
+    def register(setup: Callable[[], Callable[[], Any]]) -> Callable[[], Callable[[], Any]]:
+        CASES[name] = setup
+        return setup
+
+    return register
+
+
+def read_page(fname: str, encoding: str) -> str:
+    return (FIXTURES_DIR / fname).read_text(encoding=encoding)
+
+
+def make_big_page() -> str:
+    html = read_page('nnmclub.html', 'utf-8')
+    head, body = html.split('<body', 1)
+    return f"{head}<body{body * BIG_PAGE_FACTOR}"
+
+
+def make_torrent(files: int = 2000) -> bytes:
+    """Returns .torrent file contents for a multi-file torrent (e.g. a TV series collection).
+
+    :param files: number of files
+
+    """
+    return Bencode.encode({
+        'announce': 'http://bt.example.com/announce.php',
+        'comment': 'https://nnmclub.to/forum/viewtopic.php?t=1234567',
+        'info': {
+            'name': 'Some Series Collection',
+            'piece length': 4 * 1024 * 1024,
+            'pieces': b'\x01' * 20 * files,
+            'files': [
+                {
+                    'length': 700 * 1024 * 1024 + idx,
+                    'path': [f'Season {idx // 100 + 1:02}', f'Some.Series.S{idx // 100 + 1:02}E{idx % 100 + 1:02}.mkv'],
+                }
+                for idx in range(files)
+            ],
+        },
+    })
+
+
+def make_settings(torrents: int = 50_000) -> dict:
+    """Returns configuration with a given number of registered torrents.
+
+    :param torrents: number of torrents
+
+    """
+    settings = json.loads(json.dumps(TorrtConfig._basic_settings))
+    settings['torrents'] = {
+        f'{idx:040x}': {
+            'hash': f'{idx:040x}',
+            'name': f'Some.Series.S01E{idx % 100:02}.1080p.WEB-DL',
+            'url': f'https://nnmclub.to/forum/viewtopic.php?t={idx}',
+            'url_file': f'https://nnmclub.to/forum/download.php?id={idx}',
+            'page': {'title': f'Some Series / Season 1 [{idx}]', 'date_updated': '2026-01-01 10:00:00'},
+            'params': {},
+        }
+        for idx in range(torrents)
+    }
+    return settings
+
+
+def use_config_file(settings: dict):
+    """Points configuration to a temporary file with given settings.
+
+    :param settings:
+
+    """
+    tmp = TemporaryDirectory()
+    _TMP.append(tmp)
+
+    TorrtConfig.USER_DATA_PATH = Path(tmp.name)
+    TorrtConfig.USER_SETTINGS_FILE = Path(tmp.name) / 'config.json'
+    TorrtConfig._write(settings)
+
+
+for _fname, _encoding, _tracker_cls, _definite in PAGES:
+
+    @case(f'make_soup[{_fname}-full]')
+    def _(fname=_fname, encoding=_encoding):
+        html = read_page(fname, encoding)
+        return lambda: make_soup(html)
+
+    @case(f'make_soup[{_fname}-strained]')
+    def _(fname=_fname, encoding=_encoding, tracker_cls=_tracker_cls):
+        html = read_page(fname, encoding)
+        return lambda: make_soup(html, parse_only=tracker_cls.page_parse_only)
+
+    @case(f'find_links[{_fname}]')
+    def _(fname=_fname, encoding=_encoding, tracker_cls=_tracker_cls, definite=_definite):
+        soup = make_soup(read_page(fname, encoding), parse_only=tracker_cls.page_parse_only)
+        return lambda: tracker_cls.find_links('https://example.com/topic', soup, definite=definite)
+
+
+@case('make_soup[big-full]')
+def _():
+    html = make_big_page()
+    return lambda: make_soup(html)
+
+
+@case('make_soup[big-strained]')
+def _():
+    html = make_big_page()
+    return lambda: make_soup(html, parse_only=NNMClubTracker.page_parse_only)
+
+
+@case('find_links[big-all]')
+def _():
+    soup = make_soup(make_big_page(), parse_only=NNMClubTracker.page_parse_only)
+    return lambda: NNMClubTracker.find_links('https://example.com/topic', soup)
+
+
+@case('parse_torrent[2000-files]')
+def _():
+    raw = make_torrent()
+    return lambda: parse_torrent(raw)
+
+
+@case('parse_torrent[2000-files-hash-files]')
+def _():
+    raw = make_torrent()
+
+    def parse():
+        torrent = parse_torrent(raw)
+        return torrent.info_hash, torrent.files
+
+    return parse
+
+
+@case('base64encode[2000-files-torrent]')
+def _():
+    raw = make_torrent()
+    return lambda: base64encode(raw)
+
+
+@case('get_url_from_string[comment]')
+def _():
+    return lambda: get_url_from_string('https://nnmclub.to/forum/viewtopic.php?t=1234567')
+
+
+@case('get_url_from_string[long-description]')
+def _():
+    text = 'Some description without links. ' * 300 + 'Source: https://nnmclub.to/forum/viewtopic.php?t=1234567'
+    return lambda: get_url_from_string(text)
+
+
+@case('update_dict[50k-torrents]')
+def _():
+    settings = make_settings()
+    new = {'torrents': make_settings()['torrents'], 'time_last_check': 1}
+    return lambda: update_dict(settings, new)
+
+
+@case('config_load[50k-torrents]')
+def _():
+    use_config_file(make_settings())
+    return TorrtConfig.load
+
+
+@case('config_save[50k-torrents]')
+def _():
+    settings = make_settings()
+    use_config_file(settings)
+    return lambda: TorrtConfig.save(settings)
+
+
+def measure(func: Callable[[], Any], *, rounds: int = 5) -> dict[str, float | int]:
+    """Returns timings (seconds per call) and peak memory (bytes) of a single call of a given function.
+
+    :param func:
+    :param rounds: number of rounds. The number of calls per round is chosen
+        automatically for a round to take at least 0.2 seconds.
+
+    """
+    timer = Timer(func)
+    iterations, _ = timer.autorange()
+    timings = [elapsed / iterations for elapsed in timer.repeat(repeat=rounds, number=iterations)]
+
+    tracemalloc.start()
+    func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    average = mean(timings)
+
+    return {
+        'min': min(timings),
+        'max': max(timings),
+        'mean': average,
+        'median': median(timings),
+        'stddev': stdev(timings) if rounds > 1 else 0,
+        'rounds': rounds,
+        'iterations': iterations,
+        'ops': 1 / average,
+        'peak_memory': peak,
+    }
+
+
+def format_time(seconds: float) -> str:
+    if seconds >= 1:
+        return f'{seconds:8.3f} s '
+    if seconds >= 0.001:
+        return f'{seconds * 1e3:8.3f} ms'
+    return f'{seconds * 1e6:8.3f} us'
+
+
+def main():
+    parser = argparse.ArgumentParser('benchmarks.micro', description='Hot path helpers micro-benchmarks.')
+    parser.add_argument('-k', help='Run only benchmarks with names containing a substring', dest='keyword', default='')
+    parser.add_argument('--rounds', help='Number of rounds', type=int, default=5)
+    parser.add_argument('--json', help='Write results into a given JSON file', dest='json_path')
+    parser.add_argument('--compare', help='Compare with results from a given JSON file', dest='compare_path')
+    parser.add_argument('--list', help='List benchmarks names', action='store_true')
+
+    args = parser.parse_args()
+
+    names = [name for name in CASES if args.keyword in name]
+
+    if args.list:
+        print(*names, sep='\n')
+        return
+
+    previous = {}
+
+    if args.compare_path:
+        previous = {
+            item['name']: item['stats']
+            for item in json.loads(Path(args.compare_path).read_text())['benchmarks']
+        }
+
+    benchmarks = []
+
+    try:
+        for name in names:
+            stats = measure(CASES[name](), rounds=args.rounds)
+            benchmarks.append({
+                'name': name,
+                'group': name.partition('[')[0],
+                'stats': stats,
+            })
+
+            line = (
+                f"{name:<45} {format_time(stats['median'])} "
+                f"±{stats['stddev'] / stats['mean']:6.1%} {stats['peak_memory'] / 1024:10.1f} KiB"
+            )
+
+            if name in previous:
+                line += f"  x{previous[name]['median'] / stats['median']:.2f} vs previous"
+
+            print(line, flush=True)
+
+    finally:
+        for tmp in _TMP:
+            tmp.cleanup()
+
+    if args.json_path:
+        Path(args.json_path).write_text(json.dumps({
+            'machine_info': {
+                'python_implementation': platform.python_implementation(),
+                'python_version': platform.python_version(),
+                'machine': platform.machine(),
+                'system': platform.system(),
+            },
+            'datetime': datetime.now(tz=UTC).isoformat(),
+            'benchmarks': benchmarks,
+        }, indent=4))
+
+
+if __name__ == '__main__':
+    sys.exit(main())
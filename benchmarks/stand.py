@@ -0,0 +1,404 @@
+"""Local stand-in servers for benchmarks.
+
+A single HTTP server (stdlib, thread per connection) emulates:
+
+    * tracker topic pages built from tests datafixtures: /topic/<idx>
+      (shows current torrent info hash in a magnet link), and .torrent files: /topic/<idx>/dl;
+
+    * Transmission RPC: /transmission/rpc;
+
+    * qBittorrent WebUI API: /api/v2/...
+
+Torrent clients stand-ins share the same torrents storage filled with a torrent
+for every topic. Part of the topics (see `change_rate`) serve an updated torrent.
+
+Requests counts are available at /_stats.
+
+Usage: python -m benchmarks.stand [topics]
+
+"""
+import json
+import random
+import sys
+from base64 import b64decode
+from collections import Counter
+from email.parser import BytesParser
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from threading import Lock, Thread
+from time import sleep
+from urllib.parse import parse_qs, urlsplit
+
+from torrentool.api import Torrent
+
+ROOT = Path(__file__).parent.parent
+TORRENT_FILE = ROOT / 'tests' / 'datafixtures' / 'torr_two.torrent'
+PAGE_FILE = ROOT / 'tests' / 'trackers' / 'datafixtures' / 'nnmclub.html'
+
+SESSION_ID = 'benchmark'
+
+
+def make_torrent(name: str, comment: str) -> tuple[bytes, str]:
+    """Returns .torrent file contents and info hash for a torrent with a given name.
+
+    :param name: torrent name. Defines info hash.
+    :param comment: torrent comment (topic URL)
+
+    """
+    torrent = Torrent.from_file(TORRENT_FILE)
+    torrent.name = name
+    torrent.comment = comment
+    return torrent.to_string(), torrent.info_hash
+
+
+def make_filler(size: int) -> str:
+    """Returns real-world tracker page markup of about a given size
+    with titles and magnet links removed not to be confused with the ones of a topic.
+
+    :param size: size in bytes
+
+    """
+    markup = PAGE_FILE.read_text()
+    markup = markup[markup.index('<body'):].replace('magnet:', 'nomagnet:').replace('<title', '<notitle')
+
+    while len(markup) < size:
+        markup += markup
+
+    return markup[:size]
+
+
+class Topic:
+    """Tracker topic: torrent registered in torrent clients and the one served by tracker."""
+
+    __slots__ = ['hash', 'name', 'raw', 'registered', 'url']
+
+    def __init__(self, url: str, name: str, *, changed: bool):
+        self.url = url
+        self.name = name
+
+        raw, hash_str = make_torrent(name, url)
+        self.registered = {'hash': hash_str, 'name': name, 'raw': raw}
+
+        if changed:
+            raw, hash_str = make_torrent(f'{name}-v2', url)
+
+        self.raw = raw
+        self.hash = hash_str
+
+
+class Stand:
+    """Tracker and torrent clients stand-ins."""
+
+    def __init__(
+            self,
+            topics: int,
+            *,
+            latency: float = 0.02,
+            rpc_latency: float = 0,
+            page_size: int = 30_000,
+            change_rate: float = 0.1,
+            seed: int = 0
+    ):
+        """
+        :param topics: number of tracker topics (and torrents in clients)
+        :param latency: tracker response latency (seconds)
+        :param rpc_latency: torrent clients response latency (seconds)
+        :param page_size: topic page size (bytes)
+        :param change_rate: share of topics with an updated torrent
+        :param seed: random seed to choose topics to be changed
+
+        """
+        self.latency = latency
+        self.rpc_latency = rpc_latency
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), make_handler(self), bind_and_activate=False)
+        self.server.daemon_threads = True
+        self.server.request_queue_size = 4096
+        self.server.server_bind()
+        self.server.server_activate()
+
+        self.port = self.server.server_address[1]
+        self.url = f'http://127.0.0.1:{self.port}'
+
+        changed = set(random.Random(seed).sample(range(topics), round(topics * change_rate)))
+
+        self.topics = [
+            Topic(f'{self.url}/topic/{idx}', f'topic-{idx}', changed=idx in changed)
+            for idx in range(topics)
+        ]
+        self.filler = make_filler(page_size)
+
+        self.torrents: dict[str, dict] = {
+            topic.registered['hash']: {
+                'hash': topic.registered['hash'],
+                'name': topic.name,
+                'comment': topic.url,
+                'download_to': '/downloads',
+            }
+            for topic in self.topics
+        }
+        """Torrents in torrent clients indexed with hashes."""
+
+        self.stats = Counter()
+        self._lock = Lock()
+
+    def start(self):
+        Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def stop(self):
+        self.server.shutdown()
+
+    def count(self, key: str):
+        with self._lock:
+            self.stats[key] += 1
+
+    def get_registration(self) -> dict[str, dict]:
+        """Returns torrents to be registered in torrt (as in configuration file)."""
+
+        return {
+            topic.registered['hash']: {
+                'hash': topic.registered['hash'],
+                'name': topic.name,
+                'url': topic.url,
+                'page': {},
+            }
+            for topic in self.topics
+        }
+
+    def get_changed(self) -> int:
+        """Returns the number of topics with an updated torrent."""
+        return sum(topic.hash != topic.registered['hash'] for topic in self.topics)
+
+    def add_torrent(self, raw: bytes, download_to: str):
+        torrent = Torrent.from_string(raw)
+
+        with self._lock:
+            self.torrents[torrent.info_hash] = {
+                'hash': torrent.info_hash,
+                'name': torrent.name,
+                'comment': torrent.comment or '',
+                'download_to': download_to,
+            }
+
+    def remove_torrent(self, hash_str: str):
+        with self._lock:
+            self.torrents.pop(hash_str, None)
+
+    def render_topic(self, topic: Topic) -> bytes:
+        return (
+            f'<html><head><title>{topic.name}</title></head>'
+            f'<a href="magnet:?xt=urn:btih:{topic.hash}">Magnet</a>'
+            f'<a href="{topic.url}/dl">Download</a>'
+            f'{self.filler}</html>'
+        ).encode()
+
+
+def make_handler(stand: Stand) -> type[BaseHTTPRequestHandler]:
+
+    class Handler(BaseHTTPRequestHandler):
+
+        protocol_version = 'HTTP/1.1'
+        disable_nagle_algorithm = True  # Headers and body are written separately.
+
+        def log_message(self, format, *args):
+            pass
+
+        def reply(self, body: bytes | str | dict | list, *, status: int = 200, headers: dict | None = None):
+            if isinstance(body, dict | list):
+                body = json.dumps(body)
+
+            if isinstance(body, str):
+                body = body.encode()
+
+            self.send_response(status)
+
+            for name, value in (headers or {}).items():
+                self.send_header(name, value)
+
+            self.send_header('Content-Length', f'{len(body)}')
+            self.end_headers()
+            self.wfile.write(body)
+
+        def read_body(self) -> bytes:
+            return self.rfile.read(int(self.headers.get('Content-Length', 0)))
+
+        def read_form(self) -> dict[str, str]:
+            return {key: values[0] for key, values in parse_qs(self.read_body().decode()).items()}
+
+        def read_files(self) -> dict[str, bytes]:
+            message = BytesParser().parsebytes(
+                f"Content-Type: {self.headers['Content-Type']}\r\n\r\n".encode() + self.read_body())
+
+            return {
+                part.get_param('name', header='content-disposition'): part.get_payload(decode=True)
+                for part in message.get_payload()
+            }
+
+        def do_GET(self):
+            path = urlsplit(self.path).path
+
+            if path == '/_stats':
+                self.reply(dict(stand.stats))
+
+            elif path.startswith('/topic/'):
+                self.handle_tracker(path)
+
+            elif path.startswith('/api/v2/'):
+                self.handle_qbittorrent(path)
+
+            else:
+                self.reply('Not found', status=404)
+
+        def do_POST(self):
+            path = urlsplit(self.path).path
+
+            if path == '/transmission/rpc':
+                self.handle_transmission()
+
+            elif path.startswith('/api/v2/'):
+                self.handle_qbittorrent(path)
+
+            else:
+                self.reply('Not found', status=404)
+
+        def handle_tracker(self, path: str):
+            sleep(stand.latency)
+
+            _, _, idx, *download = path.split('/')
+            topic = stand.topics[int(idx)]
+
+            if download:
+                stand.count('tracker:download')
+                self.reply(topic.raw, headers={'Content-Type': 'application/x-bittorrent'})
+
+            else:
+                stand.count('tracker:page')
+                self.reply(stand.render_topic(topic), headers={'Content-Type': 'text/html; charset=utf-8'})
+
+        def handle_transmission(self):
+            sleep(stand.rpc_latency)
+
+            request = json.loads(self.read_body())
+
+            if self.headers.get('X-Transmission-Session-Id') != SESSION_ID:
+                stand.count('transmission:handshake')
+                self.reply({}, status=409, headers={'X-Transmission-Session-Id': SESSION_ID})
+                return
+
+            method = request['method']
+            arguments = request.get('arguments') or {}
+            result = {}
+
+            stand.count(f'transmission:{method}')
+
+            if method == 'torrent-get':
+                hashes = arguments.get('ids')
+
+                result['torrents'] = [
+                    {
+                        'id': idx,
+                        'name': torrent['name'],
+                        'hashString': torrent['hash'],
+                        'comment': torrent['comment'],
+                        'downloadDir': torrent['download_to'],
+                        'files': [{'name': torrent['name']}],
+                        'fileStats': [{'wanted': True, 'priority': 0}],
+                    }
+                    for idx, torrent in enumerate(list(stand.torrents.values()))
+                    if hashes is None or torrent['hash'] in hashes
+                ]
+
+            elif method == 'torrent-add':
+                stand.add_torrent(b64decode(arguments['metainfo']), arguments.get('download-dir', ''))
+
+            elif method == 'torrent-remove':
+                for hash_str in arguments['ids']:
+                    stand.remove_torrent(hash_str)
+
+            self.reply({'result': 'success', 'arguments': result})
+
+        def handle_qbittorrent(self, path: str):
+            sleep(stand.rpc_latency)
+
+            action = path.removeprefix('/api/v2/')
+            stand.count(f'qbittorrent:{action}')
+
+            if action == 'auth/login':
+                self.read_body()
+                self.reply('Ok.', headers={'Set-Cookie': 'SID=benchmark; path=/'})
+
+            elif action == 'torrents/info':
+                self.reply([
+                    {
+                        'hash': torrent['hash'],
+                        'name': torrent['name'],
+                        'save_path': torrent['download_to'],
+                        'category': '',
+                    }
+                    for torrent in list(stand.torrents.values())
+                ])
+
+            elif action == 'torrents/properties':
+                torrent = stand.torrents.get(self.read_form()['hash'])
+
+                if torrent is None:
+                    self.reply('Not found', status=404)
+                    return
+
+                self.reply({'comment': torrent['comment'], 'save_path': torrent['download_to']})
+
+            elif action == 'torrents/add':
+                stand.add_torrent(self.read_files()['torrents'], '')
+                self.reply('Ok.')
+
+            elif action == 'torrents/delete':
+                for hash_str in self.read_form()['hashes'].split('|'):
+                    stand.remove_torrent(hash_str)
+
+                self.reply('')
+
+            else:
+                self.reply('Not found', status=404)
+
+    return Handler
+
+
+def serve(connection, topics: int, options: dict):
+    """Runs a stand (e.g. in a separate process) sending its URL,
+    torrents registration data and the number of changed topics into a given connection.
+    Serves till anything is received from the connection.
+
+    :param connection: multiprocessing connection
+    :param topics: number of topics
+    :param options: Stand options
+
+    """
+    stand = Stand(topics, **options)
+    stand.start()
+
+    connection.send({
+        'url': stand.url,
+        'torrents': stand.get_registration(),
+        'changed': stand.get_changed(),
+    })
+
+    connection.recv()
+    stand.stop()
+
+
+def main():
+    topics = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+
+    stand = Stand(topics)
+    print(f'Serving {topics} topics at {stand.url}/topic/0 .. {stand.url}/topic/{topics - 1}')
+    print(f'Transmission RPC: {stand.url}/transmission/rpc, qBittorrent: {stand.url}/api/v2/')
+
+    try:
+        stand.server.serve_forever()
+
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,118 @@
+"""Concurrent `get_torrent()` throughput on a single tracker object
+against a local tracker stand-in (see stand.py) by number of threads.
+
+Shows how the walk path scales with threads: on regular CPython builds
+the GIL limits page parsing to one core, free-threaded builds (3.13t+)
+may use all of them. Run it with both builds to compare.
+
+Usage:
+    python -m benchmarks.threads
+    python3.13t -m benchmarks.threads --threads 1,4,8 --topics 2000 --json ft.json
+
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import sysconfig
+from concurrent.futures import ThreadPoolExecutor
+from multiprocessing import get_context
+from pathlib import Path
+from time import perf_counter
+
+from .stand import serve
+from .walk import StandTracker
+
+
+def get_build() -> dict:
+    """Returns Python build information."""
+
+    is_gil_enabled = getattr(sys, '_is_gil_enabled', None)
+
+    return {
+        'python': platform.python_version(),
+        'free_threaded': bool(sysconfig.get_config_var('Py_GIL_DISABLED')),
+        'gil_enabled': is_gil_enabled() if is_gil_enabled else True,
+        'cpus': os.cpu_count(),
+    }
+
+
+def measure(tracker: StandTracker, urls: list[str], *, threads: int) -> dict:
+    """Fetches torrents for given topics URLs in a number of threads. Returns measurements.
+
+    :param tracker: tracker object shared by threads
+    :param urls: topics URLs
+    :param threads: number of threads
+
+    """
+    tracker.pages.clear()
+
+    started = perf_counter()
+
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        results = list(executor.map(lambda url: tracker.get_torrent(url), urls))
+
+    elapsed = perf_counter() - started
+
+    return {
+        'threads': threads,
+        'topics_per_second': round(len(urls) / elapsed, 1),
+        'elapsed': round(elapsed, 2),
+        'failed': sum(result is None for result in results),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser('benchmarks.threads', description='Concurrent get_torrent() throughput.')
+    parser.add_argument('--threads', help='Comma-separated numbers of threads', default='1,2,4,8,16')
+    parser.add_argument('--topics', help='Number of topics', type=int, default=1000)
+    parser.add_argument('--latency', help='Tracker latency (ms)', type=float, default=0)
+    parser.add_argument('--page-size', help='Topic page size (bytes)', type=int, default=30_000)
+    parser.add_argument('--json', help='Write results into a given JSON file', dest='json_path')
+
+    args = parser.parse_args()
+
+    build = get_build()
+    print(
+        f"Python {build['python']}, free-threaded: {build['free_threaded']}, "
+        f"GIL enabled: {build['gil_enabled']}, CPUs: {build['cpus']}"
+    )
+
+    context = get_context('spawn')
+    connection, child_connection = context.Pipe()
+
+    stand = context.Process(target=serve, args=(child_connection, args.topics, {
+        'latency': args.latency / 1000,
+        'page_size': args.page_size,
+        'change_rate': 1,  # All torrents are downloaded.
+    }), daemon=True)
+    stand.start()
+
+    results = []
+
+    try:
+        stand_info = connection.recv()
+        urls = [torrent['url'] for torrent in stand_info['torrents'].values()]
+        tracker = StandTracker()
+
+        for threads in map(int, args.threads.split(',')):
+            result = measure(tracker, urls, threads=threads)
+            results.append(result)
+
+            print(
+                f"{threads:>4} thread(s): {result['topics_per_second']:8.1f} topics/s "
+                f"(x{result['topics_per_second'] / results[0]['topics_per_second']:.2f})"
+                + (f", {result['failed']} failed" if result['failed'] else '')
+            )
+
+    finally:
+        connection.send(None)
+        stand.join(timeout=10)
+
+    if args.json_path:
+        Path(args.json_path).write_text(json.dumps({'build': build, 'results': results}, indent=4))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,253 @@
+"""End-to-end walk benchmark against local tracker and torrent clients stand-ins (see stand.py).
+
+For every number of topics the stand and the walk are run in separate processes,
+so that the walk process memory is measured alone. Measured:
+
+    * walk throughput (topics per second);
+    * walk process peak memory growth (RSS, MiB);
+    * the number of requests to the tracker and to the torrent client.
+
+Results are compared with baselines (baselines.json) to catch regressions:
+throughput and memory are compared with a tolerance, requests counts should not grow.
+Baselines depend on the machine, so they should be recorded (`--save`) before changes are measured.
+
+Usage:
+    python -m benchmarks.walk
+    python -m benchmarks.walk --topics 100,1000 --rpc qbittorrent --engine aio
+    python -m benchmarks.walk --save
+
+"""
+import argparse
+import asyncio
+import json
+import resource
+import sys
+from multiprocessing import get_context
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from time import perf_counter
+
+import requests
+
+from torrt import aio
+from torrt.base_tracker import GenericPublicTracker
+from torrt.rpc.qbittorrent import QBittorrentRPC
+from torrt.rpc.transmission import TransmissionRPC
+from torrt.toolbox import update_torrents
+from torrt.utils import RPCObjectsRegistry, TorrtConfig, TrackerObjectsRegistry, config
+
+from .stand import serve
+
+BASELINES_FILE = Path(__file__).parent / 'baselines.json'
+
+ENGINES = ('threaded', 'aio')
+RPCS = ('transmission', 'qbittorrent')
+
+
+class StandTracker(GenericPublicTracker):
+    """Tracker stand-in handler. See stand.py."""
+
+    alias = '127.0.0.1'
+    active = False  # Not to be registered globally.
+    info_hash_on_page = True
+
+    def get_download_link(self, url: str) -> str:
+        return f'{url}/dl'
+
+
+def get_rss_mb() -> float:
+    """Returns peak resident set size of the current process (MiB)."""
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def run_walk(connection, *, engine: str, rpc: str, url: str, torrents: dict[str, dict], pipeline: dict):
+    """Performs a walk sending results into a given connection. Run in a separate process.
+
+    :param connection: multiprocessing connection
+    :param engine: threaded, aio
+    :param rpc: torrent client stand-in to use: transmission, qbittorrent
+    :param url: stand URL
+    :param torrents: torrents to be checked
+    :param pipeline: walk pipeline settings for threaded engine
+
+    """
+    if rpc == 'transmission':
+        rpc_object = TransmissionRPC(url=f'{url}/transmission/rpc', enabled=True)
+    else:
+        rpc_object = QBittorrentRPC(url=f'{url}/api/v2/', enabled=True)
+
+    TrackerObjectsRegistry._items = {StandTracker.alias: StandTracker()}
+    RPCObjectsRegistry._items = {rpc_object.alias: rpc_object}
+
+    with TemporaryDirectory() as tmp:
+        TorrtConfig.USER_SETTINGS_FILE = Path(tmp) / 'torrt.json'
+        config.bootstrap()
+
+        rss_started = get_rss_mb()
+
+        with config.deferred():
+            started = perf_counter()
+
+            if engine == 'aio':
+                updated = asyncio.run(aio.update_torrents(torrents))
+
+            else:
+                updated = update_torrents(torrents, pipeline=pipeline)
+
+            elapsed = perf_counter() - started
+
+    connection.send({
+        'elapsed': elapsed,
+        'updated': len(updated),
+        'rss_mb': get_rss_mb() - rss_started,
+    })
+
+
+def measure(
+        topics: int,
+        *,
+        engine: str,
+        rpc: str,
+        stand_options: dict,
+        pipeline: dict
+) -> dict:
+    """Runs stand and walk processes. Returns measurements.
+
+    :param topics: number of topics
+    :param engine: threaded, aio
+    :param rpc: transmission, qbittorrent
+    :param stand_options: Stand options
+    :param pipeline: walk pipeline settings
+
+    """
+    context = get_context('spawn')
+
+    stand_connection, stand_child_connection = context.Pipe()
+    stand = context.Process(target=serve, args=(stand_child_connection, topics, stand_options), daemon=True)
+    stand.start()
+
+    try:
+        stand_info = stand_connection.recv()
+
+        walk_connection, walk_child_connection = context.Pipe()
+        walker = context.Process(target=run_walk, args=(walk_child_connection,), kwargs={
+            'engine': engine,
+            'rpc': rpc,
+            'url': stand_info['url'],
+            'torrents': stand_info['torrents'],
+            'pipeline': pipeline,
+        })
+        walker.start()
+        result = walk_connection.recv()
+        walker.join()
+
+        stats = requests.get(f"{stand_info['url']}/_stats", timeout=10).json()
+
+    finally:
+        stand_connection.send(None)
+        stand.join(timeout=10)
+
+    if result['updated'] != stand_info['changed']:
+        print(
+            f"  WARNING: {result['updated']} torrent(s) updated, {stand_info['changed']} expected",
+            file=sys.stderr
+        )
+
+    return {
+        'topics_per_second': round(topics / result['elapsed'], 1),
+        'elapsed': round(result['elapsed'], 2),
+        'rss_mb': round(result['rss_mb'], 1),
+        'updated': result['updated'],
+        'requests': sum(stats.values()),
+        'requests_by_kind': dict(sorted(stats.items())),
+    }
+
+
+def compare(key: str, result: dict, baseline: dict | None, *, tolerance: float) -> list[str]:
+    """Returns descriptions of regressions of a result against a baseline.
+
+    :param key: benchmark identifier
+    :param result: measurements
+    :param baseline: baseline measurements
+    :param tolerance: allowed relative throughput and memory degradation
+
+    """
+    if not baseline:
+        return []
+
+    regressions = []
+
+    if result['topics_per_second'] < baseline['topics_per_second'] * (1 - tolerance):
+        regressions.append(
+            f"{key}: throughput {result['topics_per_second']} < {baseline['topics_per_second']} topics/s")
+
+    # Small processes memory growth is noisy.
+    if result['rss_mb'] > max(baseline['rss_mb'] * (1 + tolerance), baseline['rss_mb'] + 10):
+        regressions.append(f"{key}: memory {result['rss_mb']} > {baseline['rss_mb']} MiB")
+
+    if result['requests'] > baseline['requests']:
+        regressions.append(f"{key}: requests {result['requests']} > {baseline['requests']}")
+
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser('benchmarks.walk', description='End-to-end walk benchmark.')
+    parser.add_argument('--topics', help='Comma-separated numbers of topics', default='100,1000,10000')
+    parser.add_argument('--engine', help='Walk engine', choices=ENGINES, default='threaded')
+    parser.add_argument('--rpc', help='Torrent client stand-in', choices=RPCS, default='transmission')
+    parser.add_argument('--latency', help='Tracker latency (ms)', type=float, default=20)
+    parser.add_argument('--rpc-latency', help='Torrent client latency (ms)', type=float, default=0)
+    parser.add_argument('--page-size', help='Topic page size (bytes)', type=int, default=30_000)
+    parser.add_argument('--change-rate', help='Share of topics with updated torrents', type=float, default=0.1)
+    parser.add_argument('--pipeline', help='Walk pipeline settings as JSON', type=json.loads, default={})
+    parser.add_argument('--tolerance', help='Allowed throughput and memory degradation', type=float, default=0.2)
+    parser.add_argument('--save', help='Save results as baselines', action='store_true')
+    parser.add_argument('--json', help='Write results into a given JSON file', dest='json_path')
+
+    args = parser.parse_args()
+
+    stand_options = {
+        'latency': args.latency / 1000,
+        'rpc_latency': args.rpc_latency / 1000,
+        'page_size': args.page_size,
+        'change_rate': args.change_rate,
+    }
+
+    baselines = json.loads(BASELINES_FILE.read_text()) if BASELINES_FILE.exists() else {}
+    results = {}
+    regressions = []
+
+    for topics in map(int, args.topics.split(',')):
+        key = f'{args.engine}/{args.rpc}/{topics}'
+
+        result = results[key] = measure(
+            topics, engine=args.engine, rpc=args.rpc, stand_options=stand_options, pipeline=args.pipeline)
+
+        baseline = baselines.get(key)
+        regressions.extend(compare(key, result, baseline, tolerance=args.tolerance))
+
+        print(
+            f"{key:>30}: {result['elapsed']:8.2f} s {result['topics_per_second']:8.1f} topics/s "
+            f"{result['rss_mb']:7.1f} MiB {result['requests']:7} requests"
+            + (f" (baseline {baseline['topics_per_second']} topics/s)" if baseline else '')
+        )
+
+    if args.json_path:
+        Path(args.json_path).write_text(json.dumps(results, indent=4))
+
+    if args.save:
+        baselines.update({
+            key: {name: value for name, value in result.items() if name != 'requests_by_kind'}
+            for key, result in results.items()
+        })
+        BASELINES_FILE.write_text(json.dumps(dict(sorted(baselines.items())), indent=4) + '\n')
+        print(f'Baselines are saved into {BASELINES_FILE}')
+
+    if regressions:
+        print('Regressions:', *regressions, sep='\n  ', file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,719 @@
+"""asyncio support.
+
+Allows to keep thousands of topic checks in flight on one thread:
+
+    import asyncio
+    from torrt.aio import walk
+
+    asyncio.run(walk(forced=True))
+
+Existing (synchronous) trackers and RPCs are used through adapters. Torrent pages
+and .torrent files are fetched with AsyncHttpClient, whereas blocking code
+(logins, tracker specific downloads, RPC calls) is run in threads.
+
+Native implementations may be provided by defining coroutine methods
+conforming to AsyncTracker and AsyncRPC protocols.
+
+Requires `aiohttp` (pip install torrt[aio]).
+
+"""
+import asyncio
+import logging
+from datetime import datetime
+from inspect import iscoroutinefunction
+from json import JSONDecodeError, dumps
+from time import perf_counter
+from typing import TYPE_CHECKING, Any, Protocol, Self
+from urllib.parse import urlsplit
+
+from .base_tracker import GenericPrivateTracker, GenericPublicTracker, TorrentPage
+from .cassettes import PLAYER, CassetteMiss
+from .context import get_run_context, run_context
+from .exceptions import TorrtException, TorrtRPCException
+from .metrics import METRICS
+from .pipeline import WalkProgress, describe_failure, make_walk_jobs
+from .toolbox import finish_walk, make_walk_progress, start_walk, unregister_torrent
+from .tracing import span
+from .utils import HttpClient, TorrentData, config, dump_contents, iter_rpc, make_response, structure_torrent_data
+
+try:
+    import aiohttp
+
+except ImportError:
+    aiohttp = None
+
+if TYPE_CHECKING:
+    from requests import Response
+
+    from .base_rpc import BaseRPC
+    from .base_tracker import BaseTracker
+    from .cassettes import Cassette
+
+LOGGER = logging.getLogger(__name__)
+
+_GENERIC_DOWNLOADS = {GenericPublicTracker.download_torrent, GenericPrivateTracker.download_torrent}
+"""Downloads implementations known to be safe to be replaced with asynchronous ones."""
+
+
+class AsyncHttpClient:
+    """Common client to perform HTTP requests asynchronously. See HttpClient."""
+
+    timeout: int = HttpClient.timeout
+
+    user_agent: str = HttpClient.user_agent
+
+    def __init__(
+            self,
+            *,
+            silence_exceptions: bool = False,
+            dump_fname_tpl: str = '%(ts)s.txt',
+            json: bool = False,
+            tunnel: bool = True,
+            connections: int = 100,
+            connections_per_host: int = 0,
+    ):
+        """
+        :param silence_exceptions: Do not raise exceptions
+        :param dump_fname_tpl: Dump file name template
+        :param json: Send and receive data as JSON
+        :param tunnel: Use proxies from environment (see toolbox.tunnel()). SOCKS proxies are not supported.
+        :param connections: Maximum number of simultaneous connections
+        :param connections_per_host: Maximum number of simultaneous connections to one host. 0 - no limit.
+
+        """
+        if aiohttp is None:
+            raise TorrtException('asyncio support requires aiohttp library (pip install torrt[aio])')
+
+        self.silence_exceptions = silence_exceptions
+        self.dump_fname_tpl = dump_fname_tpl
+        self.json = json
+        self.tunnel = tunnel
+        self.connections = connections
+        self.connections_per_host = connections_per_host
+        self.last_error: str = ''
+
+        self._session: aiohttp.ClientSession | None = None
+
+    async def __aenter__(self) -> Self:
+        return self
+
+    async def __aexit__(self, *args):
+        await self.close()
+
+    async def close(self):
+        """Closes underlying HTTP session."""
+
+        session = self._session
+
+        if session is not None:
+            self._session = None
+            await session.close()
+
+    def _get_session(self) -> 'aiohttp.ClientSession':
+        session = self._session
+
+        if session is None or session.closed:
+            session = self._session = aiohttp.ClientSession(
+                headers={'User-agent': self.user_agent},
+                connector=aiohttp.TCPConnector(limit=self.connections, limit_per_host=self.connections_per_host),
+                cookie_jar=aiohttp.CookieJar(unsafe=True),  # Allows cookies for IP addresses.
+                trust_env=self.tunnel,
+            )
+
+        return session
+
+    async def request(
+            self,
+            url: str,
+            *,
+            data: dict[str, Any] | None = None,
+            referer: str = '',
+            allow_redirects: bool = True,
+            cookies: dict[str, str] | None = None,
+            headers: dict[str, str] | None = None,
+            json: bool | None = None,
+            silence_exceptions: bool | None = None,
+            timeout: int = 0,
+            **kwargs
+    ) -> 'Response | dict | None':
+        """Returns Requests response object (or a dict if JSON is used) for the given URL.
+
+        :param url: URL to address
+        :param data: Data to send to URL
+        :param referer:
+        :param allow_redirects:
+        :param cookies:
+        :param headers: Additional headers
+        :param json: Send and receive data as JSON
+        :param silence_exceptions: Do not raise exceptions
+        :param timeout: Override timeout.
+        :param kwargs:
+
+        """
+        LOGGER.debug(f'Fetching {url} ...')
+
+        headers = {**(headers or {})}
+
+        if referer:
+            headers['Referer'] = referer
+
+        if json is None:
+            json = self.json
+
+        r_kwargs = {
+            'timeout': aiohttp.ClientTimeout(total=timeout or self.timeout),
+            'cookies': cookies,
+            'headers': headers,
+            'allow_redirects': allow_redirects,
+            **kwargs,
+        }
+
+        proxy = HttpClient.proxies.get(urlsplit(url).scheme, '') if self.tunnel else ''
+
+        if proxy.startswith('http'):
+            # SOCKS proxies are not supported.
+            r_kwargs['proxy'] = proxy
+
+        method = 'GET'
+
+        if data:
+            method = 'POST'
+            r_kwargs['json' if json else 'data'] = data
+
+        host = urlsplit(url).netloc
+
+        try:
+            with (
+                METRICS.timed('torrt_http_request_seconds', host=host),
+                span('http.request', **{
+                    'http.request.method': method,
+                    'server.address': host,
+                    'url.full': url,
+                }) as request_span,
+            ):
+                if cassette := PLAYER.cassette:
+                    response = await self._request_cassette(cassette, method, url, data, r_kwargs)
+
+                else:
+                    async with self._get_session().request(method, url, **r_kwargs) as response:
+                        response = make_response(
+                            str(response.url),
+                            await response.read(),
+                            status_code=response.status,
+                            headers=response.headers,
+                        )
+
+                request_span.set(**{
+                    'http.response.status_code': response.status_code,
+                    'http.response.body.size': len(response.content),
+                })
+
+        except (aiohttp.ClientError, TimeoutError) as e:
+
+            METRICS.increment('torrt_http_requests_total', host=host, status='error')
+
+            self.last_error = f'{e}'
+            LOGGER.warning(f"Failed to get response from `{url}`: {e!r}")
+
+            if silence_exceptions is None:
+                silence_exceptions = self.silence_exceptions
+
+            if silence_exceptions:
+                return None
+
+            raise
+
+        METRICS.increment('torrt_http_requests_total', host=host, status=f'{response.status_code}')
+
+        if get_run_context().dumper.enabled:
+            dump_contents(self.dump_fname_tpl, response.content, url=url, status=response.status_code)
+
+        if json:
+            try:
+                return response.json()
+
+            except JSONDecodeError:
+                return {}
+
+        return response
+
+    async def _request_cassette(
+            self,
+            cassette: 'Cassette',
+            method: str,
+            url: str,
+            data: dict[str, Any] | None,
+            r_kwargs: dict[str, Any]
+    ) -> 'Response':
+        # Requests bodies are not the ones sent by HttpClient, so the interactions
+        # are to be recorded and replayed with AsyncHttpClient.
+        body = dumps(data, sort_keys=True, default=str) if data else None
+
+        if cassette.record:
+            started = perf_counter()
+
+            async with self._get_session().request(method, url, **r_kwargs) as response:
+                content = await response.read()
+
+                cassette.add(
+                    method,
+                    url,
+                    body,
+                    status=response.status,
+                    reason=response.reason or '',
+                    headers=response.headers.items(),
+                    content=content,
+                    elapsed=perf_counter() - started,
+                )
+
+                return make_response(str(response.url), content, status_code=response.status, headers=response.headers)
+
+        try:
+            interaction, content = cassette.find(method, url, body)
+
+        except CassetteMiss as e:
+            raise aiohttp.ClientConnectionError(f'{e}') from e
+
+        if cassette.latency:
+            await asyncio.sleep(interaction['elapsed'])
+
+        return make_response(url, content, status_code=interaction['status'], headers=dict(interaction['headers']))
+
+
+class AsyncTracker(Protocol):
+    """Asynchronous tracker handler protocol."""
+
+    alias: str
+
+    async def get_torrent(
+            self,
+            url: str,
+            *,
+            last_updated: datetime | None = None,
+            known_hash: str = ''
+    ) -> TorrentData | None:
+        """See BaseTracker.get_torrent()."""
+
+
+class AsyncRPC(Protocol):
+    """Asynchronous RPC protocol."""
+
+    alias: str
+
+    async def method_get_torrents(self, hashes: list[str] | None = None) -> list[dict]:
+        """See BaseRPC.method_get_torrents()."""
+
+    async def method_add_torrent(
+            self, torrent: TorrentData, *, download_to: str = '', params: dict | None = None) -> Any:
+        """See BaseRPC.method_add_torrent()."""
+
+    async def method_remove_torrent(self, hash_str: str, *, with_data: bool = False) -> Any:
+        """See BaseRPC.method_remove_torrent()."""
+
+
+class SyncTrackerAdapter:
+    """Allows synchronous tracker handlers to be used as asynchronous ones.
+
+    Torrent pages and .torrent files are fetched with asynchronous HTTP client,
+    page data is extracted in offline mode (see BaseTracker.extract_offline()).
+    Blocking tracker methods are run in threads when unavoidable,
+    e.g. for logins or tracker specific downloads.
+
+    """
+
+    def __init__(self, tracker: 'BaseTracker', client: AsyncHttpClient):
+        self.tracker = tracker
+        self.client = client
+        self.alias = tracker.alias
+
+        self._mirror_lock = asyncio.Lock()
+
+    async def get_request_url(self, url: str, *, query_string: str = '') -> str:
+        """See BaseTracker.get_request_url().
+
+        :param url:
+        :param query_string:
+
+        """
+        tracker = self.tracker
+
+        if tracker.mirror_picked is None:
+            async with self._mirror_lock:
+                if tracker.mirror_picked is None:
+                    await asyncio.to_thread(tracker.pick_mirror, url)
+
+        return tracker.get_request_url(url, query_string=query_string)
+
+    async def get_page(self, url: str) -> TorrentPage:
+        """See BaseTracker.get_page().
+
+        :param url:
+
+        """
+        tracker = self.tracker
+
+        with span('get_page', tracker=tracker.alias, **{'url.full': url}) as page_span:
+            page = tracker.pages.get(url)
+            cache_hit = page is not None and page.response is not None
+
+            page_span.set(cache_hit=cache_hit)
+
+            if cache_hit:
+                return page
+
+            if isinstance(tracker, GenericPrivateTracker) and tracker.session_expired():
+                await asyncio.to_thread(tracker.login, tracker.extract_domain(url))
+
+            response = await self.client.request(
+                await self.get_request_url(url, query_string=tracker.get_query_string()),
+                referer=url,
+                cookies=tracker.cookies,
+            )
+
+            page = TorrentPage(url, response)
+            tracker.pages.add(page)
+
+        return page
+
+    async def get_torrent(
+            self,
+            url: str,
+            *,
+            last_updated: datetime | None = None,
+            known_hash: str = ''
+    ) -> TorrentData | None:
+        """See BaseTracker.get_torrent().
+
+        :param url:
+        :param last_updated:
+        :param known_hash:
+
+        """
+        tracker = self.tracker
+        kwargs = {'last_updated': last_updated, 'known_hash': known_hash}
+
+        page = await self.get_page(url)
+        response = page.response
+
+        handled = False
+        torrent = None
+
+        if response is not None:
+            # Page parsing is CPU-bound, not to block the event loop.
+            handled, torrent = await asyncio.to_thread(
+                type(tracker).extract_offline,
+                tracker.get_settings(),
+                url,
+                response.content,
+                headers=dict(response.headers),
+                encoding=response.encoding,
+                **kwargs,
+            )
+
+        if not handled:
+            # E.g. a login is required. The page fetched is pinned not to be fetched again.
+            torrent = await asyncio.to_thread(self._get_torrent_meta, page, **kwargs)
+
+        if torrent is None:
+            if tracker.pages.get(url) is None:
+                # Kept for the failure description (see describe_failure()).
+                tracker.pages.add(page)
+
+            return None
+
+        if torrent.hash:
+            return torrent
+
+        return await self.fetch_torrent_file(torrent)
+
+    def _get_torrent_meta(self, page: TorrentPage, **kwargs) -> TorrentData | None:
+        tracker = self.tracker
+
+        with tracker.pages.pinned(page):
+            return tracker.get_torrent_meta(page.url, **kwargs)
+
+    async def fetch_torrent_file(self, torrent: TorrentData) -> TorrentData | None:
+        """See GenericTracker.fetch_torrent_file().
+
+        :param torrent:
+
+        """
+        tracker = self.tracker
+
+        if type(tracker).download_torrent not in _GENERIC_DOWNLOADS:
+            return await asyncio.to_thread(tracker.fetch_torrent_file, torrent)
+
+        url = torrent.url_file
+        tracker.log_debug(f'Downloading torrent file from {url} ...')
+
+        query_string = ''
+        cookies = None
+
+        if isinstance(tracker, GenericPrivateTracker):
+            tracker.before_download(url)
+            query_string = tracker.get_query_string()
+            cookies = tracker.cookies
+
+        response = await self.client.request(
+            await self.get_request_url(url, query_string=query_string),
+            referer=torrent.url,
+            cookies=cookies,
+        )
+
+        return tracker.make_torrent_data(torrent, getattr(response, 'content', None))
+
+
+class SyncRPCAdapter:
+    """Allows synchronous RPC objects to be used as asynchronous ones.
+    RPC methods are run in threads one at a time.
+
+    """
+
+    def __init__(self, rpc: 'BaseRPC'):
+        self.rpc = rpc
+        self.alias = rpc.alias
+
+        self._lock = asyncio.Lock()
+
+    async def _call(self, method, *args, **kwargs):
+        async with self._lock:
+            return await asyncio.to_thread(method, *args, **kwargs)
+
+    async def method_get_torrents(self, hashes: list[str] | None = None) -> list[dict]:
+        return await self._call(self.rpc.method_get_torrents, hashes)
+
+    async def method_add_torrent(
+            self, torrent: TorrentData, *, download_to: str = '', params: dict | None = None) -> Any:
+        return await self._call(self.rpc.method_add_torrent, torrent, download_to=download_to, params=params)
+
+    async def method_remove_torrent(self, hash_str: str, *, with_data: bool = False) -> Any:
+        return await self._call(self.rpc.method_remove_torrent, hash_str, with_data=with_data)
+
+
+def adapt_tracker(tracker: 'BaseTracker | AsyncTracker', client: AsyncHttpClient) -> AsyncTracker:
+    """Returns asynchronous tracker handler for the given one.
+
+    :param tracker:
+    :param client: HTTP client to be used by adapter
+
+    """
+    if iscoroutinefunction(tracker.get_torrent):
+        return tracker
+
+    return SyncTrackerAdapter(tracker, client)
+
+
+def adapt_rpc(rpc: 'BaseRPC | AsyncRPC') -> AsyncRPC:
+    """Returns asynchronous RPC object for the given one.
+
+    :param rpc:
+
+    """
+    if iscoroutinefunction(rpc.method_add_torrent):
+        return rpc
+
+    return SyncRPCAdapter(rpc)
+
+
+async def update_torrents(
+        torrents: dict[str, dict],
+        *,
+        remove_outdated: bool = True,
+        use_feeds: bool = False,
+        concurrency: int = 500,
+        client: AsyncHttpClient | None = None,
+        progress: WalkProgress | None = None
+) -> dict[str, dict]:
+    """Performs torrent updates. See toolbox.update_torrents().
+    Returns hash-indexed dictionary with information on updated torrents
+
+    :param torrents: torrents data indexed with hashes
+    :param remove_outdated: flag to remove outdated torrents from torrent clients
+    :param use_feeds: flag to check only those torrents which are listed in trackers feeds
+        of recently updated torrents (for trackers having such feeds)
+    :param concurrency: maximum number of torrents checked at once
+    :param client: HTTP client to use. If not set, a new one is created and closed afterwards.
+    :param progress: walk progress to limit the walk in time and to resume from.
+        Updated torrents information is collected into it as soon as they are updated.
+
+    """
+    if client is None:
+        async with AsyncHttpClient(silence_exceptions=True, connections=concurrency) as client:
+            return await update_torrents(
+                torrents,
+                remove_outdated=remove_outdated,
+                use_feeds=use_feeds,
+                concurrency=concurrency,
+                client=client,
+                progress=progress,
+            )
+
+    rpc_objects = [adapt_rpc(rpc_object) for _, rpc_object in iter_rpc()]
+    hashes = list(torrents)
+
+    rpc_torrents = []
+
+    for rpc_object, rpc_object_torrents in zip(
+            rpc_objects,
+            await asyncio.gather(*(rpc_object.method_get_torrents(hashes) for rpc_object in rpc_objects)),
+            strict=True,
+    ):
+        LOGGER.info(f'Got {len(rpc_object_torrents)} torrent(s) from `{rpc_object.alias}`')
+        rpc_torrents.extend((rpc_object, rpc_torrent) for rpc_torrent in rpc_object_torrents)
+
+    if progress is None:
+        progress = WalkProgress()
+
+    # Bulk lookups and feeds are synchronous.
+    jobs = await asyncio.to_thread(
+        make_walk_jobs, torrents, rpc_torrents, use_feeds=use_feeds, progress=progress)
+
+    trackers = {}
+    updated_by_hashes = progress.updated
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def check(job):
+        try:
+            await check_job(job)
+
+        finally:
+            semaphore.release()
+
+    async def check_job(job):
+        with span('topic', tracker=job.tracker.alias, **{'url.full': job.url}) as topic_span:
+            try:
+                await check_topic(job, topic_span)
+
+            except Exception as e:
+                # E.g. a tracker handler failed on a changed page markup.
+                # Registered as the page failure not to stop the walk.
+                LOGGER.debug(f'Check failed for `{job.url}`', exc_info=True)
+                error = repr(e)
+                topic_span.record_error(error)
+                progress.fail(job, error)
+
+    async def check_topic(job, topic_span):
+        tracker = trackers.get(id(job.tracker))
+
+        if tracker is None:
+            tracker = trackers[id(job.tracker)] = adapt_tracker(job.tracker, client)
+
+        tracker_torrent = await tracker.get_torrent(
+            job.url, last_updated=job.last_updated, known_hash=job.known_hash)
+
+        if tracker_torrent is None:
+            error = describe_failure(job.tracker.pages.get(job.url))
+            topic_span.record_error(error)
+            progress.fail(job, error)
+            return
+
+        progress.succeed(job)
+
+        for rpc_object, rpc_torrent in job.torrents:
+            name = rpc_torrent['name']
+
+            if rpc_torrent['hash'] == tracker_torrent.hash or not tracker_torrent.raw:
+                LOGGER.info(f'  `{name}`: No updates')
+                continue
+
+            try:
+                await rpc_object.method_add_torrent(
+                    tracker_torrent,
+                    download_to=rpc_torrent['download_to'],
+                    params=rpc_torrent.get('params', None)
+                )
+                tracker_torrent.url = job.url
+
+                LOGGER.info(f'  `{name}`: Torrent is updated')
+
+                structure_torrent_data(updated_by_hashes, rpc_torrent['hash'], tracker_torrent)
+                topic_span.set(updated=True)
+
+            except TorrtRPCException as e:
+                LOGGER.error(f'  `{name}`: Unable to replace torrent: {e}')
+
+            else:
+                unregister_torrent(rpc_torrent['hash'])
+
+                if remove_outdated:
+                    await rpc_object.method_remove_torrent(rpc_torrent['hash'])
+
+    tasks = []
+    failed = asyncio.Event()
+
+    def on_task_done(task: asyncio.Task):
+        if not task.cancelled() and task.exception() is not None:
+            failed.set()
+
+    # Jobs are dispatched as concurrency allows, so that the time budget is respected.
+    for job in progress.dispatch(jobs):
+        await semaphore.acquire()
+
+        if failed.is_set():
+            semaphore.release()
+            break
+
+        task = asyncio.create_task(check(job))
+        task.add_done_callback(on_task_done)
+        tasks.append(task)
+
+    results = await asyncio.gather(*tasks, return_exceptions=True)
+
+    for result in results:
+        if isinstance(result, Exception):
+            raise result
+
+    return updated_by_hashes
+
+
+async def walk(
+        *,
+        forced: bool = False,
+        silent: bool = False,
+        remove_outdated: bool = True,
+        concurrency: int = 500,
+        budget: int = 0
+):
+    """Performs updates check for the registered torrents. See toolbox.walk().
+
+    :param forced: flag not to count walk interval setting
+    :param silent: flag to suppress possible torrt exceptions
+    :param remove_outdated: flag to remove torrents that are superseded by a new ones
+    :param concurrency: maximum number of torrents checked at once
+    :param budget: walk time budget in seconds. 0 - no limit.
+
+    """
+    LOGGER.info('Torrent walk is triggered')
+
+    started = start_walk(forced=forced)
+
+    if started is None:
+        return
+
+    cfg, now, full_check = started
+    progress = make_walk_progress(cfg, budget=budget)
+
+    with config.deferred():
+
+        try:
+            with run_context(), span('walk', budget=budget, full_check=full_check):
+                await update_torrents(
+                    cfg['torrents'],
+                    remove_outdated=remove_outdated,
+                    use_feeds=not full_check,
+                    concurrency=concurrency,
+                    progress=progress,
+                )
+
+        except TorrtException as e:
+            if not silent:
+                raise
+
+            LOGGER.error(f'Walk failed. Reason: {e}')
+
+        finally:
+            # Notifiers are synchronous.
+            await asyncio.to_thread(
+                finish_walk, cfg, progress.updated, now=now, full_check=full_check, progress=progress)
+
+    LOGGER.info('Torrent walk is finished')
@@ -1,5 +1,7 @@
 from typing import Any, ClassVar
 
+from .metrics import timed_method
+from .tracing import traced_method
 from .utils import HttpClient, RPCClassesRegistry, RPCObjectsRegistry, TorrentData, WithSettings
 
 
@@ -25,6 +27,18 @@ class BaseRPC(WithSettings):
         self.logged_in = False
 
     def __init_subclass__(cls, **kwargs):
+        for name, value in list(vars(cls).items()):
+            if name.startswith('method_') and callable(value) and not getattr(value, 'timed', False):
+                setattr(cls, name, traced_method(
+                    f'rpc.{name}',
+                    rpc=lambda rpc: rpc.alias,
+                )(timed_method(
+                    'torrt_rpc_call_seconds',
+                    errors='torrt_rpc_errors_total',
+                    rpc=lambda rpc: rpc.alias,
+                    method=name,
+                )(value)))
+
         if cls.alias:
             RPCClassesRegistry.add(cls)
 
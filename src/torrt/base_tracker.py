@@ -1,26 +1,207 @@
 import re
+from collections import Counter, OrderedDict
+from collections.abc import Callable, Generator
+from contextlib import contextmanager
+from contextvars import ContextVar
 from datetime import datetime
+from functools import wraps
+from html import unescape
 from http.cookiejar import CookieJar
 from itertools import chain
-from locale import LC_ALL, getlocale, setlocale
+from threading import Lock
+from time import monotonic, time
 from typing import ClassVar
 from urllib.parse import parse_qs, urljoin, urlparse
 
-from .exceptions import TorrtTrackerException
+from .dates import parse_datetime
+from .exceptions import TorrtTrackerOfflineException
+from .metrics import METRICS, timed_method
+from .tracing import span, traced_method
 from .utils import (
     BeautifulSoup,
+    HitsCounter,
     HttpClient,
     PageData,
     Response,
+    SoupStrainer,
     TorrentData,
     TrackerClassesRegistry,
     TrackerObjectsRegistry,
     WithSettings,
     encode_value,
+    get_info_hash_from_magnet,
+    get_links_from_feed,
+    make_response,
     make_soup,
     parse_torrent,
+    split_cookie_jar,
 )
 
+RE_MAGNET = re.compile(r'^magnet:')
+
+FastPathHits = HitsCounter()
+"""Fast path extractors hits counter. Keys are (tracker alias, extractor name)."""
+
+_OFFLINE_TRACKERS: dict[type['BaseTracker'], tuple[dict, 'BaseTracker']] = {}
+"""Tracker objects used by .extract_offline() indexed by tracker classes."""
+
+_TRACKER_OPERATION: ContextVar[str] = ContextVar('torrt_tracker_operation', default='')
+"""Tracker operation being recorded. See instrument_operation()."""
+
+
+def instrument_operation(func: Callable, operation: str) -> Callable:
+    """Returns a tracker method recording its span and timings (see `torrt_tracker_call_seconds` metric).
+    Nested calls of the same operation (e.g. super() ones) and offline extractions
+    (see BaseTracker.extract_offline()) are not recorded.
+
+    :param func: tracker method
+    :param operation: operation name
+
+    """
+    instrumented = traced_method(
+        f'tracker.{operation}',
+        tracker=lambda tracker: tracker.alias,
+    )(timed_method(
+        'torrt_tracker_call_seconds',
+        errors='torrt_tracker_errors_total',
+        tracker=lambda tracker: tracker.alias,
+        operation=operation,
+    )(func))
+
+    @wraps(func)
+    def wrapper(self, *args, **kwargs):
+        if self.offline or _TRACKER_OPERATION.get() == operation:
+            return func(self, *args, **kwargs)
+
+        token = _TRACKER_OPERATION.set(operation)
+
+        try:
+            return instrumented(self, *args, **kwargs)
+
+        finally:
+            _TRACKER_OPERATION.reset(token)
+
+    wrapper.timed = True
+
+    return wrapper
+
+
+class TorrentPage:
+    """Represents fetched torrent page. Page soup is built on demand."""
+
+    __slots__ = ['lock', 'response', 'soup', 'time_fetched', 'url']
+
+    def __init__(self, url: str, response: Response | None):
+        self.url = url
+        self.response = response
+        self.soup: BeautifulSoup | None = None
+        self.time_fetched = monotonic()
+        # Guards lazy soup building.
+        self.lock = Lock()
+
+
+class PagesCache:
+    """Thread-safe LRU cache for torrent pages indexed by URLs."""
+
+    __slots__ = ['_lock', '_pages', '_pinned', 'size', 'ttl']
+
+    def __init__(self, *, size: int, ttl: int):
+        """
+        :param size: maximum number of pages to keep
+        :param ttl: seconds to keep a page for
+
+        """
+        self.size = size
+        self.ttl = ttl
+        self._pages: OrderedDict[str, TorrentPage] = OrderedDict()
+        self._pinned: Counter[str] = Counter()
+        self._lock = Lock()
+
+    def get(self, url: str) -> TorrentPage | None:
+        """Returns a cached page for URL if any.
+
+        :param url:
+
+        """
+        with self._lock:
+            page = self._pages.get(url)
+
+            if page is None:
+                return None
+
+            if monotonic() - page.time_fetched > self.ttl and url not in self._pinned:
+                del self._pages[url]
+                return None
+
+            self._pages.move_to_end(url)
+
+            return page
+
+    def add(self, page: TorrentPage):
+        """Puts a page into cache.
+
+        :param page:
+
+        """
+        with self._lock:
+            self._put(page)
+
+    @contextmanager
+    def pinned(self, page: TorrentPage) -> Generator[TorrentPage, None, None]:
+        """Puts a page into cache and keeps it there regardless of cache size and TTL
+        till the context is exited. Allows a page fetched beforehand to be processed
+        without being fetched again.
+
+        :param page:
+
+        """
+        url = page.url
+
+        with self._lock:
+            self._pinned[url] += 1
+            self._put(page)
+
+        try:
+            yield page
+
+        finally:
+            with self._lock:
+                self._pinned[url] -= 1
+
+                if not self._pinned[url]:
+                    del self._pinned[url]
+
+                self._evict()
+
+    def drop(self, url: str):
+        """Removes a page from the cache.
+
+        :param url:
+
+        """
+        with self._lock:
+            self._pages.pop(url, None)
+
+    def clear(self):
+        """Drops all cached pages."""
+        with self._lock:
+            self._pages.clear()
+
+    def _put(self, page: TorrentPage):
+        self._pages[page.url] = page
+        self._pages.move_to_end(page.url)
+        self._evict()
+
+    def _evict(self):
+        excess = len(self._pages) - self.size
+
+        if excess <= 0:
+            return
+
+        # Least recently used pages go first. Pinned pages are kept.
+        for url in [url for url in self._pages if url not in self._pinned][:excess]:
+            del self._pages[url]
+
 
 class BaseTracker(WithSettings):
     """Base torrent tracker handler class offering helper methods for its ancestors."""
@@ -42,6 +223,38 @@ class BaseTracker(WithSettings):
     test_urls: ClassVar[list[str]] = []
     """Page URLs for automatic tests of torrent extraction."""
 
+    page_parse_only: ClassVar[SoupStrainer | None] = None
+    """Strainer to limit torrent page parsing to the parts required for data extraction.
+    E.g.: SoupStrainer(['a', 'title']). The whole page is parsed if not set.
+
+    """
+
+    fast_extractors: ClassVar[dict[str, re.Pattern[bytes]]] = {
+        'title': re.compile(rb'<title>(?P<value>[^<]*)</title>', re.IGNORECASE),
+        'magnet': re.compile(rb'href=["\'](?P<value>magnet:[^"\']+)'),
+    }
+    """Precompiled regular expressions to extract data from raw torrent page contents (bytes)
+    without building page soup. Every expression should define `value` group.
+    A match with `value` group not participating is a miss (e.g. to confine
+    an expression to the first occurrence of an element).
+    Known keys: download_link, form_token, date_updated, title, cover.
+
+    Soup based extraction is used as a fallback when a fast extractor fails.
+
+    """
+
+    pages_cache_size: int = 16
+    """Maximum number of torrent pages to be cached by a tracker object."""
+
+    pages_cache_ttl: int = 600
+    """Number of seconds torrent pages are cached for."""
+
+    info_hash_on_page: bool = False
+    """Whether torrent page shows current torrent info hash (e.g. in a magnet link).
+    Allows skipping .torrent file download when the torrent is not changed.
+
+    """
+
     raise_on_error_response: bool = False
     """Whether to raise an exception on request errors.
     Primary use is debug and testsuite.
@@ -50,8 +263,13 @@ class BaseTracker(WithSettings):
 
     request_timeout: float | int = 4
 
+    offline: bool = False
+    """Whether network access is prohibited for this tracker object. See .extract_offline()."""
+
     def __init__(self, *, cookies: dict[str, str] | None = None, query_string: str = '', **kwargs):
         self.mirror_picked: str | None = None
+        # Makes concurrent requests wait for a single mirror probing.
+        self.mirror_lock = Lock()
 
         if cookies is None:
             cookies = {}
@@ -59,9 +277,8 @@ class BaseTracker(WithSettings):
         self.cookies = cookies
         self.query_string = query_string
 
-        # Cached data for currently processed torrent.
-        self._torrent_page_url: str = ''
-        self._torrent_page: BeautifulSoup | None = None
+        # Cached pages for currently processed torrents.
+        self.pages = PagesCache(size=self.pages_cache_size, ttl=self.pages_cache_ttl)
 
         self.client = HttpClient(
             silence_exceptions=not self.raise_on_error_response,
@@ -71,6 +288,13 @@ class BaseTracker(WithSettings):
         super().__init__()
 
     def __init_subclass__(cls, **kwargs):
+        # Walk pipeline calls .get_torrent_meta() and .fetch_torrent_file() instead of .get_torrent().
+        for name in ('get_torrent', 'get_torrent_meta', 'fetch_torrent_file', '_login'):
+            value = vars(cls).get(name)
+
+            if value is not None and not getattr(value, 'timed', False):
+                setattr(cls, name, instrument_operation(value, name.lstrip('_')))
+
         if cls.alias and cls.active:
             TrackerClassesRegistry.add(cls)
 
@@ -93,7 +317,16 @@ class BaseTracker(WithSettings):
         """
         mirror_picked = self.mirror_picked
 
-        if mirror_picked is None:
+        if mirror_picked is not None:
+            return mirror_picked
+
+        with self.mirror_lock:
+            mirror_picked = self.mirror_picked
+
+            if mirror_picked is not None:
+                # Picked by a concurrent request.
+                return mirror_picked
+
             self.log_debug('Picking a mirror ...')
 
             original_domain = self.extract_domain(url)
@@ -104,11 +337,12 @@ class BaseTracker(WithSettings):
 
                 self.log_debug(f'Probing mirror: `{mirror_url}` ...')
 
-                response = self.client.request(
-                    mirror_url,
-                    timeout=self.request_timeout,
-                    silence_exceptions=True,
-                )
+                with METRICS.timed('torrt_tracker_call_seconds', tracker=self.alias, operation='probe_mirror'):
+                    response = self.client.request(
+                        mirror_url,
+                        timeout=self.request_timeout,
+                        silence_exceptions=True,
+                    )
 
                 if response and response.url.startswith(mirror_url):
                     mirror_picked = mirror_domain
@@ -129,6 +363,26 @@ class BaseTracker(WithSettings):
         url_mirror = url.replace(original_domain, mirror_picked)
         return url_mirror
 
+    def get_request_url(self, url: str, *, query_string: str = '') -> str:
+        """Returns URL to be requested: with query string added and a mirror domain used.
+
+        :param url:
+        :param query_string: query string (GET parameters) to add to URL
+
+        """
+        if query_string:
+
+            delim = '?'
+
+            if '?' in url:
+                delim = '&'
+
+            url = f'{url}{delim}{query_string}'
+
+        self.pick_mirror(url)
+
+        return self.get_mirrored_url(url)
+
     def register(self):
         """Adds this object into TrackerObjectsRegistry."""
 
@@ -173,7 +427,8 @@ class BaseTracker(WithSettings):
             referer: str = '',
             cookies: dict | CookieJar | None = None,
             query_string: str = '',
-            as_soup: bool = False
+            as_soup: bool = False,
+            parse_only: SoupStrainer | None = None
 
     ) -> Response | BeautifulSoup | None:
         """Returns an HTTP resource object from given URL.
@@ -195,19 +450,13 @@ class BaseTracker(WithSettings):
 
         :param as_soup: whether to return BeautifulSoup object instead of Requests response
 
-        """
-        if query_string:
-
-            delim = '?'
+        :param parse_only: strainer to parse only matching parts of a page into soup
 
-            if '?' in url:
-                delim = '&'
-
-            url = f'{url}{delim}{query_string}'
-
-        self.pick_mirror(url)
+        """
+        if self.offline:
+            raise TorrtTrackerOfflineException(f'Network access is required to get {url}')
 
-        url = self.get_mirrored_url(url)
+        url = self.get_request_url(url, query_string=query_string)
 
         result = self.client.request(
             url=url,
@@ -218,18 +467,19 @@ class BaseTracker(WithSettings):
         )
 
         if result is not None and as_soup:
-            result = self.make_page_soup(result.text)
+            result = self.make_page_soup(result.text, parse_only=parse_only)
 
         return result
 
     @classmethod
-    def make_page_soup(cls, html: str) -> BeautifulSoup:
+    def make_page_soup(cls, html: str, *, parse_only: SoupStrainer | None = None) -> BeautifulSoup:
         """Returns BeautifulSoup object from a html.
 
         :param html:
+        :param parse_only: strainer to parse only matching parts of a page
 
         """
-        return make_soup(html)
+        return make_soup(html, parse_only=parse_only)
 
     @classmethod
     def find_links(cls, url: str, page_soup: BeautifulSoup, *, definite: str = '') -> str | None | list[str]:
@@ -280,82 +530,303 @@ class BaseTracker(WithSettings):
         """This should implement a configuration test, e.g. make test login and report success."""
         return True
 
-    def get_torrent(self, url: str, *, last_updated: datetime | None = None) -> TorrentData | None:
+    def get_torrent(
+            self,
+            url: str,
+            *,
+            last_updated: datetime | None = None,
+            known_hash: str = ''
+    ) -> TorrentData | None:
         """This method should be implemented in torrent tracker handler class
         and must return .torrent file contents.
 
         :param url: URL to download torrent file from
         :param last_updated: torrent last updated datetime
+        :param known_hash: torrent hash known to torrent client
 
         """
         raise NotImplementedError  # pragma: nocover
 
-    def extract_page_data(self) -> PageData:
+    def get_torrent_meta(
+            self,
+            url: str,
+            *,
+            last_updated: datetime | None = None,
+            known_hash: str = ''
+    ) -> TorrentData | None:
+        """Returns torrent data extracted from torrent page.
+        Handlers not splitting page processing and .torrent file download
+        return complete torrent data here.
+
+        :param url: URL to download torrent file from
+        :param last_updated: torrent last updated datetime
+        :param known_hash: torrent hash known to torrent client
+
+        """
+        return self.get_torrent(url, last_updated=last_updated, known_hash=known_hash)
+
+    def fetch_torrent_file(self, torrent: TorrentData) -> TorrentData | None:
+        """Downloads .torrent file for torrent data got from .get_torrent_meta().
+
+        :param torrent:
+
+        """
+        return self.get_torrent(torrent.url)
+
+    @classmethod
+    def extract_offline(
+            cls,
+            settings: dict,
+            url: str,
+            content: bytes,
+            *,
+            headers: dict[str, str] | None = None,
+            encoding: str | None = None,
+            last_updated: datetime | None = None,
+            known_hash: str = ''
+    ) -> tuple[bool, TorrentData | None]:
+        """Stateless entry point to extract torrent data (download link, page data)
+        from torrent page contents as .get_torrent_meta() does, but without network access.
+        Being picklable it allows extraction in other processes (see WalkPipeline).
+
+        Returns a tuple: handled flag and torrent data. Handled flag is False
+        if the page can't be processed offline (e.g. a login is required).
+
+        :param settings: tracker object settings (see .get_settings())
+        :param url: torrent page URL
+        :param content: torrent page contents
+        :param headers: torrent page response headers
+        :param encoding: torrent page contents encoding
+        :param last_updated: torrent last updated datetime
+        :param known_hash: torrent hash known to torrent client
+
+        """
+        settings_cached, tracker = _OFFLINE_TRACKERS.get(cls, (None, None))
+
+        if tracker is None or settings_cached != settings:
+            tracker = cls.spawn_with_settings(settings)
+            tracker.offline = True
+            _OFFLINE_TRACKERS[cls] = (settings, tracker)
+
+        response = make_response(url, content, headers=headers, encoding=encoding)
+
+        # Pinned not to be evicted by concurrent extractions (e.g. run in threads).
+        try:
+            with tracker.pages.pinned(TorrentPage(url, response)):
+                return True, tracker.get_torrent_meta(url, last_updated=last_updated, known_hash=known_hash)
+
+        except TorrtTrackerOfflineException as e:
+            tracker.log_debug(f'Unable to process {url} offline: {e}')
+            return False, None
+
+        finally:
+            tracker.pages.drop(url)
+
+    def get_info_hashes(self, urls: list[str]) -> dict[str, str]:
+        """Returns current torrent info hashes (lowercase hex) for a number
+        of torrent pages at once, indexed by page URLs.
+
+        Trackers offering bulk lookups (e.g. through an API) should implement this
+        to allow skipping unchanged torrents without fetching their pages.
+
+        :param urls: torrent page URLs
+
+        """
+        return {}
+
+    def get_info_hash(self, url: str) -> str:
+        """Returns current torrent info hash (lowercase hex) as shown on torrent page
+        or an empty string if it is not available.
+
+        :param url: torrent page URL
+
+        """
+        if not self.info_hash_on_page:
+            return ''
+
+        magnet_link = self.extract_fast('magnet', url)
+
+        if magnet_link is None:
+            page_soup = self.get_torrent_page(url)
+
+            if not page_soup:
+                return ''
+
+            magnet_link = getattr(page_soup.find(href=RE_MAGNET), 'attrs', {}).get('href', '')
+
+        return get_info_hash_from_magnet(magnet_link)
+
+    def extract_page_data(self, url: str) -> PageData:
+        """Returns data extracted from torrent page.
+
+        :param url: torrent page URL
+
+        """
         data = PageData(
-            title=self.extract_page_title(),
-            cover=self.extract_page_cover(),
-            date_updated=self.extract_page_date_updated()
+            title=self.extract_page_title(url),
+            cover=self.extract_page_cover(url),
+            date_updated=self.extract_page_date_updated(url)
         )
         return data
 
-    def extract_page_title(self) -> str:
-        page = self._torrent_page
+    def extract_page_title(self, url: str) -> str:
+        title = self.extract_fast('title', url)
+
+        if title is not None:
+            return title
+
+        page = self.get_torrent_page(url)
 
         if not page:
             return ''
 
         return getattr(page.select_one('title'), 'text', '')
 
-    def extract_page_cover(self) -> str:
+    def extract_page_cover(self, url: str) -> str:
         return ''
 
-    def extract_page_date_updated(self) -> datetime | None:
+    def extract_page_date_updated(self, url: str) -> datetime | None:
         return None
 
-    def parse_datetime(self, dt_str: str, fmt: str, *, locale: str = ''):
-        old_locale = getlocale()
+    def parse_datetime(self, dt_str: str, fmt: str, *, locale: str = '') -> datetime | None:
+        """Parses a datetime string using strptime-like format.
+        Russian and English month names are supported regardless of process locale.
 
-        if locale:
-            setlocale(LC_ALL, (locale, 'UTF-8'))
+        :param dt_str: datetime string
+        :param fmt: format, e.g. %d %b %Y %H:%M:%S
+        :param locale: Not used. Kept for backward compatibility.
 
-        try:
-            try:
-                return datetime.strptime(dt_str, fmt)  # noqa: DTZ007
+        """
+        return parse_datetime(dt_str, fmt)
 
-            except ValueError:
-                return None
-        finally:
-            setlocale(LC_ALL, old_locale)
+    def extract_fast(self, name: str, url: str) -> str | None:
+        """Returns a value extracted from raw contents of torrent page
+        using a fast extractor (see `fast_extractors`).
+        None is returned if there is no such extractor or the extraction failed.
 
-    def get_torrent_page(self, url: str, *, drop_cache: bool = False) -> BeautifulSoup:
-        """Get torrent page as soup for further data extraction.
+        :param name: extractor name
+        :param url: torrent page URL
+
+        """
+        pattern = self.fast_extractors.get(name)
+
+        if pattern is None:
+            return None
+
+        response = self.get_torrent_page_response(url)
+
+        if response is None:
+            return None
+
+        match = pattern.search(response.content)
+        value = match and match.group('value')
+
+        FastPathHits.register((self.alias, name), hit=value is not None)
+
+        if value is None:
+            return None
+
+        encoding = self.encoding or 'utf-8'
+
+        if 'charset' in response.headers.get('Content-Type', ''):
+            encoding = response.encoding
+
+        return unescape(value.decode(encoding, errors='replace')).strip()
+
+    def get_page(self, url: str, *, drop_cache: bool = False) -> TorrentPage:
+        """Get torrent page object for further data extraction.
+        Pages are cached (see `pages_cache_size` and `pages_cache_ttl`).
+
+        :param url:
+        :param drop_cache: Do not use cached version if any.
+
+        """
+        with span('get_page', tracker=self.alias, **{'url.full': url}) as page_span:
+            page = None if drop_cache else self.pages.get(url)
+            cache_hit = page is not None and page.response is not None
+
+            page_span.set(cache_hit=cache_hit)
+
+            if not cache_hit:
+                response = self.get_response(
+                    url,
+                    referer=url,
+                    cookies=self.cookies,
+                    query_string=self.get_query_string(),
+                )
+                page = TorrentPage(url, response)
+                self.pages.add(page)
+
+        return page
+
+    def get_torrent_page_response(self, url: str, *, drop_cache: bool = False) -> Response | None:
+        """Get torrent page response (raw contents) for further data extraction.
 
         :param url:
         :param drop_cache: Do not use cached version if any.
 
         """
-        torrent_page = self._torrent_page
+        return self.get_page(url, drop_cache=drop_cache).response
+
+    def get_torrent_page(self, url: str, *, drop_cache: bool = False) -> BeautifulSoup | None:
+        """Get torrent page as soup for further data extraction.
+
+        :param url:
+        :param drop_cache: Do not use cached version if any.
 
-        if url != self._torrent_page_url:
-            drop_cache = True
+        """
+        page = self.get_page(url, drop_cache=drop_cache)
 
-        if drop_cache or not torrent_page:
-            torrent_page = self.get_response(
-                url,
-                referer=url,
-                cookies=self.cookies,
-                query_string=self.get_query_string(),
-                as_soup=True
-            )
-            self._torrent_page = torrent_page
-            self._torrent_page_url = url
+        with page.lock:
+            if page.soup is None and page.response is not None:
+                page.soup = self.make_page_soup(page.response.text, parse_only=self.page_parse_only)
 
-        return torrent_page
+        return page.soup
 
 
 class GenericTracker(BaseTracker):
     """Generic torrent tracker handler class implementing most common tracker handling methods."""
 
+    feed_url: str = ''
+    """URL of a feed (RSS) listing recently updated torrents.
+    This can include `%(domain)s` marker in place of a domain name.
+
+    """
+
+    def get_feed_ids(self) -> set[str] | None:
+        """Returns identifiers of recently updated torrents listed in tracker feed
+        or None if the feed is not available.
+
+        """
+        if not self.feed_url:
+            return None
+
+        feed_url = self.feed_url % {'domain': self.alias}
+
+        self.log_debug(f'Getting feed from {feed_url} ...')
+
+        response = self.get_response(feed_url)
+
+        if response is None or not response.ok:
+            return None
+
+        links = get_links_from_feed(response.content)
+
+        if not links:
+            # Probably not a feed. Do not rely on it.
+            return None
+
+        ids = set()
+
+        for link in links:
+            try:
+                ids.add(self.get_id_from_link(link))
+
+            except IndexError:
+                continue
+
+        return ids
+
     def get_id_from_link(self, url: str) -> str:
         """Returns forum thread identifier from full thread URL.
 
@@ -364,12 +835,47 @@ class GenericTracker(BaseTracker):
         """
         return url.split('=')[1]
 
-    def get_torrent(self, url: str, *, last_updated: datetime | None = None) -> TorrentData | None:
+    def get_torrent(
+            self,
+            url: str,
+            *,
+            last_updated: datetime | None = None,
+            known_hash: str = ''
+    ) -> TorrentData | None:
         """This is the main method which returns torrent file contents
         of file located at URL.
 
+        If `known_hash` is given and the tracker shows the same info hash on torrent page,
+        .torrent file is not downloaded and torrent data without file contents is returned.
+
         :param url: URL to find and get torrent from
         :param last_updated: torrent last updated datetime
+        :param known_hash: torrent hash known to torrent client
+
+        """
+        torrent = self.get_torrent_meta(url, last_updated=last_updated, known_hash=known_hash)
+
+        if torrent is None or torrent.hash:
+            return torrent
+
+        return self.fetch_torrent_file(torrent)
+
+    def get_torrent_meta(
+            self,
+            url: str,
+            *,
+            last_updated: datetime | None = None,
+            known_hash: str = ''
+    ) -> TorrentData | None:
+        """Returns torrent data extracted from torrent page (download link, page data)
+        without .torrent file contents. See .fetch_torrent_file().
+
+        Torrent hash is set only if `known_hash` is given and the tracker shows
+        the same info hash on torrent page.
+
+        :param url: URL to find and get torrent from
+        :param last_updated: torrent last updated datetime
+        :param known_hash: torrent hash known to torrent client
 
         """
         download_link = self.get_download_link(url)
@@ -378,31 +884,63 @@ class GenericTracker(BaseTracker):
             self.log_error(f'Cannot find torrent file download link at {url}')
             return None
 
-        page_data = self.extract_page_data()
+        page_data = self.extract_page_data(url)
 
         self.log_debug(f'Torrent download link found: {download_link}')
 
         if last_updated and last_updated >= page_data.date_updated:
             self.log_debug('Skipped as up to date')
             return None
-        else:
-            torrent_contents = self.download_torrent(download_link, referer=url)
 
-        if torrent_contents is None:
+        torrent = TorrentData(
+            url=url,
+            url_file=download_link,
+            page=page_data,
+        )
+
+        if known_hash:
+            info_hash = self.get_info_hash(url)
+
+            if info_hash and info_hash == known_hash.lower():
+                self.log_debug('Skipped as info hash is not changed')
+                torrent.hash = info_hash
+
+        return torrent
+
+    def fetch_torrent_file(self, torrent: TorrentData) -> TorrentData | None:
+        """Downloads .torrent file for torrent data got from .get_torrent_meta().
+        Returns torrent data with file contents or None on failure.
+
+        :param torrent:
+
+        """
+        return self.make_torrent_data(torrent, self.download_torrent(torrent.url_file, referer=torrent.url))
+
+    def make_torrent_data(self, torrent: TorrentData, contents: bytes | None) -> TorrentData | None:
+        """Returns torrent data with .torrent file contents downloaded for torrent data
+        got from .get_torrent_meta() or None if contents are not available or invalid.
+
+        :param torrent:
+        :param contents: .torrent file contents
+
+        """
+        download_link = torrent.url_file
+
+        if contents is None:
             self.log_debug(f'Torrent download from `{download_link}` has failed')
             return None
 
-        parsed = parse_torrent(torrent_contents)
+        parsed = parse_torrent(contents)
 
         if not parsed:
             return None
 
         return TorrentData(
-            url=url,
+            url=torrent.url,
             url_file=download_link,
             parsed=parsed,
-            raw=torrent_contents,
-            page=page_data,
+            raw=contents,
+            page=torrent.page,
         )
 
     def get_download_link(self, url: str) -> str:
@@ -459,12 +997,28 @@ class GenericPrivateTracker(GenericPublicTracker):
     auth_qs_param_name: str = None
     """HTTP GET (query string) parameter name to verify that a log in was successful. Probably session ID."""
 
+    relogin_interval: int = 60
+    """Number of seconds to reuse the result of the last login attempt.
+    Logins are not repeated within this interval (prevents login loops).
+
+    """
+
+    session_lifetime: int = 0
+    """Number of seconds after the login when session is considered expired
+    and a new login is performed before the next page request. 0 - never expires.
+
+    """
+
+    session_renew_margin: int = 600
+    """Number of seconds before auth cookies expiration when login session is renewed."""
+
     def __init__(
             self,
             *,
             username: str = '',
             password: str = '',
             cookies: dict[str, str] | None = None,
+            cookies_expires: dict[str, int] | None = None,
             query_string: str = '',
             **kwargs
     ):
@@ -474,9 +1028,14 @@ class GenericPrivateTracker(GenericPublicTracker):
             query_string=query_string,
         )
 
+        self.cookies_expires: dict[str, int] = cookies_expires or {}
+        self.drop_expired_cookies()
+
         self.logged_in = False
-        # Stores a number of login attempts to prevent recursion.
-        self.login_counter = 0
+
+        self.login_lock = Lock()
+        self.time_login_attempt: float | None = None
+        self.time_logged_in: float | None = None
 
         self.username = username
         self.password = password
@@ -502,23 +1061,42 @@ class GenericPrivateTracker(GenericPublicTracker):
         return self.login(self.alias)
 
     def login(self, domain: str) -> bool:
-        """Implements tracker login procedure. Returns success bool."""
+        """Implements tracker login procedure. Returns success bool.
 
-        login_url = self.login_url % {'domain': domain}
+        Login is single-flight: concurrent callers wait for the login in progress
+        and reuse its result (including cookies and query string) instead of logging in once again.
 
-        self.log_debug(f'Trying to login at {login_url} ...')
+        :param domain:
+
+        """
+        if self.offline:
+            raise TorrtTrackerOfflineException('Login is required')
+
+        with self.login_lock:
 
-        if self.logged_in:
-            raise TorrtTrackerException(f'Consecutive login attempt detected at `{self.__class__.__name__}`')
+            time_attempt = self.time_login_attempt
+
+            if time_attempt is not None and monotonic() - time_attempt < self.relogin_interval:
+                return self.logged_in
+
+            self.time_login_attempt = monotonic()
+            self.logged_in = self._login(domain)
+
+            if self.logged_in:
+                self.time_logged_in = monotonic()
+                # Pages fetched before the login are most probably of no use.
+                self.pages.clear()
+
+            return self.logged_in
+
+    def _login(self, domain: str) -> bool:
 
         if not self.username or not self.password:
             return False
 
-        self.login_counter += 1
+        login_url = self.login_url % {'domain': domain}
 
-        # No recursion wanted.
-        if self.login_counter > 1:
-            return False
+        self.log_debug(f'Trying to login at {login_url} ...')
 
         allow_redirects = False  # Not to lose cookies on the redirect.
 
@@ -541,23 +1119,68 @@ class GenericPrivateTracker(GenericPublicTracker):
         # Login success checks.
         parsed_qs = parse_qs(urlparse(response.url).query)
 
-        if self.auth_cookie_name in response.cookies or self.auth_qs_param_name in parsed_qs:
+        if self.auth_cookie_name not in response.cookies and self.auth_qs_param_name not in parsed_qs:
+            self.log_warning('Login with given credentials failed')
+            return False
+
+        if self.auth_qs_param_name in parsed_qs:
+            self.query_string = parsed_qs[self.auth_qs_param_name][0]
 
-            self.logged_in = True
+        self.cookies, self.cookies_expires = split_cookie_jar(response.cookies)
 
-            if parsed_qs:
-                self.query_string = parsed_qs[self.auth_qs_param_name][0]
+        # Save auth info to config. Written at once in the end of a walk.
+        self.save_settings()
+        self.log_debug('Login is successful')
 
-            self.cookies = response.cookies
+        return True
 
-            # Save auth info to config.
-            self.save_settings()
-            self.log_debug('Login is successful')
+    def drop_expired_cookies(self):
+        """Removes expired cookies, since those won't be accepted by a tracker anyway."""
 
-        else:
-            self.log_warning('Login with given credentials failed')
+        now = time()
+        cookies = self.cookies
+        cookies_expires = self.cookies_expires
+
+        for name, expires in list(cookies_expires.items()):
+            if expires <= now:
+                cookies.pop(name, None)
+                del cookies_expires[name]
+
+    def get_session_expires(self) -> int:
+        """Returns login session expiration timestamp deduced from auth cookie
+        (see `auth_cookie_name`). 0 - unknown.
+
+        """
+        if not self.auth_cookie_name:
+            # Other cookies may be short-lived, those are not to trigger logins.
+            return 0
+
+        return self.cookies_expires.get(self.auth_cookie_name, 0)
+
+    def session_expired(self) -> bool:
+        """Returns a flag whether the login session is known to be expired (or about to be)."""
+
+        session_expires = self.get_session_expires()
+
+        if session_expires and time() >= session_expires - self.session_renew_margin:
+            return bool(self.username and self.password)
+
+        time_logged_in = self.time_logged_in
+
+        return bool(
+            self.session_lifetime and
+            self.logged_in and
+            time_logged_in is not None and
+            monotonic() - time_logged_in > self.session_lifetime
+        )
+
+    def get_page(self, url: str, *, drop_cache: bool = False) -> TorrentPage:
+
+        if self.session_expired():
+            self.log_debug('Login session is expired')
+            self.login(self.extract_domain(url))
 
-        return self.logged_in
+        return super().get_page(url, drop_cache=drop_cache)
 
     def before_download(self, url: str):
         """Used to perform some required actions right before .torrent download.
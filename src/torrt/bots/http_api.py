@@ -0,0 +1,428 @@
+"""Local HTTP control API served from a long-running process.
+
+Saves automation scripts from starting torrt process for every operation:
+trackers and torrent clients objects (and their HTTP sessions) are created once.
+
+    torrt configure_bot http port=8787 token=secret
+    torrt run_bots http
+
+Listens on 127.0.0.1 by default. A Unix socket may be used instead (`socket` setting):
+
+    curl --unix-socket /run/torrt.sock http://torrt/status
+
+Requests should have `Authorization: Bearer <token>` header. If `token` is not set
+for a TCP listener, it is generated and saved into configuration file on start.
+Token is not required for Unix socket listeners (socket file is only accessible by its owner).
+
+To protect from requests made by web pages opened in browsers:
+* requests with a body should have `Content-Type: application/json` header;
+* `Host` header should be a local one, `Origin` header (if any) too.
+
+Endpoints (JSON in, JSON out):
+
+    GET /status - torrt version, number of registered torrents, walk state;
+    GET /torrents - registered torrents;
+    POST /torrents {"url": ..., "download_to": ..., "params": {...}} - add torrent from URL;
+    POST /torrents/register {"hash": ..., "url": ..., "params": {...}} - register torrent
+        existing in torrent clients;
+    DELETE /torrents/<hash>[?with_data=1] - remove torrent;
+    POST /walk {"forced": true, "budget": "15m"} - start a walk in background.
+
+Torrents can not be added or removed while a walk is in progress (409 Conflict).
+
+Configuration is re-read only when its file is changed.
+
+"""
+import json
+import logging
+import os
+from hmac import compare_digest
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from ipaddress import ip_address
+from pathlib import Path
+from secrets import token_urlsafe
+from socketserver import ThreadingMixIn, UnixStreamServer
+from threading import Lock, Thread
+from time import time
+from typing import TYPE_CHECKING, Any
+from urllib.parse import parse_qs, urlsplit
+
+from .. import VERSION
+from ..base_bot import BaseBot
+from ..exceptions import TorrtException
+from ..toolbox import get_registered_torrents, register_torrent, remove_torrent, walk
+from ..utils import get_torrent_from_url, iter_rpc, parse_duration
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+
+LOGGER = logging.getLogger(__name__)
+
+
+class ApiError(TorrtException):
+    """Request can not be processed."""
+
+    def __init__(self, message: str, *, status: HTTPStatus = HTTPStatus.BAD_REQUEST):
+        super().__init__(message)
+        self.status = status
+
+
+class WalkState:
+    """Background walks state."""
+
+    def __init__(self):
+        self.running = False
+        self.time_started = 0
+        self.time_finished = 0
+        self.error = ''
+        self.lock = Lock()
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            'running': self.running,
+            'time_started': self.time_started,
+            'time_finished': self.time_finished,
+            'error': self.error,
+        }
+
+
+class UnixHTTPServer(ThreadingMixIn, UnixStreamServer):
+    """HTTP server listening on a Unix socket."""
+
+    daemon_threads = True
+
+
+class HttpApiBot(BaseBot):
+
+    alias: str = 'http'
+
+    def __init__(self, *, host: str = '127.0.0.1', port: int = 8787, socket: str = '', token: str = ''):
+        """
+        :param host: host to listen on
+        :param port: port to listen on
+        :param socket: Unix socket path to listen on instead of host and port
+        :param token: token required in `Authorization: Bearer <token>` header.
+            If not set, it is generated on start for TCP listeners.
+
+        """
+        self.host = host
+        self.port = int(port)
+        self.socket = socket
+        self.token = token
+
+        self.walk_state = WalkState()
+        self.server: ThreadingHTTPServer | UnixHTTPServer | None = None
+
+        self.routes: dict[tuple[str, str], Callable[[dict, dict], tuple[HTTPStatus, Any]]] = {
+            ('GET', 'status'): self.handle_status,
+            ('GET', 'torrents'): self.handle_list,
+            ('POST', 'torrents'): self.handle_add,
+            ('POST', 'torrents/register'): self.handle_register,
+            ('DELETE', 'torrents/'): self.handle_remove,
+            ('POST', 'walk'): self.handle_walk,
+        }
+        """Handlers indexed by HTTP method and path (prefix, if ends with a slash)."""
+
+        super().__init__()
+
+    def test_configuration(self) -> bool:
+        return bool(self.socket or self.port)
+
+    def make_server(self) -> ThreadingHTTPServer | UnixHTTPServer:
+        """Returns HTTP server bound to configured address."""
+
+        if not self.socket and not self.token:
+            self.token = token_urlsafe(24)
+            self.save_settings()
+            self.log_info('API token is generated and saved into configuration file')
+
+        handler = make_handler(self)
+
+        if self.socket:
+            path = Path(self.socket)
+
+            if path.is_socket():
+                # Left from a previous run.
+                path.unlink()
+
+            server = UnixHTTPServer(f'{path}', handler)
+            os.chmod(path, 0o600)  # noqa: PTH101
+
+        else:
+            server = ThreadingHTTPServer((self.host, self.port), handler)
+            server.daemon_threads = True
+
+        self.server = server
+
+        return server
+
+    def run(self):
+        server = self.make_server()
+        address = self.socket or f'http://{self.host}:{server.server_address[1]}'
+
+        self.log_info(f'Serving HTTP API at {address} ...')
+
+        try:
+            server.serve_forever()
+
+        except KeyboardInterrupt:
+            pass
+
+        finally:
+            server.server_close()
+
+            if self.socket:
+                Path(self.socket).unlink(missing_ok=True)
+
+    def dispatch(self, method: str, path: str, *, headers: dict[str, str], body: bytes) -> tuple[HTTPStatus, Any]:
+        """Returns response status and data for a request.
+
+        :param method: HTTP method
+        :param path: request path with query string
+        :param headers: request headers
+        :param body: request body
+
+        """
+        try:
+            self.check_request(method, headers=headers, body=body)
+
+        except ApiError as e:
+            return e.status, {'error': f'{e}'}
+
+        split = urlsplit(path)
+        path = split.path.strip('/')
+
+        handler = self.routes.get((method, path))
+        subject = ''
+
+        if handler is None:
+            prefix, _, subject = path.rpartition('/')
+            handler = self.routes.get((method, f'{prefix}/')) if subject else None
+
+        if handler is None:
+            return HTTPStatus.NOT_FOUND, {'error': 'Not found'}
+
+        params = {key: values[-1] for key, values in parse_qs(split.query).items()}
+
+        if subject:
+            params['subject'] = subject
+
+        try:
+            data = json.loads(body) if body else {}
+
+            if not isinstance(data, dict):
+                raise ApiError('JSON object is expected')
+
+            return handler(params, data)
+
+        except json.JSONDecodeError:
+            return HTTPStatus.BAD_REQUEST, {'error': 'Invalid JSON'}
+
+        except ApiError as e:
+            return e.status, {'error': f'{e}'}
+
+        except Exception as e:
+            LOGGER.exception(f'HTTP API request `{method} {path}` failed')
+            return HTTPStatus.INTERNAL_SERVER_ERROR, {'error': f'{e}'}
+
+    def check_request(self, method: str, *, headers: dict[str, str], body: bytes):
+        """Raises ApiError if a request is not allowed.
+
+        :param method: HTTP method
+        :param headers: request headers (lowercase names)
+        :param body: request body
+
+        """
+        if not self.socket:
+            # Browsers can reach TCP listeners only. Protects from DNS rebinding and cross-site requests.
+            if not self.is_local_host(headers.get('host', '')):
+                raise ApiError('Host is not allowed', status=HTTPStatus.FORBIDDEN)
+
+            origin = headers.get('origin')
+
+            if origin is not None and not self.is_local_host(urlsplit(origin).netloc):
+                raise ApiError('Origin is not allowed', status=HTTPStatus.FORBIDDEN)
+
+        content_type = headers.get('content-type', '').partition(';')[0].strip().lower()
+
+        if (body or method == 'POST') and content_type != 'application/json':
+            raise ApiError('`application/json` content type is expected', status=HTTPStatus.UNSUPPORTED_MEDIA_TYPE)
+
+        token = self.token
+
+        if (token or not self.socket) and not (
+            token and compare_digest(headers.get('authorization', ''), f'Bearer {token}')
+        ):
+            raise ApiError('Unauthorized', status=HTTPStatus.UNAUTHORIZED)
+
+    def is_local_host(self, netloc: str) -> bool:
+        """Returns a flag whether a given host (with an optional port) is a local one.
+
+        :param netloc: host with an optional port, e.g. from Host header
+
+        """
+        host = urlsplit(f'//{netloc}').hostname or ''
+
+        if host in {'localhost', self.host.lower()}:
+            return True
+
+        try:
+            return ip_address(host).is_loopback
+
+        except ValueError:
+            return False
+
+    def check_walk_idle(self):
+        if self.walk_state.running:
+            raise ApiError('Walk is in progress', status=HTTPStatus.CONFLICT)
+
+    def handle_status(self, params: dict, data: dict) -> tuple[HTTPStatus, Any]:
+        return HTTPStatus.OK, {
+            'version': VERSION,
+            'torrents': len(get_registered_torrents(cached=True)),
+            'walk': self.walk_state.to_dict(),
+        }
+
+    def handle_list(self, params: dict, data: dict) -> tuple[HTTPStatus, Any]:
+        return HTTPStatus.OK, get_registered_torrents(cached=True)
+
+    def handle_add(self, params: dict, data: dict) -> tuple[HTTPStatus, Any]:
+        url = data.get('url')
+
+        if not url:
+            raise ApiError('`url` is required')
+
+        download_to = data.get('download_to') or ''
+        params = data.get('params') or None
+
+        self.check_walk_idle()
+
+        # Trackers and torrent clients are requested without the lock held,
+        # not to block walks and other requests.
+        torrent_data = get_torrent_from_url(url)
+
+        if torrent_data is None:
+            raise ApiError(f'Unable to add torrent from `{url}`', status=HTTPStatus.UNPROCESSABLE_ENTITY)
+
+        torrent_data.set_params(params)
+        added = False
+
+        for rpc_alias, rpc_object in iter_rpc():
+            rpc_object.method_add_torrent(torrent_data, download_to=download_to, params=params)
+            added = True
+
+            LOGGER.info(f'Torrent from `{url}` is added within `{rpc_alias}`')
+
+        if added:
+            # Registered even if a walk has been started meanwhile, since the torrent
+            # is already in torrent clients. Registry changes made during a walk
+            # are preserved (see TorrtConfig.deferred()).
+            with self.walk_state.lock:
+                register_torrent(torrent_data.hash, torrent_data=torrent_data, params=params)
+
+        return HTTPStatus.CREATED, {'hash': torrent_data.hash, 'name': torrent_data.name}
+
+    def handle_register(self, params: dict, data: dict) -> tuple[HTTPStatus, Any]:
+        hash_str = data.get('hash')
+
+        if not hash_str:
+            raise ApiError('`hash` is required')
+
+        with self.walk_state.lock:
+            self.check_walk_idle()
+            register_torrent(hash_str, url=data.get('url') or '', params=data.get('params') or None)
+
+        return HTTPStatus.CREATED, {'hash': hash_str}
+
+    def handle_remove(self, params: dict, data: dict) -> tuple[HTTPStatus, Any]:
+        hash_str = params['subject']
+
+        if hash_str not in get_registered_torrents(cached=True):
+            raise ApiError(f'Torrent `{hash_str}` is not registered', status=HTTPStatus.NOT_FOUND)
+
+        with self.walk_state.lock:
+            self.check_walk_idle()
+            remove_torrent(hash_str, with_data=params.get('with_data') in {'1', 'true'})
+
+        return HTTPStatus.OK, {'hash': hash_str}
+
+    def handle_walk(self, params: dict, data: dict) -> tuple[HTTPStatus, Any]:
+        try:
+            budget = parse_duration(f"{data.get('budget') or 0}")
+
+        except ValueError:
+            raise ApiError('Invalid `budget`') from None
+
+        walk_state = self.walk_state
+
+        with walk_state.lock:
+            self.check_walk_idle()
+            walk_state.running = True
+            walk_state.time_started = int(time())
+            walk_state.error = ''
+            state = walk_state.to_dict()
+
+        Thread(
+            target=self.run_walk,
+            kwargs={'forced': data.get('forced', True), 'budget': budget},
+            name='torrt-api-walk',
+            daemon=True,
+        ).start()
+
+        return HTTPStatus.ACCEPTED, state
+
+    def run_walk(self, *, forced: bool, budget: int):
+        """Performs a walk updating walk state.
+
+        :param forced: flag not to count walk interval setting
+        :param budget: walk time budget in seconds
+
+        """
+        walk_state = self.walk_state
+
+        try:
+            walk(forced=bool(forced), silent=True, budget=budget)
+
+        except Exception as e:
+            LOGGER.exception('Walk failed')
+            walk_state.error = f'{e}'
+
+        finally:
+            with walk_state.lock:
+                walk_state.running = False
+                walk_state.time_finished = int(time())
+
+
+def make_handler(bot: HttpApiBot) -> type[BaseHTTPRequestHandler]:
+
+    class Handler(BaseHTTPRequestHandler):
+
+        protocol_version = 'HTTP/1.1'
+        server_version = f'torrt/{VERSION}'
+
+        def log_message(self, format, *args):
+            # Unix socket clients have no address.
+            LOGGER.debug(f'HTTP API: {format % args}')
+
+        def handle_request(self):
+            body = self.rfile.read(int(self.headers.get('Content-Length') or 0))
+
+            status, data = bot.dispatch(
+                self.command,
+                self.path,
+                headers={name.lower(): value for name, value in self.headers.items()},
+                body=body,
+            )
+
+            response = json.dumps(data).encode()
+
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', f'{len(response)}')
+            self.end_headers()
+            self.wfile.write(response)
+
+        do_GET = do_POST = do_DELETE = handle_request
+
+    return Handler
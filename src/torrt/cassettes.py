@@ -0,0 +1,301 @@
+"""HTTP interactions recording and replaying.
+
+Responses to requests made by torrt (to trackers and torrent clients)
+may be recorded into a cassette directory:
+
+    torrt walk -f --record /tmp/walk_cassette
+
+and then replayed without network access, e.g. to reproduce, profile or benchmark the walk:
+
+    torrt walk -f --replay /tmp/walk_cassette --replay-latency --profile cpu
+
+Cassette directory layout:
+
+    interactions.jsonl - requests (method, URL, body digest) and responses metadata
+        (status, headers, latency, body digest), one per line, in order of responses;
+
+    bodies/<sha256> - responses bodies.
+
+Responses are looked up by request method, URL and body. Requests with bodies
+changing from run to run (e.g. multipart boundaries) are matched by method and URL.
+Responses to repeated requests are replayed in the recorded order, the last one is reused.
+
+"""
+import json
+import logging
+from collections import deque
+from collections.abc import Iterable
+from hashlib import sha256
+from http.client import HTTPMessage
+from io import BytesIO
+from pathlib import Path
+from threading import Lock
+from time import perf_counter, sleep, time
+
+from requests import ConnectionError as RequestsConnectionError
+from requests import PreparedRequest, Response, Session
+from requests.adapters import HTTPAdapter
+from urllib3 import HTTPResponse
+
+LOGGER = logging.getLogger(__name__)
+
+SKIP_HEADERS = {'content-encoding', 'content-length', 'transfer-encoding'}
+"""Headers not to be recorded: bodies are stored decoded."""
+
+
+class CassetteMiss(RequestsConnectionError):
+    """No recorded response for a request."""
+
+
+def get_digest(data: bytes | str | None) -> str:
+    """Returns SHA-256 hex digest of given data.
+
+    :param data:
+
+    """
+    if data is None:
+        data = b''
+
+    elif isinstance(data, str):
+        data = data.encode()
+
+    return sha256(data).hexdigest()
+
+
+class Cassette:
+    """Recorded HTTP interactions storage."""
+
+    def __init__(self, path: str | Path, *, record: bool = False, latency: bool = False):
+        """
+        :param path: cassette directory
+        :param record: flag to record interactions. If not set, interactions are replayed.
+        :param latency: flag to replay responses with latencies recorded
+
+        """
+        self.path = Path(path)
+        self.record = record
+        self.latency = latency
+
+        self.adapter = RecordingAdapter(self) if record else ReplayingAdapter(self)
+
+        self._lock = Lock()
+        self._by_body: dict[tuple[str, str, str], deque[dict]] = {}
+        self._by_url: dict[tuple[str, str], deque[dict]] = {}
+
+        if record:
+            (self.path / 'bodies').mkdir(parents=True, exist_ok=True)
+
+        else:
+            self._load()
+
+    @property
+    def index_path(self) -> Path:
+        return self.path / 'interactions.jsonl'
+
+    def _load(self):
+        if not self.index_path.exists():
+            LOGGER.warning(f'Cassette {self.path} is empty')
+            return
+
+        with self.index_path.open() as f:
+            for line in f:
+                self._add(json.loads(line))
+
+        LOGGER.debug(f'Cassette {self.path} is loaded')
+
+    def _add(self, interaction: dict):
+        method, url = interaction['method'], interaction['url']
+        self._by_body.setdefault((method, url, interaction['request_body']), deque()).append(interaction)
+        self._by_url.setdefault((method, url), deque()).append(interaction)
+
+    def add(
+            self,
+            method: str,
+            url: str,
+            body: bytes | str | None,
+            *,
+            status: int,
+            reason: str,
+            headers: Iterable[tuple[str, str]],
+            content: bytes,
+            elapsed: float
+    ):
+        """Records an interaction.
+
+        :param method: request method
+        :param url: request URL
+        :param body: request body
+        :param status: response status code
+        :param reason: response status reason
+        :param headers: response headers (name, value pairs)
+        :param content: response body (decoded)
+        :param elapsed: seconds passed till the response was received
+
+        """
+        content_digest = get_digest(content)
+        content_path = self.path / 'bodies' / content_digest
+
+        interaction = {
+            'method': method,
+            'url': url,
+            'request_body': get_digest(body),
+            'status': status,
+            'reason': reason,
+            'headers': [(name, value) for name, value in headers if name.lower() not in SKIP_HEADERS],
+            'body': content_digest,
+            'elapsed': round(elapsed, 6),
+            'time': time(),
+        }
+
+        with self._lock:
+            if not content_path.exists():
+                content_path.write_bytes(content)
+
+            with self.index_path.open('a') as f:
+                f.write(f'{json.dumps(interaction)}\n')
+
+    def find(self, method: str, url: str, body: bytes | str | None) -> tuple[dict, bytes]:
+        """Returns an interaction recorded for a request and its response body.
+        Raises CassetteMiss if there is none.
+
+        :param method: request method
+        :param url: request URL
+        :param body: request body
+
+        """
+        with self._lock:
+            interactions = self._by_body.get((method, url, get_digest(body))) or self._by_url.get((method, url))
+
+            if not interactions:
+                raise CassetteMiss(f'No recorded response for {method} {url}')
+
+            # The last response is reused.
+            interaction = interactions.popleft() if len(interactions) > 1 else interactions[0]
+
+        return interaction, (self.path / 'bodies' / interaction['body']).read_bytes()
+
+
+class RecordingAdapter(HTTPAdapter):
+    """Requests transport adapter recording interactions into a cassette."""
+
+    def __init__(self, cassette: Cassette):
+        self.cassette = cassette
+        super().__init__()
+
+    def send(self, request: PreparedRequest, *args, **kwargs) -> Response:
+        started = perf_counter()
+        response = super().send(request, *args, **kwargs)
+        content = response.content
+
+        self.cassette.add(
+            request.method,
+            request.url,
+            request.body,
+            status=response.status_code,
+            reason=response.reason or '',
+            headers=response.raw.headers.items(),
+            content=content,
+            elapsed=perf_counter() - started,
+        )
+
+        return response
+
+
+class OriginalResponse:
+    """http.client.HTTPResponse stand-in. Allows cookies extraction,
+    see requests.cookies.extract_cookies_to_jar().
+
+    """
+    def __init__(self, msg: HTTPMessage):
+        self.msg = msg
+
+    def isclosed(self) -> bool:
+        return True
+
+    def close(self):
+        pass
+
+
+class ReplayingAdapter(HTTPAdapter):
+    """Requests transport adapter serving responses from a cassette."""
+
+    def __init__(self, cassette: Cassette):
+        self.cassette = cassette
+        super().__init__()
+
+    def send(self, request: PreparedRequest, *args, **kwargs) -> Response:
+        cassette = self.cassette
+        interaction, content = cassette.find(request.method, request.url, request.body)
+
+        if cassette.latency:
+            sleep(interaction['elapsed'])
+
+        message = HTTPMessage()
+
+        for name, value in interaction['headers']:
+            message[name] = value
+
+        message['Content-Length'] = f'{len(content)}'
+
+        raw = HTTPResponse(
+            body=BytesIO(content),
+            headers=list(message.items()),
+            status=interaction['status'],
+            reason=interaction['reason'],
+            preload_content=False,
+            original_response=OriginalResponse(message),
+        )
+
+        return self.build_response(request, raw)
+
+
+class Player:
+    """Makes HTTP clients record interactions into a cassette or replay them from it."""
+
+    def __init__(self):
+        self.cassette: Cassette | None = None
+
+    def insert(self, path: str | Path, *, record: bool = False, latency: bool = False) -> Cassette:
+        """Starts recording or replaying.
+
+        :param path: cassette directory
+        :param record: flag to record interactions. If not set, interactions are replayed.
+        :param latency: flag to replay responses with latencies recorded
+
+        """
+        LOGGER.info(f"{'Recording HTTP interactions into' if record else 'Replaying HTTP interactions from'} {path}")
+
+        cassette = self.cassette = Cassette(path, record=record, latency=latency)
+
+        return cassette
+
+    def eject(self):
+        """Makes HTTP clients use network again."""
+        self.cassette = None
+
+    def mount(self, session: Session):
+        """Makes a session use the current cassette (or network if there is none).
+
+        :param session:
+
+        """
+        cassette = self.cassette
+        adapter = session.adapters.get('https://')
+
+        if cassette is None:
+            if not isinstance(adapter, RecordingAdapter | ReplayingAdapter):
+                return
+            adapter = HTTPAdapter()
+
+        elif adapter is cassette.adapter:
+            return
+
+        else:
+            adapter = cassette.adapter
+
+        session.mount('https://', adapter)
+        session.mount('http://', adapter)
+
+
+PLAYER = Player()
+"""Global cassettes player."""
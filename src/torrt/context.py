@@ -0,0 +1,131 @@
+"""Run context: settings of a run (e.g. a walk) available to the code
+running on its behalf in other threads, processes and asyncio tasks.
+
+The context is stored in a context variable, so asyncio tasks and `asyncio.to_thread()`
+calls get it automatically. Threads should be started with `propagate()`:
+
+    Thread(target=propagate(func)).start()
+
+Process pools should be initialized with `init_process()`:
+
+    ProcessPoolExecutor(initializer=init_process, initargs=(get_run_context().snapshot(),))
+
+Responses dumped in pool processes are written when the processes exit.
+
+Tracing context (the current span) is propagated along.
+
+"""
+from collections.abc import Callable, Generator
+from contextlib import contextmanager
+from contextvars import ContextVar, copy_context
+from functools import partial
+from multiprocessing.util import Finalize
+from typing import Any, TypeVar
+
+from .dumping import DUMPER, Dumper
+
+T = TypeVar('T')
+
+
+class RunContext:
+    """Settings of a run."""
+
+    __slots__ = ['dumper', 'params']
+
+    def __init__(self, *, params: dict[str, Any] | None = None, dumper: Dumper | None = None):
+        """
+        :param params: run parameters (see GlobalParam)
+        :param dumper: responses dumper. Defaults to the global one.
+
+        """
+        self.params: dict[str, Any] = params or {}
+        self.dumper = dumper or DUMPER
+
+    def derive(self, **params: Any) -> 'RunContext':
+        """Returns a new context with parameters of this one updated with the given ones.
+
+        :param params: parameters to update
+
+        """
+        return RunContext(params={**self.params, **params}, dumper=self.dumper)
+
+    def snapshot(self) -> dict[str, Any]:
+        """Returns picklable parameters of the context to be passed into another process."""
+        dumper = self.dumper
+
+        return {
+            'params': self.params,
+            'dump': dumper.get_settings() if dumper.enabled else None,
+        }
+
+    @classmethod
+    def from_snapshot(cls, snapshot: dict[str, Any]) -> 'RunContext':
+        """Returns a context made from a snapshot. See .snapshot().
+
+        :param snapshot:
+
+        """
+        dumper = None
+
+        if dump := snapshot['dump']:
+            dumper = Dumper()
+            dumper.enable(**dump)
+
+        return cls(params=snapshot['params'], dumper=dumper)
+
+
+_DEFAULT_CONTEXT = RunContext()
+
+_RUN_CONTEXT: ContextVar[RunContext] = ContextVar('torrt_run_context', default=_DEFAULT_CONTEXT)
+
+
+def get_run_context() -> RunContext:
+    """Returns current run context."""
+    return _RUN_CONTEXT.get()
+
+
+@contextmanager
+def run_context(context: RunContext | None = None, **params: Any) -> Generator[RunContext, None, None]:
+    """Context manager making a run context current.
+
+    :param context: context to use. If not set, the current one is derived (see RunContext.derive()).
+    :param params: parameters to update
+
+    """
+    if context is None:
+        context = get_run_context().derive(**params)
+
+    else:
+        context.params.update(params)
+
+    token = _RUN_CONTEXT.set(context)
+
+    try:
+        yield context
+
+    finally:
+        _RUN_CONTEXT.reset(token)
+
+
+def propagate(func: Callable[..., T]) -> Callable[..., T]:
+    """Returns a function running a given one in a copy of the current context,
+    e.g. to be used as a thread target.
+
+    :param func:
+
+    """
+    return partial(copy_context().run, func)
+
+
+def init_process(snapshot: dict[str, Any]):
+    """Makes a run context current in a process pool worker. See RunContext.snapshot().
+
+    :param snapshot:
+
+    """
+    context = RunContext.from_snapshot(snapshot)
+    _RUN_CONTEXT.set(context)
+
+    if context.dumper is not DUMPER:
+        # Pending responses are written when the worker exits.
+        Finalize(None, context.dumper.disable, exitpriority=10)
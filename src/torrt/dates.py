@@ -0,0 +1,136 @@
+import re
+from datetime import datetime, timedelta
+from functools import lru_cache
+
+MONTH_NAMES: dict[int, tuple[str, ...]] = {
+    1: ('январь', 'января', 'янв', 'january', 'jan'),
+    2: ('февраль', 'февраля', 'февр', 'фев', 'february', 'feb'),
+    3: ('март', 'марта', 'мар', 'march', 'mar'),
+    4: ('апрель', 'апреля', 'апр', 'april', 'apr'),
+    5: ('май', 'мая', 'may'),
+    6: ('июнь', 'июня', 'июн', 'june', 'jun'),
+    7: ('июль', 'июля', 'июл', 'july', 'jul'),
+    8: ('август', 'августа', 'авг', 'august', 'aug'),
+    9: ('сентябрь', 'сентября', 'сент', 'сен', 'september', 'sept', 'sep'),
+    10: ('октябрь', 'октября', 'окт', 'october', 'oct'),
+    11: ('ноябрь', 'ноября', 'нояб', 'ноя', 'november', 'nov'),
+    12: ('декабрь', 'декабря', 'дек', 'december', 'dec'),
+}
+"""Month names (full, genitive, abbreviated) in Russian and English."""
+
+MONTHS: dict[str, int] = {name: num for num, names in MONTH_NAMES.items() for name in names}
+"""Month numbers indexed by lowercase month names."""
+
+RELATIVE_DAYS: dict[str, int] = {
+    'сегодня': 0,
+    'today': 0,
+    'вчера': 1,
+    'yesterday': 1,
+    'позавчера': 2,
+}
+"""Days ago indexed by relative day names."""
+
+RE_MONTH = re.compile(
+    r'(?<!\w)(?P<month>' + '|'.join(sorted(MONTHS, key=len, reverse=True)) + r')(?!\w)\.?',
+    re.IGNORECASE
+)
+
+_TIME = r'(?:\s*(?:,|в|at)?\s*(?P<hour>\d{1,2}):(?P<minute>\d{2})(?::(?P<second>\d{2}))?)?'
+
+RE_ABSOLUTE = re.compile(
+    r'^(?P<day>\d{1,2})\s+(?P<month>[^\W\d_]+)\.?,?\s+(?P<year>\d{4})(?:\s*г(?:ода|\.)?)?' + _TIME + '$',  # noqa: RUF001
+    re.IGNORECASE
+)
+
+RE_NUMERIC = re.compile(r'^(?P<day>\d{1,2})[./-](?P<month>\d{1,2})[./-](?P<year>\d{4})' + _TIME + '$')
+
+RE_RELATIVE = re.compile(
+    r'^(?P<relative>' + '|'.join(RELATIVE_DAYS) + ')' + _TIME + '$',
+    re.IGNORECASE
+)
+
+
+def _month_to_number(match: re.Match) -> str:
+    return f"{MONTHS[match.group('month').lower()]:02}"
+
+
+@lru_cache(maxsize=2048)
+def parse_datetime(dt_str: str, fmt: str) -> datetime | None:
+    """Parses a datetime string using strptime-like format.
+
+    Month names (%b, %B) are recognized using built-in Russian and English tables,
+    so no locale switching is required. Results are memoized.
+
+    :param dt_str: datetime string, e.g. 17 Апр 2015 17:50:51
+    :param fmt: format, e.g. %d %b %Y %H:%M:%S
+
+    """
+    if '%b' in fmt or '%B' in fmt:
+        dt_str = RE_MONTH.sub(_month_to_number, dt_str)
+        fmt = fmt.replace('%b', '%m').replace('%B', '%m')
+
+    try:
+        return datetime.strptime(dt_str.strip(), fmt)  # noqa: DTZ007
+
+    except ValueError:
+        return None
+
+
+def _get_time(match: re.Match) -> tuple[int, int, int]:
+    return int(match.group('hour') or 0), int(match.group('minute') or 0), int(match.group('second') or 0)
+
+
+@lru_cache(maxsize=2048)
+def _parse_absolute(dt_str: str) -> datetime | None:
+
+    match = RE_ABSOLUTE.match(dt_str) or RE_NUMERIC.match(dt_str)
+
+    if not match:
+        return None
+
+    month = match.group('month')
+
+    if month.isdigit():
+        month = int(month)
+
+    else:
+        month = MONTHS.get(month.lower())
+
+        if month is None:
+            return None
+
+    try:
+        return datetime(int(match.group('year')), month, int(match.group('day')), *_get_time(match))  # noqa: DTZ001
+
+    except ValueError:
+        return None
+
+
+def parse_human_datetime(dt_str: str, *, now: datetime | None = None) -> datetime | None:
+    """Parses a human-readable datetime string as shown on tracker pages.
+
+    Supported forms (Russian and English):
+        * 16 мая 2015 в 18:00
+        * 16 May 2015, 18:00
+        * 16.05.2015 18:00
+        * сегодня в 18:00, вчера в 12:31, yesterday at 10:00
+
+    :param dt_str: datetime string
+    :param now: datetime to count relative dates from. Defaults to current datetime.
+
+    """
+    dt_str = ' '.join((dt_str or '').split())
+
+    if not dt_str:
+        return None
+
+    match = RE_RELATIVE.match(dt_str)
+
+    if match:
+        now = now or datetime.now()  # noqa: DTZ005
+        day = now - timedelta(days=RELATIVE_DAYS[match.group('relative').lower()])
+        hour, minute, second = _get_time(match)
+
+        return day.replace(hour=hour, minute=minute, second=second, microsecond=0)
+
+    return _parse_absolute(dt_str)
@@ -0,0 +1,258 @@
+"""Responses dumping. See `--dump` command line switch.
+
+Responses bodies are written into files by a background thread not to slow down requests.
+Files are named after request host and a sequence number, so names do not collide:
+
+    <host>_<sequence>_<timestamp>_<client class>.<extension>[.gz|.zst]
+
+Dumping may be sampled:
+
+    errors - only responses with HTTP status codes 400 and above;
+    first:N - first N responses from every host (tracker, torrent client);
+    N% - given percentage of responses.
+
+Bodies may be compressed with gzip or zstd (Python 3.14+ or `pip install torrt[zstd]`).
+
+"""
+import gzip
+import logging
+import random
+import re
+from collections import Counter
+from collections.abc import Callable
+from itertools import count
+from pathlib import Path
+from queue import Queue
+from threading import Lock, Thread
+from time import time
+
+from .exceptions import TorrtException
+
+try:
+    from compression import zstd  # Python 3.14+
+
+except ImportError:
+    try:
+        import zstandard as zstd
+
+    except ImportError:
+        zstd = None
+
+LOGGER = logging.getLogger(__name__)
+
+COMPRESSORS: dict[str, tuple[str, Callable[[bytes], bytes]]] = {
+    'gzip': ('.gz', lambda data: gzip.compress(data, compresslevel=6)),
+    'zstd': ('.zst', lambda data: zstd.compress(data)),
+}
+"""Compression methods: file name suffixes and compressing functions."""
+
+RE_UNSAFE = re.compile(r'[^\w.-]+')
+
+
+class Sampler:
+    """Decides whether a response should be dumped."""
+
+    def __init__(self, spec: str = ''):
+        """
+        :param spec: sampling specification: errors, first:N, N%. Empty to dump all responses.
+
+        """
+        self.spec = spec
+        self.errors = False
+        self.first = 0
+        self.rate = 1.0
+
+        self._counts: Counter[str] = Counter()
+        self._lock = Lock()
+
+        try:
+            if spec == 'errors':
+                self.errors = True
+
+            elif spec.startswith('first:'):
+                self.first = int(spec.removeprefix('first:'))
+
+            elif spec.endswith('%'):
+                self.rate = float(spec.removesuffix('%')) / 100
+
+            elif spec:
+                raise ValueError
+
+        except ValueError:
+            raise TorrtException(f'Unsupported dump sampling: {spec}') from None
+
+    def __call__(self, host: str, status: int) -> bool:
+        """Returns True if a response should be dumped.
+
+        :param host: request host
+        :param status: response status code
+
+        """
+        if self.errors:
+            return status >= 400
+
+        if self.first:
+            with self._lock:
+                if self._counts[host] >= self.first:
+                    return False
+                self._counts[host] += 1
+            return True
+
+        return self.rate >= 1 or random.random() < self.rate
+
+
+class Dumper:
+    """Writes responses bodies into files in a background thread."""
+
+    queue_bytes: int = 64 * 1024 * 1024
+    """Maximum number of bytes of responses waiting to be written. Responses exceeding it are not dumped
+    (unless nothing is waiting).
+
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.path: Path | None = None
+        self.compress = ''
+        self.sampler = Sampler()
+        self.dropped = 0
+
+        self._suffix = ''
+        self._compress: Callable[[bytes], bytes] | None = None
+        self._sequence = count(1)
+        self._queue: Queue[tuple[Path, bytes] | None] = Queue()
+        self._queued_bytes = 0
+        self._writer: Thread | None = None
+        self._lock = Lock()
+
+    def enable(self, path: str | Path, *, compress: str = '', sample: str = ''):
+        """Enables dumping into a given directory.
+
+        :param path: directory to put files into
+        :param compress: compression method: gzip, zstd. Empty for no compression.
+        :param sample: sampling specification: errors, first:N, N%. Empty to dump all responses.
+
+        """
+        if compress and compress not in COMPRESSORS:
+            raise TorrtException(f'Unsupported dump compression: {compress}')
+
+        if compress == 'zstd' and zstd is None:
+            raise TorrtException('zstd compression requires Python 3.14+ or `zstandard` package')
+
+        self.disable()
+
+        self.compress = compress
+        self.sampler = Sampler(sample)
+        self._suffix, self._compress = COMPRESSORS[compress] if compress else ('', None)
+
+        self.path = Path(path)
+        self.path.mkdir(parents=True, exist_ok=True)
+        self.dropped = 0
+        self._sequence = count(1)
+
+        self._writer = Thread(target=self._write, name='torrt-dump', daemon=True)
+        self._writer.start()
+
+        self.enabled = True
+
+        LOGGER.debug(f'Dumping responses into {path} ...')
+
+    def get_settings(self) -> dict[str, str]:
+        """Returns keyword arguments for .enable() to dump as this dumper does."""
+        return {'path': f'{self.path}', 'compress': self.compress, 'sample': self.sampler.spec}
+
+    def disable(self):
+        """Disables dumping writing pending responses."""
+
+        with self._lock:
+            writer = self._writer
+            self.enabled = False
+            self._writer = None
+
+        if writer is None:
+            return
+
+        self._queue.put(None)
+        writer.join()
+
+        if self.dropped:
+            LOGGER.warning(f'{self.dropped} response(s) were not dumped: dump queue is full')
+
+    def flush(self):
+        """Waits till pending responses are written."""
+        if self._writer is not None:
+            self._queue.join()
+
+    def add(self, filename: str, contents: bytes, *, host: str = '', status: int = 200):
+        """Puts response contents into the queue to be written.
+
+        :param filename: file name template. Supports `%(ts)s` - current timestamp.
+        :param contents: response body
+        :param host: request host
+        :param status: response status code
+
+        """
+        if not self.enabled or not self.sampler(host, status):
+            return
+
+        size = len(contents)
+
+        with self._lock:
+            queued_bytes = self._queued_bytes
+
+            if queued_bytes and queued_bytes + size > self.queue_bytes:
+                self.dropped += 1
+                return
+
+            self._queued_bytes = queued_bytes + size
+
+        path = self.path / self.make_filename(filename, host=host)
+        self._queue.put((path, contents))
+
+    def make_filename(self, filename: str, *, host: str = '') -> str:
+        """Returns a unique file name.
+
+        :param filename: file name template. Supports `%(ts)s` - current timestamp.
+        :param host: request host
+
+        """
+        filename = filename % {'ts': f'{time():.6f}'}
+        host = RE_UNSAFE.sub('_', host) or 'local'
+
+        with self._lock:
+            sequence = next(self._sequence)
+
+        return f'{host}_{sequence:07}_{filename}{self._suffix}'
+
+    def _write(self):
+        queue = self._queue
+
+        while True:
+            item = queue.get()
+
+            try:
+                if item is None:
+                    return
+
+                path, contents = item
+                size = len(contents)
+
+                try:
+                    if self._compress is not None:
+                        contents = self._compress(contents)
+
+                    path.write_bytes(contents)
+
+                finally:
+                    with self._lock:
+                        self._queued_bytes -= size
+
+            except Exception as e:  # noqa: BLE001
+                LOGGER.warning(f'Unable to dump response: {e}')
+
+            finally:
+                queue.task_done()
+
+
+DUMPER = Dumper()
+"""Global responses dumper."""
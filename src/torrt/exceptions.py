@@ -14,6 +14,10 @@ class TorrtTrackerException(TorrtException):
     """
 
 
+class TorrtTrackerOfflineException(TorrtTrackerException):
+    """Raised when a tracker object in offline mode needs network access."""
+
+
 class TorrtRPCException(TorrtException):
     """Base torrt RPC exception.
 
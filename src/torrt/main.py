@@ -1,9 +1,13 @@
 import argparse
 import logging
 import sys
+from contextlib import nullcontext
 from pathlib import Path
 
-from torrt import VERSION
+from torrt import VERSION, workqueue
+from torrt.cassettes import PLAYER
+from torrt.dumping import COMPRESSORS, DUMPER
+from torrt.profiling import PROFILE_KINDS, profiled
 from torrt.toolbox import (
     add_torrent_from_url,
     bootstrap,
@@ -12,6 +16,7 @@ from torrt.toolbox import (
     configure_notifier,
     configure_rpc,
     configure_tracker,
+    get_failing_torrents,
     get_registered_torrents,
     register_torrent,
     remove_notifier,
@@ -22,38 +27,161 @@ from torrt.toolbox import (
     unregister_torrent,
     walk,
 )
+from torrt.tracing import TRACER
 from torrt.utils import (
     LOGGER,
-    GlobalParam,
     NotifierClassesRegistry,
     NotifierObjectsRegistry,
     RPCClassesRegistry,
     RPCObjectsRegistry,
     TrackerClassesRegistry,
+    config,
+    get_iso_from_timestamp,
+    parse_duration,
 )
 
 
-def process_commands(arguments: list[str] | None = None) -> None:
+def settings_dict_from_list(value: list[str] | str) -> dict[str, str]:
+    """Returns settings dictionary from `key=value` strings.
 
-    arguments = arguments or sys.argv[1:]
+    :param value: a list of strings or a space-separated string
+
+    """
+    settings_dict = {}
+
+    if isinstance(value, str):
+        value = value.split(' ')
+
+    for setting in value:
+        try:
+            key, val = setting.split('=')
+
+        except ValueError:
+            # no = delimiter founds
+            continue
+
+        settings_dict[key] = val
+
+    return settings_dict
+
+
+def run_command(args: dict):
+    """Runs a command with arguments parsed from command line.
+
+    :param args:
+
+    """
+    if args['command'] == 'enable_rpc':
+        toggle_rpc(args['alias'], enabled=True)
+
+    elif args['command'] == 'disable_rpc':
+        toggle_rpc(args['alias'], enabled=False)
+
+    elif args['command'] == 'list_trackers':
+
+        for tracker_alias in TrackerClassesRegistry.get().keys():
+            LOGGER.info(tracker_alias)
+
+    elif args['command'] == 'list_rpc':
+        rpc_statuses = {}
+
+        for rpc_alias in RPCClassesRegistry.get().keys():
+            rpc_statuses[rpc_alias] = 'unconfigured'
+
+        for rpc_alias, rpc in RPCObjectsRegistry.get().items():
+            rpc_statuses[rpc_alias] = 'enabled' if rpc.enabled else 'disabled'
+
+        for rpc_alias, rpc_status in rpc_statuses.items():
+            LOGGER.info(f'{rpc_alias}\t status={rpc_status}')
+
+    elif args['command'] == 'list_torrents':
+
+        if args['failing']:
+            for torrent_hash, failure in get_failing_torrents().items():
+                next_check = (
+                    'dormant' if failure['dormant']
+                    else f"next check {get_iso_from_timestamp(failure['time_next_check'])}"
+                )
+                LOGGER.info(
+                    f"{torrent_hash}\t{failure['name']}\tfailures={failure['count']}\t{next_check}\t"
+                    f"{failure['error']}\t{failure['url']}"
+                )
+
+        else:
+            for torrent_hash, torrent_data in get_registered_torrents().items():
+                LOGGER.info(f"{torrent_hash}\t{torrent_data['name']}")
+
+    elif args['command'] == 'list_notifiers':
+        notifiers = {}
+        for notifier_alias in NotifierClassesRegistry.get().keys():
+            notifiers[notifier_alias] = 'unconfigured'
+
+        for notifier_alias in NotifierObjectsRegistry.get().keys():
+            notifiers[notifier_alias] = 'enabled'
+
+        for notifier_alias, notifier_status in notifiers.items():
+            LOGGER.info(f"{notifier_alias}\t status={notifier_status}")
+
+    elif args['command'] == 'walk':
+
+        if args['queue']:
+            workqueue.walk(workqueue.WorkQueue(args['queue']), forced=args['forced'])
+
+        else:
+            walk(forced=args['forced'], silent=True, budget=args['budget'])
+
+    elif args['command'] == 'work':
+        workqueue.work(
+            workqueue.WorkQueue(args['queue']),
+            batch=args['batch'],
+            pipeline=config.load()['walk_pipeline'],
+        )
+
+    elif args['command'] == 'set_walk_interval':
+        set_walk_interval(args['walk_interval'])
+
+    elif args['command'] == 'add_torrent':
+        add_torrent_from_url(
+            args['url'],
+            download_to=args['download_to'],
+            params=settings_dict_from_list(args['params']),
+        )
+
+    elif args['command'] == 'remove_torrent':
+        remove_torrent(args['hash'], with_data=args['delete_data'])
+
+    elif args['command'] == 'register_torrent':
+        register_torrent(
+            args['hash'],
+            url=args['url'],
+            params=settings_dict_from_list(args['params']),
+        )
+
+    elif args['command'] == 'unregister_torrent':
+        unregister_torrent(args['hash'])
+
+    elif args['command'] == 'configure_rpc':
+        configure_rpc(args['rpc_alias'], settings_dict_from_list(args['settings']))
+
+    elif args['command'] == 'configure_tracker':
+        configure_tracker(args['tracker_alias'], settings_dict_from_list(args['settings']))
+
+    elif args['command'] == 'configure_notifier':
+        configure_notifier(args['notifier_alias'], settings_dict_from_list(args['settings']))
 
-    def settings_dict_from_list(value: list[str] | str):
-        settings_dict = {}
+    elif args['command'] == 'remove_notifier':
+        remove_notifier(args['alias'])
 
-        if isinstance(value, str):
-            value = value.split(' ')
+    elif args['command'] == 'configure_bot':
+        configure_bot(args['bot_alias'], settings_dict_from_list(args['settings']))
 
-        for setting in value:
-            try:
-                key, val = setting.split('=')
+    elif args['command'] == 'run_bots':
+        run_bots(args['aliases'])
 
-            except ValueError:
-                # no = delimiter founds
-                continue
 
-            settings_dict[key] = val
+def process_commands(arguments: list[str] | None = None) -> None:
 
-        return settings_dict
+    arguments = arguments or sys.argv[1:]
 
     arg_parser = argparse.ArgumentParser('torrt', description='Automates torrent updates for you.')
     arg_parser.add_argument('--version', action='version', version='%(prog)s ' + VERSION)
@@ -62,7 +190,10 @@ def process_commands(arguments: list[str] | None = None) -> None:
 
     subp_main.add_parser('list_rpc', help='Shows known RPCs aliases')
     subp_main.add_parser('list_trackers', help='Shows known trackers aliases')
-    subp_main.add_parser('list_torrents', help='Shows torrents registered for updates')
+    parser_list_torrents = subp_main.add_parser('list_torrents', help='Shows torrents registered for updates')
+    parser_list_torrents.add_argument(
+        '--failing', help='Show only torrents failed to be checked during previous walks', dest='failing',
+        action='store_true')
     subp_main.add_parser('list_notifiers', help='Shows configured notifiers')
 
     parser_configure_tracker = subp_main.add_parser(
@@ -117,6 +248,25 @@ def process_commands(arguments: list[str] | None = None) -> None:
         action='store_true')
     parser_walk.add_argument(
         '--dump', help='Dump web pages scraped by torrt into current or a given directory', dest='dump')
+    parser_walk.add_argument(
+        '--budget', help='Walk time budget, e.g.: 15m, 1h, 90s. Next walk resumes where the previous one stopped',
+        dest='budget', type=parse_duration, default=0)
+    parser_walk.add_argument(
+        '--queue', help='Distributed walk: SQLite work queue file path to put checks into for workers',
+        dest='queue')
+    parser_walk.add_argument(
+        '--trace', help='Append tracing spans (OpenTelemetry JSON lines) into a given file', dest='trace')
+
+    parser_work = subp_main.add_parser(
+        'work', help='Performs torrent updates checks from a work queue (see walk --queue)')
+    parser_work.add_argument(
+        'queue', help='SQLite work queue file path')
+    parser_work.add_argument(
+        '--batch', help='Number of checks to lease at once', dest='batch', type=int, default=16)
+    parser_work.add_argument(
+        '--dump', help='Dump web pages scraped by torrt into current or a given directory', dest='dump')
+    parser_work.add_argument(
+        '--trace', help='Append tracing spans (OpenTelemetry JSON lines) into a given file', dest='trace')
 
     parser_run_bots = subp_main.add_parser(
         'run_bots', help='Run registered bots')
@@ -179,12 +329,36 @@ def process_commands(arguments: list[str] | None = None) -> None:
         'remove_notifier', help='Remove configured notifier by its alias')
     parser_remove_notifier.add_argument('alias', help='Alias of notifier to remove')
 
+    for parser in (parser_walk, parser_work, parser_add_torrent):
+        parser.add_argument(
+            '--dump-compress', help='Compress dumped web pages', dest='dump_compress', choices=list(COMPRESSORS))
+        parser.add_argument(
+            '--dump-sample', help='Dump only some web pages: errors (HTTP 4xx, 5xx), first:N (for every host), N%%',
+            dest='dump_sample', default='')
+
+        cassette_group = parser.add_mutually_exclusive_group()
+        cassette_group.add_argument(
+            '--record', help='Record HTTP interactions into a given cassette directory', dest='record')
+        cassette_group.add_argument(
+            '--replay', help='Replay HTTP interactions from a given cassette directory instead of network access',
+            dest='replay')
+        parser.add_argument(
+            '--replay-latency', help='Replay HTTP responses with latencies recorded', dest='replay_latency',
+            action='store_true')
+
     for parser in subp_main.choices.values():
         parser.add_argument('--verbose', help='Switch to show debug messages', dest='verbose', action='store_true')
+        parser.add_argument(
+            '--profile', help='Profile the command: CPU (cProfile) or memory (tracemalloc) usage. '
+                              'Results are written into current directory', dest='profile', choices=PROFILE_KINDS)
 
     args = arg_parser.parse_args(arguments)
     args = vars(args)
 
+    if args['command'] == 'walk' and args['queue'] and args['budget']:
+        # Distributed walk only puts checks into the queue, checks are performed by workers.
+        arg_parser.error('walk: --budget is not supported with --queue')
+
     configure_logging(logging.DEBUG if args.get('verbose') else logging.INFO)
 
     bootstrap()
@@ -192,89 +366,33 @@ def process_commands(arguments: list[str] | None = None) -> None:
     dump_into = args.get('dump')
 
     if dump_into:
-        GlobalParam.set('dump_into', Path(dump_into).resolve())
-
-    if args['command'] == 'enable_rpc':
-        toggle_rpc(args['alias'], enabled=True)
-
-    elif args['command'] == 'disable_rpc':
-        toggle_rpc(args['alias'], enabled=False)
-
-    elif args['command'] == 'list_trackers':
-
-        for tracker_alias in TrackerClassesRegistry.get().keys():
-            LOGGER.info(tracker_alias)
-
-    elif args['command'] == 'list_rpc':
-        rpc_statuses = {}
-
-        for rpc_alias in RPCClassesRegistry.get().keys():
-            rpc_statuses[rpc_alias] = 'unconfigured'
-
-        for rpc_alias, rpc in RPCObjectsRegistry.get().items():
-            rpc_statuses[rpc_alias] = 'enabled' if rpc.enabled else 'disabled'
-
-        for rpc_alias, rpc_status in rpc_statuses.items():
-            LOGGER.info(f'{rpc_alias}\t status={rpc_status}')
-
-    elif args['command'] == 'list_torrents':
-        for torrent_hash, torrent_data in get_registered_torrents().items():
-            LOGGER.info(f"{torrent_hash}\t{torrent_data['name']}")
-
-    elif args['command'] == 'list_notifiers':
-        notifiers = {}
-        for notifier_alias in NotifierClassesRegistry.get().keys():
-            notifiers[notifier_alias] = 'unconfigured'
+        DUMPER.enable(
+            Path(dump_into).resolve(), compress=args.get('dump_compress') or '', sample=args.get('dump_sample'))
 
-        for notifier_alias in NotifierObjectsRegistry.get().keys():
-            notifiers[notifier_alias] = 'enabled'
+    cassette_path = args.get('record') or args.get('replay')
 
-        for notifier_alias, notifier_status in notifiers.items():
-            LOGGER.info(f"{notifier_alias}\t status={notifier_status}")
+    if cassette_path:
+        PLAYER.insert(
+            Path(cassette_path).resolve(), record=bool(args.get('record')), latency=args.get('replay_latency'))
 
-    elif args['command'] == 'walk':
-        walk(forced=args['forced'], silent=True)
+    trace_into = args.get('trace')
 
-    elif args['command'] == 'set_walk_interval':
-        set_walk_interval(args['walk_interval'])
+    if trace_into:
+        TRACER.enable(Path(trace_into).resolve())
 
-    elif args['command'] == 'add_torrent':
-        add_torrent_from_url(
-            args['url'],
-            download_to=args['download_to'],
-            params=settings_dict_from_list(args['params']),
-        )
+    profile = args.get('profile')
 
-    elif args['command'] == 'remove_torrent':
-        remove_torrent(args['hash'], with_data=args['delete_data'])
+    try:
+        with profiled(profile, name=args['command']) if profile else nullcontext():
+            run_command(args)
 
-    elif args['command'] == 'register_torrent':
-        register_torrent(
-            args['hash'],
-            url=args['url'],
-            params=settings_dict_from_list(args['params']),
-        )
-
-    elif args['command'] == 'unregister_torrent':
-        unregister_torrent(args['hash'])
+    finally:
+        # Pending spans and responses are written, even if the command has failed.
+        if trace_into:
+            TRACER.disable()
 
-    elif args['command'] == 'configure_rpc':
-        configure_rpc(args['rpc_alias'], settings_dict_from_list(args['settings']))
-
-    elif args['command'] == 'configure_tracker':
-        configure_tracker(args['tracker_alias'], settings_dict_from_list(args['settings']))
-
-    elif args['command'] == 'configure_notifier':
-        configure_notifier(args['notifier_alias'], settings_dict_from_list(args['settings']))
-
-    elif args['command'] == 'remove_notifier':
-        remove_notifier(args['alias'])
-
-    elif args['command'] == 'configure_bot':
-        configure_bot(args['bot_alias'], settings_dict_from_list(args['settings']))
-
-    elif args['command'] == 'run_bots':
-        run_bots(args['aliases'])
+        if dump_into:
+            DUMPER.disable()
 
 
 if __name__ == '__main__':
@@ -0,0 +1,275 @@
+"""Walk instrumentation: counters and latency histograms.
+
+Collected metrics may be exported as a Prometheus textfile (for node_exporter textfile collector)
+and as a JSON summary. See `metrics` section of configuration file.
+
+"""
+import json
+import logging
+from collections.abc import Callable, Generator
+from contextlib import contextmanager
+from functools import wraps
+from math import inf
+from pathlib import Path
+from threading import Lock
+from time import perf_counter
+from typing import Any
+
+LOGGER = logging.getLogger(__name__)
+
+BUCKETS: tuple[float, ...] = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+"""Latency histograms buckets upper bounds (seconds)."""
+
+HELP: dict[str, str] = {
+    'torrt_walk_seconds': 'Last walk duration.',
+    'torrt_walk_last_timestamp_seconds': 'Last walk start time.',
+    'torrt_walk_torrents_total': 'Torrents processed by the last walk by result.',
+    'torrt_walk_phase_seconds': 'Walk phases latency by tracker.',
+    'torrt_http_request_seconds': 'HTTP requests latency by host.',
+    'torrt_http_requests_total': 'HTTP requests by host and response status.',
+    'torrt_tracker_call_seconds': 'Tracker operations latency.',
+    'torrt_tracker_errors_total': 'Tracker operations failed with exceptions.',
+    'torrt_rpc_call_seconds': 'RPC methods calls latency.',
+    'torrt_rpc_errors_total': 'RPC methods calls failed with exceptions.',
+}
+"""Metrics descriptions."""
+
+Labels = tuple[tuple[str, str], ...]
+
+
+class Histogram:
+    """Latency histogram."""
+
+    __slots__ = ['buckets', 'count', 'max', 'sum']
+
+    def __init__(self):
+        self.buckets = [0] * len(BUCKETS)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value: float):
+        for idx, bound in enumerate(BUCKETS):
+            if value <= bound:
+                self.buckets[idx] += 1
+                break
+
+        self.count += 1
+        self.sum += value
+        self.max = max(self.max, value)
+
+
+class Metrics:
+    """Thread-safe metrics registry."""
+
+    def __init__(self):
+        self._lock = Lock()
+        self._counters: dict[tuple[str, Labels], float] = {}
+        self._gauges: dict[tuple[str, Labels], float] = {}
+        self._histograms: dict[tuple[str, Labels], Histogram] = {}
+
+    def reset(self):
+        """Drops all collected metrics."""
+
+        with self._lock:
+            self._counters.clear()
+            self._gauges.clear()
+            self._histograms.clear()
+
+    def increment(self, name: str, value: float = 1, **labels: str):
+        """Increments a counter.
+
+        :param name: metric name
+        :param value: value to add
+        :param labels: metric labels
+
+        """
+        key = (name, tuple(sorted(labels.items())))
+
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def set(self, name: str, value: float, **labels: str):
+        """Sets a gauge value.
+
+        :param name: metric name
+        :param value:
+        :param labels: metric labels
+
+        """
+        with self._lock:
+            self._gauges[(name, tuple(sorted(labels.items())))] = value
+
+    def observe(self, name: str, value: float, **labels: str):
+        """Puts a value (seconds) into a histogram.
+
+        :param name: metric name
+        :param value:
+        :param labels: metric labels
+
+        """
+        key = (name, tuple(sorted(labels.items())))
+
+        with self._lock:
+            histogram = self._histograms.get(key)
+
+            if histogram is None:
+                histogram = self._histograms[key] = Histogram()
+
+            histogram.observe(value)
+
+    @contextmanager
+    def timed(self, name: str, *, errors: str = '', **labels: str) -> Generator[None, None, None]:
+        """Context manager putting the time spent inside it into a histogram.
+
+        :param name: histogram metric name
+        :param errors: counter metric name to increment if an exception is raised inside
+        :param labels: metric labels
+
+        """
+        started = perf_counter()
+
+        try:
+            yield
+
+        except Exception:
+            if errors:
+                self.increment(errors, **labels)
+            raise
+
+        finally:
+            self.observe(name, perf_counter() - started, **labels)
+
+    def to_prometheus(self) -> str:
+        """Returns metrics in Prometheus text exposition format."""
+
+        lines = []
+        described = set()
+
+        def describe(name: str, kind: str):
+            if name not in described:
+                described.add(name)
+                lines.append(f"# HELP {name} {HELP.get(name, name)}")
+                lines.append(f'# TYPE {name} {kind}')
+
+        def format_labels(labels: Labels, **extra: str) -> str:
+            items = [*labels, *extra.items()]
+
+            if not items:
+                return ''
+
+            return '{%s}' % ','.join(f'{key}="{escape(value)}"' for key, value in items)  # noqa: UP031
+
+        with self._lock:
+            for (name, labels), value in sorted(self._gauges.items()):
+                describe(name, 'gauge')
+                lines.append(f'{name}{format_labels(labels)} {value}')
+
+            for (name, labels), value in sorted(self._counters.items()):
+                describe(name, 'counter')
+                lines.append(f'{name}{format_labels(labels)} {value}')
+
+            for (name, labels), histogram in sorted(self._histograms.items(), key=lambda item: item[0]):
+                describe(name, 'histogram')
+                cumulative = 0
+
+                for bound, count in zip((*BUCKETS, inf), (*histogram.buckets, 0), strict=True):
+                    cumulative += count
+                    le = '+Inf' if bound is inf else f'{bound}'
+                    total = histogram.count if bound is inf else cumulative
+                    lines.append(f'{name}_bucket{format_labels(labels, le=le)} {total}')
+
+                lines.append(f'{name}_sum{format_labels(labels)} {histogram.sum}')
+                lines.append(f'{name}_count{format_labels(labels)} {histogram.count}')
+
+        return '\n'.join(lines) + '\n'
+
+    def get_summary(self) -> dict[str, list[dict[str, Any]]]:
+        """Returns metrics summary: a list of labels and values for every metric."""
+
+        summary: dict[str, list[dict[str, Any]]] = {}
+
+        with self._lock:
+            for (name, labels), value in sorted(self._gauges.items()):
+                summary.setdefault(name, []).append({**dict(labels), 'value': value})
+
+            for (name, labels), value in sorted(self._counters.items()):
+                summary.setdefault(name, []).append({**dict(labels), 'value': value})
+
+            for (name, labels), histogram in sorted(self._histograms.items(), key=lambda item: item[0]):
+                summary.setdefault(name, []).append({
+                    **dict(labels),
+                    'count': histogram.count,
+                    'sum': round(histogram.sum, 6),
+                    'mean': round(histogram.sum / histogram.count, 6),
+                    'max': round(histogram.max, 6),
+                })
+
+        return summary
+
+    def export(self, *, textfile: str = '', summary: str = ''):
+        """Writes metrics into files.
+
+        :param textfile: Prometheus textfile path
+        :param summary: JSON summary file path
+
+        """
+        if textfile:
+            LOGGER.debug(f'Writing metrics into {textfile} ...')
+            write_atomic(textfile, self.to_prometheus())
+
+        if summary:
+            LOGGER.debug(f'Writing metrics summary into {summary} ...')
+            write_atomic(summary, json.dumps(self.get_summary(), indent=4))
+
+
+def escape(value: str) -> str:
+    """Escapes a label value for Prometheus text format.
+
+    :param value:
+
+    """
+    return f'{value}'.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def write_atomic(path: str, contents: str):
+    """Writes contents into a file atomically, so that readers
+    (e.g. node_exporter) never see a partially written file.
+
+    :param path:
+    :param contents:
+
+    """
+    path = Path(path)
+    tmp_path = path.with_name(f'.{path.name}.tmp')
+    tmp_path.write_text(contents)
+    tmp_path.replace(path)
+
+
+def timed_method(name: str, *, errors: str = '', **labels: str | Callable[[Any], str]) -> Callable:
+    """Decorator putting the time spent in a method into a histogram.
+
+    :param name: histogram metric name
+    :param errors: counter metric name to increment if an exception is raised
+    :param labels: label values or functions returning label values for a given object (self)
+
+    """
+    def decorator(func: Callable) -> Callable:
+
+        @wraps(func)
+        def wrapper(self, *args, **kwargs):
+            with METRICS.timed(
+                name,
+                errors=errors,
+                **{label: value(self) if callable(value) else value for label, value in labels.items()}
+            ):
+                return func(self, *args, **kwargs)
+
+        wrapper.timed = True
+        return wrapper
+
+    return decorator
+
+
+METRICS = Metrics()
+"""Global metrics registry."""
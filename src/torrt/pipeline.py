@@ -0,0 +1,752 @@
+"""Staged walk pipeline.
+
+Torrents pass through stages connected with bounded queues:
+
+    discover -> fetch page -> extract -> download -> apply
+
+Every stage but the first and the last one is served by its own pool of worker threads,
+so the walk throughput is bounded by the slowest stage instead of the sum of all latencies.
+Discovery (RPC listing, bulk lookups, feeds) runs in a separate thread, the final apply
+stage (RPC calls, configuration updates) is run by the caller (see WalkPipeline.run()).
+
+Torrent pages are checked in a round-robin order, so a walk may be limited in time
+and the next one resumes where the previous one stopped (see WalkProgress).
+
+Optionally, CPU-bound extract stage may be run on a process pool to use several cores
+(see `extract_processes` and BaseTracker.extract_offline()).
+
+"""
+import logging
+from collections.abc import Generator, Iterable
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from inspect import signature
+from multiprocessing import get_context
+from queue import Queue
+from threading import Condition, Event, Lock, Thread
+from time import monotonic, time
+from typing import TYPE_CHECKING
+
+from .context import get_run_context, init_process, propagate
+from .exceptions import TorrtException
+from .metrics import METRICS
+from .tracing import NOOP_SPAN, NoopSpan, Span, get_current_span, start_span
+from .utils import (
+    DATETIME_FORMAT,
+    TorrentData,
+    TrackerObjectsRegistry,
+    get_feeds_unlisted_urls,
+    get_info_hashes_from_urls,
+    get_url_from_string,
+    iter_rpc,
+)
+
+if TYPE_CHECKING:
+    from .base_rpc import BaseRPC
+    from .base_tracker import BaseTracker, TorrentPage
+
+LOGGER = logging.getLogger(__name__)
+
+_STOP = object()
+"""Queue sentinel signalling that no more items will come."""
+
+
+class BytesBudget:
+    """Limits the number of bytes held at once, e.g. by torrent files being downloaded and waiting to be applied."""
+
+    def __init__(self, limit: int):
+        self.limit = limit
+        self.used = 0
+        self._condition = Condition()
+
+    def acquire(self, size: int):
+        """Waits till the given number of bytes fits into the budget and takes it.
+        An oversized item is let through if nothing else is held, not to block forever.
+
+        :param size:
+
+        """
+        with self._condition:
+            while self.used and self.used + size > self.limit:
+                self._condition.wait()
+
+            self.used += size
+
+    def release(self, size: int):
+        """Returns the given number of bytes into the budget.
+
+        :param size:
+
+        """
+        with self._condition:
+            self.used -= size
+            self._condition.notify_all()
+
+    def resize(self, held: int, size: int):
+        """Changes the number of bytes held without waiting, e.g. an estimate to the actual size.
+
+        :param held: number of bytes held
+        :param size: new number of bytes
+
+        """
+        with self._condition:
+            self.used += size - held
+            self._condition.notify_all()
+
+
+class WalkJob:
+    """Represents a torrent page to be checked for updates
+    along with the torrents from RPCs it relates to.
+
+    """
+
+    __slots__ = ['known_hash', 'last_updated', 'page', 'result', 'size', 'span', 'torrents', 'tracker', 'url']
+
+    def __init__(self, url: str, tracker: 'BaseTracker'):
+        self.url = url
+        self.tracker = tracker
+
+        self.torrents: list[tuple[BaseRPC, dict]] = []
+        """RPC objects and torrents data got from them."""
+
+        self.known_hash = ''
+        self.last_updated: datetime | None = None
+
+        self.page: TorrentPage | None = None
+        """Torrent page fetched. Kept till extraction not to be fetched again
+        when evicted from tracker pages cache meanwhile.
+
+        """
+
+        self.result: TorrentData | None = None
+
+        self.size = 0
+        """Number of bytes held in downloads budget."""
+
+        self.span: Span | NoopSpan = NOOP_SPAN
+        """Tracing span continued by every stage. Ended when the job leaves the pipeline."""
+
+
+class WalkProgress:
+    """Walk progress. Allows a walk to be limited in time and to be resumed.
+    Also keeps track of torrents failed to be checked, postponing their checks.
+
+    """
+
+    __slots__ = [
+        '_lock',
+        'backoff',
+        'complete',
+        'cursor',
+        'deadline',
+        'dormant_threshold',
+        'failed',
+        'failures',
+        'recovered',
+        'updated',
+    ]
+
+    def __init__(
+            self,
+            *,
+            cursor: str = '',
+            budget: float = 0,
+            failures: dict[str, dict] | None = None,
+            backoff: int = 3600,
+            dormant_threshold: int = 10
+    ):
+        """
+        :param cursor: torrent page URL checked last by a previous walk.
+            Pages are checked in a round-robin order starting right after it.
+        :param budget: walk time budget in seconds. 0 - no limit.
+        :param failures: previous checks failures information indexed by torrent hashes
+        :param backoff: base interval (seconds) to postpone a check of a failed torrent for.
+            Doubled with every consecutive failure.
+        :param dormant_threshold: number of consecutive failures after which
+            the torrent is considered dormant and is not checked anymore. 0 - no limit.
+
+        """
+        self.cursor = cursor
+        """Torrent page URL dispatched for a check last."""
+
+        self.deadline = monotonic() + budget if budget else 0
+        """Monotonic time after which no more pages are dispatched for checks."""
+
+        self.complete = False
+        """Whether all torrent pages were dispatched for checks."""
+
+        self.updated: dict[str, dict] = {}
+        """Information on torrents updated so far. See update_torrents()."""
+
+        self.failures = failures or {}
+        self.backoff = backoff
+        self.dormant_threshold = dormant_threshold
+
+        self.failed: dict[str, str] = {}
+        """Errors for torrents failed to be checked during this walk indexed by torrent hashes."""
+
+        self.recovered: set[str] = set()
+        """Hashes of previously failed torrents checked successfully during this walk."""
+
+        self._lock = Lock()
+
+    def is_dormant(self, hash_str: str) -> bool:
+        """Returns True if a torrent has failed too many times in a row and is not checked anymore.
+
+        :param hash_str: torrent hash
+
+        """
+        threshold = self.dormant_threshold
+        return bool(threshold) and self.failures.get(hash_str, {}).get('count', 0) >= threshold
+
+    def get_time_next_check(self, hash_str: str) -> int:
+        """Returns a timestamp (seconds) before which a failed torrent is not checked.
+        0 - no failures known.
+
+        :param hash_str: torrent hash
+
+        """
+        failure = self.failures.get(hash_str)
+
+        if not failure:
+            return 0
+
+        return failure['time_last'] + self.backoff * 2 ** (failure['count'] - 1)
+
+    def is_postponed(self, hash_str: str) -> bool:
+        """Returns True if a torrent should not be checked now because of previous failures.
+
+        :param hash_str: torrent hash
+
+        """
+        return self.is_dormant(hash_str) or time() < self.get_time_next_check(hash_str)
+
+    def fail(self, job: 'WalkJob', error: str):
+        """Registers a failure of a torrent page check.
+
+        :param job:
+        :param error: error description
+
+        """
+        LOGGER.error(f'  Unable to get torrent from `{job.url}`: {error}')
+        job.span.record_error(error)
+
+        with self._lock:
+            for _, rpc_torrent in job.torrents:
+                self.failed[rpc_torrent['hash']] = error
+
+    def succeed(self, job: 'WalkJob'):
+        """Registers a successful torrent page check.
+
+        :param job:
+
+        """
+        self.recover(rpc_torrent['hash'] for _, rpc_torrent in job.torrents)
+
+    def recover(self, hashes: Iterable[str]):
+        """Registers torrents checked successfully, including those known
+        to be unchanged without torrent page checks. Their previous failures are forgotten.
+
+        :param hashes: torrents hashes
+
+        """
+        with self._lock:
+            self.recovered.update(hash_str for hash_str in hashes if hash_str in self.failures)
+
+    def expired(self) -> bool:
+        """Returns True if the time budget is exhausted."""
+        return bool(self.deadline) and monotonic() >= self.deadline
+
+    def dispatch(self, jobs: list['WalkJob']) -> Generator['WalkJob', None, None]:
+        """Yields jobs while the time budget allows, advancing the cursor.
+
+        :param jobs: jobs ordered with order_walk_jobs()
+
+        """
+        for job in jobs:
+
+            if self.expired():
+                LOGGER.info(f'Walk time budget is exhausted. Will resume after `{self.cursor}`')
+                return
+
+            self.cursor = job.url
+
+            yield job
+
+        self.complete = True
+        self.cursor = ''
+
+
+def describe_failure(page: 'TorrentPage | None') -> str:
+    """Returns a description of a torrent page check failure.
+
+    :param page: torrent page fetched if any
+
+    """
+    response = page and page.response
+
+    if response is None:
+        return 'Torrent page is unavailable'
+
+    if not response.ok:
+        return f'Torrent page status: {response.status_code}'
+
+    return 'Unable to get torrent data from page'
+
+
+def order_walk_jobs(jobs: list['WalkJob'], *, cursor: str = '') -> list['WalkJob']:
+    """Returns jobs in a round-robin order: sorted by torrent page URLs,
+    starting with the one following the cursor.
+
+    :param jobs:
+    :param cursor: torrent page URL checked last
+
+    """
+    jobs = sorted(jobs, key=lambda job: job.url)
+
+    if cursor:
+        jobs = [job for job in jobs if job.url > cursor] + [job for job in jobs if job.url <= cursor]
+
+    return jobs
+
+
+def get_rpc_torrents(torrents: dict[str, dict]) -> list[tuple['BaseRPC', dict]]:
+    """Returns torrents known to torrt from every enabled RPC,
+    as a list of tuples: RPC object and torrent data from it.
+
+    :param torrents: torrents data indexed with hashes
+
+    """
+    hashes = list(torrents)
+    rpc_torrents = []
+
+    for _, rpc_object in iter_rpc():
+
+        LOGGER.info(f'Getting torrents from `{rpc_object.alias}` ...')
+        rpc_object_torrents = rpc_object.method_get_torrents(hashes)
+
+        if not rpc_object_torrents:
+            LOGGER.info('  No relevant torrents found')
+
+        rpc_torrents.extend((rpc_object, rpc_torrent) for rpc_torrent in rpc_object_torrents)
+
+    return rpc_torrents
+
+
+def make_walk_jobs(
+        torrents: dict[str, dict],
+        rpc_torrents: list[tuple['BaseRPC', dict]],
+        *,
+        use_feeds: bool = False,
+        progress: WalkProgress | None = None
+) -> list[WalkJob]:
+    """Returns jobs for torrent pages to be checked for updates
+    in a round-robin order (see order_walk_jobs()).
+    Torrents known to be unchanged and those with checks postponed after failures are skipped.
+
+    :param torrents: torrents data indexed with hashes
+    :param rpc_torrents: RPC objects and torrents data got from them. See get_rpc_torrents().
+    :param use_feeds: flag to check only those torrents which are listed in trackers feeds
+        of recently updated torrents (for trackers having such feeds)
+    :param progress: walk progress to resume from
+
+    """
+    if progress is None:
+        progress = WalkProgress()
+
+    page_urls = {}
+    rpc_torrents_linked = []
+
+    for rpc_object, rpc_torrent in rpc_torrents:
+
+        if progress.is_postponed(rpc_torrent['hash']):
+            LOGGER.debug(f"  `{rpc_torrent['name']}`: Check is postponed after failures")
+            continue
+
+        page_url = get_url_from_string(rpc_torrent['comment'])
+
+        if not page_url:
+            page_url = torrents[rpc_torrent['hash']].get('url', None) if torrents else None
+
+        if not page_url:
+            LOGGER.warning(f"  Torrent `{rpc_torrent['name']}` has no link in comment. Skipped")
+            continue
+
+        page_urls[rpc_torrent['hash']] = page_url
+        rpc_torrents_linked.append((rpc_object, rpc_torrent))
+
+    urls = set(page_urls.values())
+
+    # Bulk info hashes lookup to skip unchanged torrents early.
+    info_hashes = get_info_hashes_from_urls(urls)
+
+    unlisted_urls = set()
+
+    if use_feeds:
+        unlisted_urls = get_feeds_unlisted_urls(urls, feeds={})
+
+    jobs: dict[str, WalkJob] = {}
+
+    for rpc_object, rpc_torrent in rpc_torrents_linked:
+        hash_str = rpc_torrent['hash']
+        page_url = page_urls[hash_str]
+
+        if info_hashes.get(page_url) == hash_str.lower():
+            LOGGER.info(f"  `{rpc_torrent['name']}`: No updates")
+            progress.recover([hash_str])
+            continue
+
+        if page_url in unlisted_urls:
+            LOGGER.info(f"  `{rpc_torrent['name']}`: No updates in tracker feed")
+            progress.recover([hash_str])
+            continue
+
+        job = jobs.get(page_url)
+
+        if job is None:
+            tracker = TrackerObjectsRegistry.get_for_string(page_url)
+
+            if not tracker:
+                LOGGER.warning(f'  Tracker handler for `{page_url}` is not registered')
+                continue
+
+            job = jobs[page_url] = WalkJob(page_url, tracker)
+
+        job.torrents.append((rpc_object, rpc_torrent))
+
+    for job in jobs.values():
+        known_hashes = {rpc_torrent['hash'] for _, rpc_torrent in job.torrents}
+
+        if len(known_hashes) == 1:
+            # Shortcuts are only possible when all torrent clients have the same torrent.
+            known_hash = known_hashes.pop()
+            raw_last_updated = torrents[known_hash]['page'].get('date_updated')
+
+            job.known_hash = known_hash
+            job.last_updated = (
+                datetime.strptime(raw_last_updated, DATETIME_FORMAT)  # noqa: DTZ007
+                if raw_last_updated
+                else None
+            )
+
+    return order_walk_jobs(list(jobs.values()), cursor=progress.cursor)
+
+
+class WalkPipeline:
+    """Checks torrents for updates passing them through pipeline stages."""
+
+    download_size_estimate: int = 256 * 1024
+    """Number of bytes to be taken from downloads budget for a .torrent file
+    before it is downloaded. Adjusted to the actual size after the download.
+
+    """
+
+    def __init__(
+            self,
+            *,
+            fetch_workers: int = 4,
+            extract_workers: int = 2,
+            extract_processes: int = 0,
+            download_workers: int = 2,
+            queue_size: int = 16,
+            download_bytes_limit: int = 16 * 1024 * 1024
+    ):
+        """
+        :param fetch_workers: number of threads fetching torrent pages
+        :param extract_workers: number of threads extracting data from torrent pages
+        :param extract_processes: number of processes extracting data from torrent pages.
+            0 - extract in threads.
+        :param download_workers: number of threads downloading .torrent files
+        :param queue_size: maximum number of items waiting between stages
+        :param download_bytes_limit: maximum number of bytes of .torrent files
+            being downloaded (see `download_size_estimate`) and waiting to be applied
+
+        """
+        self.fetch_workers = max(fetch_workers, 1)
+        self.extract_processes = max(extract_processes, 0)
+        # Extract threads wait for processes results.
+        self.extract_workers = max(extract_workers, self.extract_processes, 1)
+        self.download_workers = max(download_workers, 1)
+        self.queue_size = max(queue_size, 1)
+
+        self.downloads_budget = BytesBudget(download_bytes_limit)
+
+        self._cancelled = Event()
+        self._error: Exception | None = None
+        self._progress = WalkProgress()
+        self._executor: ProcessPoolExecutor | None = None
+
+    @classmethod
+    def from_settings(cls, settings: dict | None) -> 'WalkPipeline':
+        """Returns a pipeline configured with settings from `walk_pipeline`
+        configuration section. Raises TorrtException on unknown (e.g. misspelled) settings.
+
+        :param settings:
+
+        """
+        settings = settings or {}
+        unknown = set(settings).difference(signature(cls).parameters)
+
+        if unknown:
+            raise TorrtException(f"Unknown walk pipeline settings: {', '.join(sorted(unknown))}")
+
+        return cls(**settings)
+
+    def run(
+            self,
+            torrents: dict[str, dict],
+            *,
+            use_feeds: bool = False,
+            progress: WalkProgress | None = None
+    ) -> Generator[WalkJob, None, None]:
+        """Runs the pipeline. Yields jobs with downloaded torrents to be applied
+        (see WalkJob.result). Exceptions raised for torrent pages are registered
+        as their failures (see WalkProgress.fail()), other exceptions are reraised here.
+
+        :param torrents: torrents data indexed with hashes
+        :param use_feeds: flag to check only those torrents which are listed in trackers feeds
+            of recently updated torrents (for trackers having such feeds)
+        :param progress: walk progress to limit the walk in time and to resume from
+
+        """
+        if progress is None:
+            progress = WalkProgress()
+
+        self._progress = progress
+        self._cancelled.clear()
+        self._error = None
+
+        if self.extract_processes:
+            # Spawn is used as forking a multithreaded process is unsafe.
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.extract_processes,
+                mp_context=get_context('spawn'),
+                initializer=init_process,
+                initargs=(get_run_context().snapshot(),),
+            )
+
+        discovered = self._make_queue()
+        fetched = self._make_queue()
+        extracted = self._make_queue()
+        downloaded = self._make_queue()
+
+        # Stages threads continue the caller's run context and trace.
+        Thread(
+            target=propagate(self._discover),
+            kwargs={
+                'torrents': torrents,
+                'use_feeds': use_feeds,
+                'progress': progress,
+                'target': discovered,
+            },
+            name='torrt-discover',
+            daemon=True,
+        ).start()
+
+        self._start_stage('fetch', self._fetch, discovered, fetched, workers=self.fetch_workers)
+        self._start_stage('extract', self._extract, fetched, extracted, workers=self.extract_workers)
+        self._start_stage('download', self._download, extracted, downloaded, workers=self.download_workers)
+
+        finished = False
+
+        try:
+            while True:
+                job = downloaded.get()
+
+                if job is _STOP:
+                    finished = True
+                    break
+
+                try:
+                    if not self._cancelled.is_set():
+                        with job.span.activate():
+                            yield job
+
+                finally:
+                    self._release(job)
+                    job.span.end()
+
+        finally:
+            if not finished:
+                # Consumer has gone. Let the stages wind down.
+                self._cancelled.set()
+
+                while (job := downloaded.get()) is not _STOP:
+                    self._release(job)
+                    job.span.end()
+
+            if self._executor is not None:
+                self._executor.shutdown()
+                self._executor = None
+
+        if self._error is not None:
+            raise self._error
+
+    def _make_queue(self) -> Queue:
+        return Queue(maxsize=self.queue_size)
+
+    def _fail(self, error: Exception):
+        if self._error is None:
+            self._error = error
+
+        self._cancelled.set()
+
+    def _release(self, job: WalkJob):
+        if job.size:
+            self.downloads_budget.release(job.size)
+            job.size = 0
+
+    def _start_stage(self, name: str, handler, source: Queue, target: Queue, *, workers: int):
+        remaining = [workers]
+        lock = Lock()
+
+        def work():
+            try:
+                while True:
+                    job = source.get()
+
+                    if job is _STOP:
+                        # Let sibling workers stop too.
+                        source.put(_STOP)
+                        break
+
+                    if self._cancelled.is_set():
+                        self._release(job)
+                        job.span.end()
+                        continue
+
+                    try:
+                        with (
+                            METRICS.timed('torrt_walk_phase_seconds', phase=name, tracker=job.tracker.alias),
+                            job.span.activate(),
+                        ):
+                            handled = handler(job)
+
+                    except Exception as e:
+                        # E.g. a tracker handler failed on a changed page markup.
+                        # Registered as the page failure not to stop the walk.
+                        LOGGER.debug(f'Stage `{name}` failed for `{job.url}`', exc_info=True)
+                        self._release(job)
+                        self._progress.fail(job, repr(e))
+                        job.span.end()
+                        continue
+
+                    if handled is None:
+                        # The job is done (no updates or a failure).
+                        job.span.end()
+                        continue
+
+                    target.put(handled)
+
+            finally:
+                with lock:
+                    remaining[0] -= 1
+                    last = not remaining[0]
+
+                if last:
+                    target.put(_STOP)
+
+        for idx in range(workers):
+            Thread(target=propagate(work), name=f'torrt-{name}-{idx}', daemon=True).start()
+
+    def _discover(
+            self,
+            *,
+            torrents: dict[str, dict],
+            use_feeds: bool,
+            progress: WalkProgress,
+            target: Queue
+    ):
+        parent_span = get_current_span()
+
+        try:
+            with METRICS.timed('torrt_walk_phase_seconds', phase='rpc_listing', tracker=''):
+                rpc_torrents = get_rpc_torrents(torrents)
+
+            with METRICS.timed('torrt_walk_phase_seconds', phase='discover', tracker=''):
+                jobs = make_walk_jobs(torrents, rpc_torrents, use_feeds=use_feeds, progress=progress)
+
+            # Pages already dispatched are checked even if the budget is exhausted meanwhile.
+            for job in progress.dispatch(jobs):
+
+                if self._cancelled.is_set():
+                    break
+
+                job.span = start_span('topic', parent=parent_span, tracker=job.tracker.alias, **{'url.full': job.url})
+                target.put(job)
+
+        except Exception as e:  # noqa: BLE001
+            self._fail(e)
+
+        finally:
+            target.put(_STOP)
+
+    def _fetch(self, job: WalkJob) -> WalkJob:
+        job.page = job.tracker.get_page(job.url)
+        return job
+
+    def _extract(self, job: WalkJob) -> WalkJob | None:
+        tracker = job.tracker
+        kwargs = {'last_updated': job.last_updated, 'known_hash': job.known_hash}
+
+        page = job.page
+        handled = False
+        result = None
+
+        if self._executor is not None:
+            response = page.response
+
+            if response is not None:
+                handled, result = self._executor.submit(
+                    type(tracker).extract_offline,
+                    tracker.get_settings(),
+                    job.url,
+                    response.content,
+                    headers=dict(response.headers),
+                    encoding=response.encoding,
+                    **kwargs,
+                ).result()
+
+        if not handled:
+            # E.g. a login is required. Falling back to in-process extraction.
+            with tracker.pages.pinned(page):
+                result = tracker.get_torrent_meta(job.url, **kwargs)
+
+        job.page = None
+
+        if result is None:
+            self._progress.fail(job, describe_failure(page))
+            return None
+
+        if result.hash and not result.raw:
+            LOGGER.info(f'  `{job.url}`: No updates')
+            self._progress.succeed(job)
+            return None
+
+        job.result = result
+
+        return job
+
+    def _download(self, job: WalkJob) -> WalkJob | None:
+        result = job.result
+        budget = self.downloads_budget
+
+        # Taken before the download to limit bytes in flight too.
+        job.size = len(result.raw) or self.download_size_estimate
+        budget.acquire(job.size)
+
+        if not result.raw:
+            result = job.tracker.fetch_torrent_file(result)
+
+            if result is None:
+                self._release(job)
+                self._progress.fail(job, 'Unable to download torrent file')
+                return None
+
+            job.result = result
+
+            size = len(result.raw)
+            budget.resize(job.size, size)
+            job.size = size
+
+        return job
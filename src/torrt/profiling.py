@@ -0,0 +1,156 @@
+"""Commands profiling. See `--profile` command line switch.
+
+    cpu - cProfile. Stats are written into a `.pstats` file (may be explored with `python -m pstats`
+          or snakeviz), top functions by cumulative time are logged.
+
+    mem - tracemalloc. Snapshot is written into a `.tracemalloc` file (may be loaded
+          with `tracemalloc.Snapshot.load()`), top allocation sites and peak memory usage are logged.
+
+"""
+import cProfile
+import logging
+import pstats
+import sys
+import threading
+import tracemalloc
+from collections.abc import Generator
+from contextlib import contextmanager
+from io import StringIO
+from pathlib import Path
+from time import strftime
+
+from .exceptions import TorrtException
+
+LOGGER = logging.getLogger(__name__)
+
+PROFILE_KINDS: tuple[str, ...] = ('cpu', 'mem')
+"""Supported profiling kinds."""
+
+PROFILE_PER_THREAD: bool = sys.version_info < (3, 12)
+"""Whether a profiler is to be started in every thread. Since 3.12 cProfile
+uses sys.monitoring: one profiler sees all threads, and no other one may be enabled.
+
+"""
+
+
+def make_profile_path(kind: str, *, name: str, into: Path | None = None) -> Path:
+    """Returns a path of a file to put profiling results into.
+
+    :param kind: cpu, mem
+    :param name: file name prefix, e.g. command name
+    :param into: directory. Defaults to the current one.
+
+    """
+    suffix = '.pstats' if kind == 'cpu' else '.tracemalloc'
+    return (into or Path.cwd()) / f"torrt_{name}_{strftime('%Y%m%d_%H%M%S')}{suffix}"
+
+
+@contextmanager
+def profiled(
+        kind: str,
+        *,
+        name: str = 'profile',
+        into: Path | None = None,
+        top: int = 25
+) -> Generator[Path, None, None]:
+    """Context manager profiling the code inside it.
+    Yields a path of a file with profiling results, written on exit.
+
+    :param kind: cpu, mem
+    :param name: results file name prefix, e.g. command name
+    :param into: directory to put results file into. Defaults to the current one.
+    :param top: number of entries (functions, allocation sites) to be logged
+
+    """
+    if kind not in PROFILE_KINDS:
+        raise TorrtException(f'Unsupported profile kind: {kind}')
+
+    path = make_profile_path(kind, name=name, into=into)
+
+    if kind == 'cpu':
+        with profiled_cpu(path, top=top):
+            yield path
+
+    else:
+        with profiled_mem(path, top=top):
+            yield path
+
+
+@contextmanager
+def profiled_cpu(path: Path, *, top: int = 25) -> Generator[None, None, None]:
+    """Profiles CPU usage with cProfile. Threads started inside are also profiled.
+
+    :param path: .pstats file path
+    :param top: number of functions to be logged
+
+    """
+    profilers = [cProfile.Profile()]
+
+    def profile_thread(*args):
+        # Called on the first profiling event of a new thread,
+        # the thread profiler enabled replaces this function.
+        profiler = cProfile.Profile()
+        profilers.append(profiler)
+        profiler.enable()
+
+    per_thread = PROFILE_PER_THREAD
+
+    if per_thread:
+        threading.setprofile(profile_thread)
+
+    profilers[0].enable()
+
+    try:
+        yield
+
+    finally:
+        profilers[0].disable()
+
+        if per_thread:
+            threading.setprofile(None)
+
+        output = StringIO()
+        stats = pstats.Stats(*profilers, stream=output)
+        stats.dump_stats(path)
+        stats.sort_stats(pstats.SortKey.CUMULATIVE).print_stats(top)
+
+        LOGGER.info(f'CPU profile is written into {path}\n{output.getvalue()}')
+
+
+@contextmanager
+def profiled_mem(path: Path, *, top: int = 25) -> Generator[None, None, None]:
+    """Profiles memory allocations with tracemalloc.
+
+    :param path: snapshot file path
+    :param top: number of allocation sites to be logged
+
+    """
+    tracing = tracemalloc.is_tracing()
+
+    if not tracing:
+        tracemalloc.start()
+
+    tracemalloc.reset_peak()
+
+    try:
+        yield
+
+    finally:
+        snapshot = tracemalloc.take_snapshot()
+        current, peak = tracemalloc.get_traced_memory()
+
+        if not tracing:
+            tracemalloc.stop()
+
+        snapshot = snapshot.filter_traces([
+            tracemalloc.Filter(inclusive=False, filename_pattern=tracemalloc.__file__),
+        ])
+        snapshot.dump(f'{path}')
+
+        lines = [
+            f'Memory profile is written into {path}',
+            f'Current: {current / 1024:.1f} KiB, peak: {peak / 1024:.1f} KiB. Top allocation sites:',
+        ]
+        lines.extend(f'  {stat}' for stat in snapshot.statistics('lineno')[:top])
+
+        LOGGER.info('\n'.join(lines))
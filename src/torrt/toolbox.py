@@ -1,15 +1,18 @@
 import logging
 import sys
-from datetime import datetime
 from time import time
 from typing import TYPE_CHECKING, Optional
 
 from .base_bot import BotRegistrationFailed
-from .base_tracker import GenericPrivateTracker
+from .base_tracker import FastPathHits, GenericPrivateTracker
+from .context import run_context
 from .exceptions import TorrtException, TorrtRPCException
+from .metrics import METRICS
+from .pipeline import WalkPipeline, WalkProgress
+from .tracing import TRACER, span
 from .utils import (
-    DATETIME_FORMAT,
     BotClassesRegistry,
+    HttpClient,
     NotifierClassesRegistry,
     RPCClassesRegistry,
     TorrentData,
@@ -18,7 +21,6 @@ from .utils import (
     configure_entity,
     get_iso_from_timestamp,
     get_torrent_from_url,
-    get_url_from_string,
     import_classes,
     iter_bots,
     iter_notifiers,
@@ -39,12 +41,18 @@ if TYPE_CHECKING:
     from .base_notifier import BaseNotifier
     from .base_rpc import BaseRPC
     from .base_tracker import BaseTracker
+    from .pipeline import WalkJob
 
 LOGGER = logging.getLogger(__name__)
 
 
 def tunnel():
-    """Try to setup a tunnel for requests."""
+    """Try to setup a tunnel for requests.
+
+    Proxies are set for HTTP clients (see HttpClient.proxies),
+    process environment is not modified.
+
+    """
     tunnel_through = environ.get('TORRT_TUNNEL')
 
     if tunnel_through:
@@ -54,8 +62,7 @@ def tunnel():
             tunnel_through = 'socks5://127.0.0.1:9150'
 
         # Instruct `requests` https://requests.readthedocs.io/en/master/user/advanced/#socks
-        environ['HTTP_PROXY'] = tunnel_through
-        environ['HTTPS_PROXY'] = tunnel_through
+        HttpClient.proxies = {'http': tunnel_through, 'https': tunnel_through}
 
 
 tunnel()
@@ -194,12 +201,42 @@ def init_object_registries():
         tracker_cls.spawn_with_settings(settings or {}).register()
 
 
-def get_registered_torrents() -> dict:
+def get_failing_torrents() -> dict[str, dict]:
+    """Returns hash-indexed dictionary with information on registered torrents
+    failed to be checked for updates during previous walks.
+
+    """
+    cfg = config.load()
+    progress = make_walk_progress(cfg)
+
+    failing = {}
+
+    for hash_str, failure in cfg['torrents_failures'].items():
+        torrent = cfg['torrents'].get(hash_str)
+
+        if torrent is None:
+            continue
+
+        failing[hash_str] = {
+            **failure,
+            'name': torrent['name'],
+            'url': torrent['url'],
+            'dormant': progress.is_dormant(hash_str),
+            'time_next_check': progress.get_time_next_check(hash_str),
+        }
+
+    return failing
+
+
+def get_registered_torrents(*, cached: bool = False) -> dict:
     """Returns hash-indexed dictionary with information on torrents
     registered for updates.
 
+    :param cached: flag to return a dictionary shared between calls (it should not be modified),
+        so that configuration file is not re-read if it is not changed. Useful for long-running processes.
+
     """
-    return config.load()['torrents']
+    return (config.load_cached() if cached else config.load())['torrents']
 
 
 def bootstrap():
@@ -238,6 +275,9 @@ def register_torrent(hash_str: str, *, torrent_data: TorrentData = None, url: st
     structure_torrent_data(cfg['torrents'], hash_str, torrent_data)
     config.update(cfg)
 
+    # Registering again revives torrents failed to be checked.
+    config.drop_section('torrents_failures', hash_str)
+
 
 def unregister_torrent(hash_str: str):
     """Unregisters torrent from torrt. That doesn't remove torrent
@@ -249,10 +289,12 @@ def unregister_torrent(hash_str: str):
     LOGGER.debug(f'Unregistering `{hash_str}` torrent ...')
 
     config.drop_section('torrents', hash_str)
+    config.drop_section('torrents_failures', hash_str)
 
 
-def add_torrent_from_url(url: str, *, download_to: str = '', params: dict | None = None):
-    """Adds torrent from a given URL to torrt and torrent clients,
+def add_torrent_from_url(url: str, *, download_to: str = '', params: dict | None = None) -> TorrentData | None:
+    """Adds torrent from a given URL to torrt and torrent clients.
+    Returns torrent data or None if torrent can not be got.
 
     :param url: torrent URL
     :param download_to: path to download files from torrent into (in terms of torrent client filesystem)
@@ -265,7 +307,7 @@ def add_torrent_from_url(url: str, *, download_to: str = '', params: dict | None
 
     if torrent_data is None:
         LOGGER.error(f'Unable to add torrent from `{url}`')
-        return
+        return None
 
     torrent_data.set_params(params)
 
@@ -275,6 +317,8 @@ def add_torrent_from_url(url: str, *, download_to: str = '', params: dict | None
 
         LOGGER.info(f'Torrent from `{url}` is added within `{rpc_alias}`')
 
+    return torrent_data
+
 
 def remove_torrent(hash_str: str, *, with_data: bool = False):
     """Removes torrent by its hash from torrt and torrent clients,
@@ -319,146 +363,261 @@ def toggle_rpc(alias: str, *, enabled: bool = True):
         LOGGER.info(f'RPC `{alias}` class is not registered')
 
 
-def walk(*, forced: bool = False, silent: bool = False, remove_outdated: bool = True):
-    """Performs updates check for the registered torrents.
+def start_walk(*, forced: bool = False) -> tuple[dict, int, bool] | None:
+    """Checks whether a walk is due. Returns a tuple (settings, walk timestamp, full check flag)
+    if the walk should be performed or None if it is postponed.
 
     :param forced: flag not to count walk interval setting
-    :param silent: flag to suppress possible torrt exceptions
-    :param remove_outdated: flag to remove torrents that are superseded by a new ones
 
     """
-    LOGGER.info('Torrent walk is triggered')
-
     now = int(time())
     cfg = config.load()
 
     next_time = cfg['time_last_check'] + (cfg['walk_interval_hours'] * 3600)
 
-    if forced or now >= next_time:
-        LOGGER.info('Torrent walk is started')
+    if not forced and now < next_time:
+        LOGGER.info(
+            'Torrent walk postponed '
+            f'till {get_iso_from_timestamp(next_time)} '
+            f'(now {get_iso_from_timestamp(now)})'
+        )
+        return None
 
-        updated = {}
+    LOGGER.info('Torrent walk is started')
 
-        try:
-            updated = update_torrents(cfg['torrents'], remove_outdated=remove_outdated)
+    # Metrics are exported per walk.
+    METRICS.reset()
 
-        except TorrtException as e:
-            if not silent:
-                raise
+    # Trackers feeds are used to skip unchanged torrents,
+    # yet a full check is performed from time to time as a safety net.
+    full_check = now >= cfg['time_last_full_check'] + (cfg['full_check_interval_hours'] * 3600)
 
-            LOGGER.error(f'Walk failed. Reason: {e}')
+    if full_check:
+        LOGGER.info('Full check is performed')
+
+    return cfg, now, full_check
 
-        new_cfg = {
-            'time_last_check': now
-        }
 
-        if updated:
+def make_walk_progress(cfg: dict, *, budget: int = 0) -> WalkProgress:
+    """Returns walk progress object initialized from settings.
 
-            for old_hash, new_data in updated.items():
+    :param cfg: settings
+    :param budget: walk time budget in seconds. 0 - no limit.
 
-                try:
-                    cfg['torrents'].pop(old_hash)
+    """
+    return WalkProgress(
+        cursor=cfg['walk_cursor'],
+        budget=budget,
+        failures=cfg['torrents_failures'],
+        backoff=int(cfg['failures_backoff_hours'] * 3600),
+        dormant_threshold=cfg['failures_dormant_threshold'],
+    )
+
+
+def finish_walk(
+        cfg: dict,
+        updated: dict[str, dict],
+        *,
+        now: int,
+        full_check: bool,
+        progress: WalkProgress | None = None
+):
+    """Saves walk results into configuration and sends notifications.
+
+    :param cfg: settings got from start_walk()
+    :param updated: information on updated torrents (see update_torrents())
+    :param now: walk timestamp
+    :param full_check: whether all torrents were checked
+    :param progress: walk progress to save the cursor from
 
-                except KeyError:
-                    # May be already deleted by `update_torrents` if `remove_outdated` is used.
-                    pass
+    """
+    new_cfg = {
+        'time_last_check': now
+    }
 
-                cfg['torrents'][new_data['hash']] = new_data
+    if progress is not None:
+        new_cfg['walk_cursor'] = progress.cursor
 
-            new_cfg['torrents'] = cfg['torrents']
+        # Full check is only counted if the round was completed.
+        full_check = full_check and progress.complete
 
-            for _, notifier in iter_notifiers():
-                notifier.send(updated)
+        failures = {}
 
-        # Save updated torrents data into config.
-        config.update(new_cfg)
+        for hash_str, error in progress.failed.items():
+            count = progress.failures.get(hash_str, {}).get('count', 0) + 1
+            failures[hash_str] = {'count': count, 'time_last': now, 'error': error}
 
-        LOGGER.info('Torrent walk is finished')
+            if count == progress.dormant_threshold:
+                LOGGER.warning(f'Torrent `{hash_str}` failed {count} times in a row and will not be checked anymore')
 
-    else:
-        LOGGER.info(
-            'Torrent walk postponed '
-            f'till {get_iso_from_timestamp(next_time)} '
-            f'(now {get_iso_from_timestamp(now)})'
-        )
+        if failures:
+            new_cfg['torrents_failures'] = failures
+
+        for hash_str in progress.recovered.difference(progress.failed):
+            config.drop_section('torrents_failures', hash_str)
+
+    if full_check:
+        new_cfg['time_last_full_check'] = now
+
+    if updated:
+        # Outdated torrents are already unregistered. Only new ones are saved
+        # not to overwrite registry changes made meanwhile (e.g. by other processes).
+        new_cfg['torrents'] = {new_data['hash']: new_data for new_data in updated.values()}
 
+        for _, notifier in iter_notifiers():
+            notifier.send(updated)
 
-def update_torrents(torrents: dict[str, dict], *, remove_outdated: bool = True) -> dict[str, dict]:
+    # Save updated torrents data into config.
+    config.update(new_cfg)
+
+    METRICS.set('torrt_walk_last_timestamp_seconds', now)
+    METRICS.set('torrt_walk_seconds', round(time() - now, 3))
+    METRICS.increment('torrt_walk_torrents_total', len(updated), result='updated')
+
+    if progress is not None:
+        METRICS.increment('torrt_walk_torrents_total', len(progress.failed), result='failed')
+
+    metrics = cfg['metrics']
+    METRICS.export(textfile=metrics.get('textfile', ''), summary=metrics.get('summary', ''))
+    TRACER.flush()
+
+    for (tracker_alias, extractor), rate in FastPathHits.get_rates().items():
+        LOGGER.debug(f'Fast path `{extractor}` hit rate for `{tracker_alias}`: {rate:.0%}')
+
+
+def walk(*, forced: bool = False, silent: bool = False, remove_outdated: bool = True, budget: int = 0):
+    """Performs updates check for the registered torrents.
+
+    Torrents are checked in a round-robin order. If the walk is limited in time
+    or interrupted, the next one resumes where it stopped.
+
+    :param forced: flag not to count walk interval setting
+    :param silent: flag to suppress possible torrt exceptions
+    :param remove_outdated: flag to remove torrents that are superseded by a new ones
+    :param budget: walk time budget in seconds. 0 - no limit.
+
+    """
+    LOGGER.info('Torrent walk is triggered')
+
+    started = start_walk(forced=forced)
+
+    if started is None:
+        return
+
+    cfg, now, full_check = started
+    progress = make_walk_progress(cfg, budget=budget)
+
+    # Settings changed during the walk (e.g. trackers auth data on login)
+    # are written into configuration file at once in the end.
+    with config.deferred():
+
+        try:
+            # Walk state (see RunContext.get()) is dropped afterwards.
+            with run_context(), span('walk', budget=budget, full_check=full_check):
+                update_torrents(
+                    cfg['torrents'],
+                    remove_outdated=remove_outdated,
+                    use_feeds=not full_check,
+                    pipeline=cfg['walk_pipeline'],
+                    progress=progress,
+                )
+
+        except TorrtException as e:
+            if not silent:
+                raise
+
+            LOGGER.error(f'Walk failed. Reason: {e}')
+
+        finally:
+            # Partial results are saved even if the walk has failed.
+            finish_walk(cfg, progress.updated, now=now, full_check=full_check, progress=progress)
+
+    LOGGER.info('Torrent walk is finished')
+
+
+def update_torrents(
+        torrents: dict[str, dict],
+        *,
+        remove_outdated: bool = True,
+        use_feeds: bool = False,
+        pipeline: dict | None = None,
+        progress: WalkProgress | None = None
+) -> dict[str, dict]:
     """Performs torrent updates.
     Returns hash-indexed dictionary with information on updated torrents
 
     :param torrents: torrents data indexed with hashes
     :param remove_outdated: flag to remove outdated torrents from torrent clients
+    :param use_feeds: flag to check only those torrents which are listed in trackers feeds
+        of recently updated torrents (for trackers having such feeds)
+    :param pipeline: walk pipeline settings (stages concurrency, etc.). See WalkPipeline.
+    :param progress: walk progress to limit the walk in time and to resume from.
+        Updated torrents information is collected into it as soon as they are updated.
 
     """
-    updated_by_hashes = {}
-    download_cache: dict[str, TorrentData] = {}
-    hashes = list(torrents)
+    if progress is None:
+        progress = WalkProgress()
 
-    for _, rpc_object in iter_rpc():
+    updated_by_hashes = progress.updated
 
-        LOGGER.info(f'Getting torrents from `{rpc_object.alias}` ...')
-        rpc_torrents = rpc_object.method_get_torrents(hashes)
+    for job in WalkPipeline.from_settings(pipeline).run(torrents, use_feeds=use_feeds, progress=progress):
+        progress.succeed(job)
 
-        if not rpc_torrents:
-            LOGGER.info('  No relevant torrents found')
+        with METRICS.timed('torrt_walk_phase_seconds', phase='apply', tracker=job.tracker.alias):
+            outdated = apply_walk_job(job, remove_outdated=remove_outdated, updated=updated_by_hashes)
 
-        for rpc_torrent in rpc_torrents:
-            LOGGER.info(f"  Processing `{rpc_torrent['name']}`...")
+        for hash_str in outdated:
+            unregister_torrent(hash_str)
 
-            page_url = get_url_from_string(rpc_torrent['comment'])
-            if not page_url:
-                page_url = torrents[rpc_torrent['hash']].get('url', None) if torrents else None
+    return updated_by_hashes
 
-            if not page_url:
-                LOGGER.warning(f"    Torrent `{rpc_torrent['name']}` has no link in comment. Skipped")
-                continue
 
-            if page_url in download_cache:
-                tracker_torrent = download_cache[page_url]
+def apply_walk_job(job: 'WalkJob', *, remove_outdated: bool = True, updated: dict[str, dict]) -> list[str]:
+    """Replaces torrents in torrent clients with the one got from a tracker
+    if it differs from the current one. Returns hashes of replaced (outdated) torrents
+    to be unregistered. Torrents registry is not changed here.
 
-            else:
-                raw_last_updated = torrents[rpc_torrent['hash']]['page'].get('date_updated')
-                last_updated = (
-                    datetime.strptime(raw_last_updated, DATETIME_FORMAT)  # noqa: DTZ007
-                    if raw_last_updated
-                    else None
-                )
-                tracker_torrent = get_torrent_from_url(page_url, last_updated)
-                download_cache[page_url] = tracker_torrent
+    :param job: walk job with a downloaded torrent (see WalkPipeline.run())
+    :param remove_outdated: flag to remove outdated torrents from torrent clients
+    :param updated: dictionary to put information on updated torrents into (see update_torrents())
 
-            if tracker_torrent is None:
-                LOGGER.error(f'    Unable to get torrent from `{page_url}`')
-                continue
+    """
+    tracker_torrent = job.result
+    page_url = job.url
+    outdated = []
 
-            if rpc_torrent['hash'] == tracker_torrent.hash:
-                LOGGER.info('    No updates')
-                continue
+    for rpc_object, rpc_torrent in job.torrents:
+        LOGGER.info(f"  Processing `{rpc_torrent['name']}`...")
 
-            LOGGER.debug('    Update is available')
+        if rpc_torrent['hash'] == tracker_torrent.hash:
+            LOGGER.info('    No updates')
+            continue
 
-            try:
-                rpc_object.method_add_torrent(
-                    tracker_torrent,
-                    download_to=rpc_torrent['download_to'],
-                    params=rpc_torrent.get('params', None)
-                )
-                tracker_torrent.url = page_url
+        LOGGER.debug('    Update is available')
 
-                LOGGER.info('    Torrent is updated')
+        try:
+            rpc_object.method_add_torrent(
+                tracker_torrent,
+                download_to=rpc_torrent['download_to'],
+                params=rpc_torrent.get('params', None)
+            )
+            tracker_torrent.url = page_url
 
-                structure_torrent_data(updated_by_hashes, rpc_torrent['hash'], tracker_torrent)
+            LOGGER.info('    Torrent is updated')
 
-            except TorrtRPCException as e:
-                LOGGER.error(f'    Unable to replace torrent: {e}')
+            structure_torrent_data(updated, rpc_torrent['hash'], tracker_torrent)
+            job.span.set(updated=True)
 
-            else:
-                unregister_torrent(rpc_torrent['hash'])
+        except TorrtRPCException as e:
+            LOGGER.error(f'    Unable to replace torrent: {e}')
 
-                if remove_outdated:
-                    rpc_object.method_remove_torrent(rpc_torrent['hash'])
+        else:
+            outdated.append(rpc_torrent['hash'])
 
-    return updated_by_hashes
+            if remove_outdated:
+                rpc_object.method_remove_torrent(rpc_torrent['hash'])
+
+    return outdated
 
 
 def run_bots(aliases: list[str] | None = None):
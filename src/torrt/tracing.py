@@ -0,0 +1,346 @@
+"""Lightweight tracing.
+
+Walk operations are recorded as nested spans, e.g.:
+
+    walk -> topic -> get_page -> http.request
+                  -> rpc.method_add_torrent
+
+Finished spans are written into a file as newline-delimited JSON,
+every line is an OpenTelemetry (OTLP/JSON) ExportTraceServiceRequest,
+so the file can be read by OpenTelemetry Collector (`otlpjsonfile` receiver)
+and other tools supporting the format.
+
+Tracing is disabled by default. When disabled, span() returns a shared no-op object.
+
+"""
+import json
+import logging
+from collections.abc import Callable
+from contextvars import ContextVar, Token
+from functools import wraps
+from os import urandom
+from pathlib import Path
+from threading import Lock
+from time import time_ns
+from typing import Any, Self
+
+LOGGER = logging.getLogger(__name__)
+
+_CURRENT_SPAN: ContextVar['Span | None'] = ContextVar('torrt_span', default=None)
+
+
+class Span:
+    """Represents an operation. Used as a context manager making the span current."""
+
+    __slots__ = ['_token', 'attributes', 'end_time', 'error', 'name', 'parent_id', 'span_id', 'start_time', 'trace_id']
+
+    def __init__(self, name: str, *, parent: 'Span | None' = None, attributes: dict[str, Any] | None = None):
+        """
+        :param name: operation name
+        :param parent: parent span. If not set, a new trace is started.
+        :param attributes: span attributes
+
+        """
+        self.name = name
+        self.trace_id = parent.trace_id if parent else urandom(16).hex()
+        self.span_id = urandom(8).hex()
+        self.parent_id = parent.span_id if parent else ''
+        self.attributes = attributes or {}
+        self.error = ''
+        self.start_time = time_ns()
+        self.end_time = 0
+        self._token: Token | None = None
+
+    def __enter__(self) -> Self:
+        self._token = _CURRENT_SPAN.set(self)
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        _CURRENT_SPAN.reset(self._token)
+
+        if exc_val is not None:
+            self.record_error(exc_val)
+
+        self.end()
+
+    def set(self, **attributes: Any):
+        """Sets span attributes.
+
+        :param attributes: attributes values (str, int, float or bool)
+            indexed by names, e.g. http.response.status_code
+
+        """
+        self.attributes.update(attributes)
+
+    def record_error(self, error: Exception | str):
+        """Marks the span as failed.
+
+        :param error: exception or error description
+
+        """
+        self.error = f'{error!r}' if isinstance(error, Exception) else error
+
+    def end(self):
+        """Finishes the span and passes it to the exporter. Subsequent calls are ignored."""
+
+        if not self.end_time:
+            self.end_time = time_ns()
+            exporter = TRACER.exporter
+
+            if exporter is not None:
+                exporter.add(self)
+
+    def activate(self) -> 'SpanActivation':
+        """Returns a context manager making the span current without ending it on exit.
+        Useful to continue a span in other threads.
+
+        """
+        return SpanActivation(self)
+
+    def to_dict(self) -> dict:
+        """Returns OTLP/JSON span representation."""
+
+        span = {
+            'traceId': self.trace_id,
+            'spanId': self.span_id,
+            'name': self.name,
+            'kind': 1,  # Internal.
+            'startTimeUnixNano': f'{self.start_time}',
+            'endTimeUnixNano': f'{self.end_time}',
+            'attributes': [
+                {'key': key, 'value': make_value(value)} for key, value in self.attributes.items()
+            ],
+            'status': {'code': 2, 'message': self.error} if self.error else {'code': 1},
+        }
+
+        if self.parent_id:
+            span['parentSpanId'] = self.parent_id
+
+        return span
+
+
+class SpanActivation:
+    """Context manager making a span current. See Span.activate()."""
+
+    __slots__ = ['_token', 'span']
+
+    def __init__(self, span: Span):
+        self.span = span
+        self._token: Token | None = None
+
+    def __enter__(self) -> Span:
+        self._token = _CURRENT_SPAN.set(self.span)
+        return self.span
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        _CURRENT_SPAN.reset(self._token)
+
+
+class NoopSpan:
+    """Span used when tracing is disabled. Does nothing."""
+
+    __slots__ = []
+
+    def __enter__(self) -> Self:
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        pass
+
+    def set(self, **attributes: Any):
+        pass
+
+    def record_error(self, error: Exception | str):
+        pass
+
+    def end(self):
+        pass
+
+    def activate(self) -> Self:
+        return self
+
+
+NOOP_SPAN = NoopSpan()
+
+
+def make_value(value: Any) -> dict:
+    """Returns OTLP/JSON attribute value representation.
+
+    :param value:
+
+    """
+    if isinstance(value, bool):
+        return {'boolValue': value}
+
+    if isinstance(value, int):
+        # 64-bit integers are represented as strings.
+        return {'intValue': f'{value}'}
+
+    if isinstance(value, float):
+        return {'doubleValue': value}
+
+    return {'stringValue': f'{value}'}
+
+
+class FileExporter:
+    """Writes finished spans into a file as newline-delimited OTLP/JSON."""
+
+    batch_size: int = 256
+    """Number of spans to be written at once."""
+
+    def __init__(self, path: str | Path, *, service: str = 'torrt'):
+        """
+        :param path: file path to append spans to
+        :param service: service name put into resource attributes
+
+        """
+        self.path = Path(path)
+        self.service = service
+        self._spans: list[Span] = []
+        self._lock = Lock()
+
+    def add(self, span: Span):
+        """Adds a finished span to be written.
+
+        :param span:
+
+        """
+        with self._lock:
+            self._spans.append(span)
+
+            if len(self._spans) < self.batch_size:
+                return
+
+            spans, self._spans = self._spans, []
+
+        self.write(spans)
+
+    def flush(self):
+        """Writes pending spans."""
+
+        with self._lock:
+            spans, self._spans = self._spans, []
+
+        if spans:
+            self.write(spans)
+
+    def write(self, spans: list[Span]):
+        """Writes spans as one line.
+
+        :param spans:
+
+        """
+        line = json.dumps({'resourceSpans': [{
+            'resource': {'attributes': [{'key': 'service.name', 'value': {'stringValue': self.service}}]},
+            'scopeSpans': [{
+                'scope': {'name': 'torrt'},
+                'spans': [span.to_dict() for span in spans],
+            }],
+        }]})
+
+        with self._lock, self.path.open('a') as f:
+            f.write(f'{line}\n')
+
+
+class Tracer:
+    """Creates spans if tracing is enabled."""
+
+    def __init__(self):
+        self.enabled = False
+        self.exporter: FileExporter | None = None
+
+    def enable(self, path: str | Path):
+        """Enables tracing with spans written into a given file.
+
+        :param path: file path to append spans to
+
+        """
+        LOGGER.debug(f'Tracing into {path} ...')
+
+        self.exporter = FileExporter(path)
+        self.enabled = True
+
+    def disable(self):
+        """Disables tracing writing pending spans."""
+
+        exporter = self.exporter
+
+        self.enabled = False
+        self.exporter = None
+
+        if exporter is not None:
+            exporter.flush()
+
+    def flush(self):
+        """Writes pending spans."""
+
+        exporter = self.exporter
+
+        if exporter is not None:
+            exporter.flush()
+
+
+TRACER = Tracer()
+"""Global tracer."""
+
+
+def span(name: str, **attributes: Any) -> Span | NoopSpan:
+    """Returns a span being a child of the current span.
+    Should be used as a context manager.
+
+    :param name: operation name
+    :param attributes: span attributes
+
+    """
+    if not TRACER.enabled:
+        return NOOP_SPAN
+
+    return Span(name, parent=_CURRENT_SPAN.get(), attributes=attributes)
+
+
+def start_span(name: str, *, parent: Span | NoopSpan | None = None, **attributes: Any) -> Span | NoopSpan:
+    """Returns a span not bound to the current context,
+    e.g. to be continued in other threads (see Span.activate()) and ended explicitly (see Span.end()).
+
+    :param name: operation name
+    :param parent: parent span. Defaults to the current span.
+    :param attributes: span attributes
+
+    """
+    if not TRACER.enabled:
+        return NOOP_SPAN
+
+    if parent is None:
+        parent = _CURRENT_SPAN.get()
+
+    return Span(name, parent=parent if isinstance(parent, Span) else None, attributes=attributes)
+
+
+def get_current_span() -> Span | NoopSpan:
+    """Returns the current span."""
+    return _CURRENT_SPAN.get() or NOOP_SPAN
+
+
+def traced_method(name: str, **attributes: str | Callable[[Any], Any]) -> Callable:
+    """Decorator running a method inside a span.
+
+    :param name: operation name
+    :param attributes: attribute values or functions returning attribute values for a given object (self)
+
+    """
+    def decorator(func: Callable) -> Callable:
+
+        @wraps(func)
+        def wrapper(self, *args, **kwargs):
+            if not TRACER.enabled:
+                return func(self, *args, **kwargs)
+
+            with span(name, **{
+                key: value(self) if callable(value) else value for key, value in attributes.items()
+            }):
+                return func(self, *args, **kwargs)
+
+        wrapper.traced = True
+        return wrapper
+
+    return decorator
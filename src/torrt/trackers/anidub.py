@@ -16,12 +16,17 @@ class AniDUBTracker(GenericPrivateTracker):
             username: str = '',
             password: str = '',
             cookies: dict[str, str] | None = None,
+            cookies_expires: dict[str, int] | None = None,
             query_string: str = '',
             quality_prefs: list[str] | None = None,
             **kwargs
     ):
         super().__init__(
-            username=username, password=password, cookies=cookies, query_string=query_string
+            username=username,
+            password=password,
+            cookies=cookies,
+            cookies_expires=cookies_expires,
+            query_string=query_string,
         )
 
         if quality_prefs is None:
@@ -44,12 +49,12 @@ class AniDUBTracker(GenericPrivateTracker):
             self.log_debug('Login is required to download torrent file.')
             domain = self.extract_domain(url)
 
-            if self.login(domain):
-                download_link = self.get_download_link(url)
-
-        else:
+            if not self.login(domain):
+                return download_link
 
+            page_soup = self.get_torrent_page(url, drop_cache=True)
 
+        if not page_soup.select('form input[name="login"]'):
 
             quality_divs = page_soup.select('div.torrent > div.torrent_c > div')
 
@@ -1,6 +1,6 @@
 from typing import ClassVar
 
-from ..base_tracker import GenericPrivateTracker
+from ..base_tracker import GenericPrivateTracker, SoupStrainer
 
 
 class CasstudioTracker(GenericPrivateTracker):
@@ -11,6 +11,7 @@ class CasstudioTracker(GenericPrivateTracker):
     auth_cookie_name: str = 'phpbb3_lawmj_sid'
     auth_qs_param_name: str = 'mode'
     mirrors: ClassVar[list[str]] = ['casstudio.tk']
+    page_parse_only: ClassVar[SoupStrainer] = SoupStrainer(['a', 'title'])
 
     test_urls: ClassVar[list[str]] = ['https://casstudio.tv/viewtopic.php?t=1222']
 
@@ -22,7 +23,7 @@ class CasstudioTracker(GenericPrivateTracker):
         sid = soup_response.find(attrs={'name': 'sid'}).get('value')
 
         self.cookies = index_page.cookies
-        self.login_url += f'&sid={sid}'
+        self.login_url = f'{type(self).login_url}&sid={sid}'
 
         result = {
             'username': login,
@@ -45,7 +46,6 @@ class CasstudioTracker(GenericPrivateTracker):
 
         if not self.logged_in or is_anonymous:
 
-            self.logged_in = False
             self.login(domain)
 
             page_soup = self.get_torrent_page(url, drop_cache=True)
@@ -1,6 +1,7 @@
+import re
 from typing import ClassVar
 
-from ..base_tracker import GenericPrivateTracker
+from ..base_tracker import GenericPrivateTracker, SoupStrainer
 
 
 class EniaHDTracker(GenericPrivateTracker):
@@ -10,6 +11,13 @@ class EniaHDTracker(GenericPrivateTracker):
     login_url: str = 'https://%(domain)s/login.php'
     auth_cookie_name: str = 'bb_data'
     mirrors: ClassVar[list[str]] = ['eniahd.com', 'eniatv.com']
+    info_hash_on_page: bool = True
+    page_parse_only: ClassVar[SoupStrainer] = SoupStrainer(['a', 'var', 'title'])
+    fast_extractors: ClassVar[dict[str, re.Pattern[bytes]]] = {
+        **GenericPrivateTracker.fast_extractors,
+        'download_link': re.compile(rb'href=["\'](?P<value>[^"\']*dl\.php\?id=\d+)["\']'),
+        'cover': re.compile(rb'<var\s+class="postImg[^"]*"\s+title="(?P<value>[^"]+)"'),
+    }
 
     test_urls: ClassVar[list[str]] = [
         'https://eniatv.com/viewtopic.php?t=1558',
@@ -19,18 +27,28 @@ class EniaHDTracker(GenericPrivateTracker):
         """Returns a dictionary with data to be pushed to authorization form."""
         return {'login_username': login, 'login_password': password, 'autologin': 1, 'redirect': '', 'login': 'Вход'}
 
-    def extract_page_cover(self) -> str:
-        attrs = getattr(self._torrent_page.select_one('var.postImg'), 'attrs', {})
+    def extract_page_cover(self, url: str) -> str:
+        cover = self.extract_fast('cover', url)
+
+        if cover:
+            return cover
+
+        attrs = getattr(self.get_torrent_page(url).select_one('var.postImg'), 'attrs', {})
         title = attrs.get('title')
 
         if not title:
-            return super().extract_page_cover()
+            return super().extract_page_cover(url)
 
         return title
 
     def get_download_link(self, url: str) -> str:
         """Tries to find .torrent file download link at forum thread page and return that one."""
 
+        download_link = self.extract_fast('download_link', url)
+
+        if download_link:
+            return self.expand_link(url, download_link)
+
         page_soup = self.get_torrent_page(url)
 
         download_link = self.find_links(url, page_soup, definite=r'dl\.php')
@@ -41,6 +59,7 @@ class EniaHDTracker(GenericPrivateTracker):
             domain = self.extract_domain(url)
 
             if self.login(domain):
-                download_link = self.get_download_link(url)
+                page_soup = self.get_torrent_page(url, drop_cache=True)
+                download_link = self.find_links(url, page_soup, definite=r'dl\.php')
 
         return download_link or ''
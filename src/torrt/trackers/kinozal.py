@@ -1,9 +1,9 @@
+import re
 from datetime import datetime
 from typing import ClassVar
 
-import dateparser
-
-from ..base_tracker import GenericPrivateTracker
+from ..base_tracker import GenericPrivateTracker, SoupStrainer
+from ..dates import parse_human_datetime
 
 
 class KinozalTracker(GenericPrivateTracker):
@@ -14,6 +14,12 @@ class KinozalTracker(GenericPrivateTracker):
     auth_cookie_name: str = 'uid'
     mirrors: ClassVar[list[str]] = ['kinozal-tv.appspot.com', 'kinozal.me']
     encoding: str = 'cp1251'
+    page_parse_only: ClassVar[SoupStrainer] = SoupStrainer(['a', 'li', 'title'])
+    fast_extractors: ClassVar[dict[str, re.Pattern[bytes]]] = {
+        **GenericPrivateTracker.fast_extractors,
+        'download_link': re.compile(rb'href=["\'](?P<value>[^"\']*/download[^"\']*=\d+)["\']'),
+        'date_updated': re.compile('Обновлен'.encode(encoding) + rb'<span[^>]*>(?P<value>[^<]+)<'),
+    }
 
     def get_login_form_data(self, login: str, password: str) -> dict:
         """Returns a dictionary with data to be pushed to authorization form."""
@@ -23,19 +29,30 @@ class KinozalTracker(GenericPrivateTracker):
         """Returns forum thread identifier from full thread URL."""
         return url.split('=')[1]
 
-    def extract_page_date_updated(self) -> datetime | None:
+    def extract_page_date_updated(self, url: str) -> datetime | None:
         def refresh_in_text(tag):
             return tag.name == 'li' and tag.get_text().startswith('Обновлен')
 
-        dt_val = getattr(self._torrent_page.find(refresh_in_text).find('span'), 'text', '').strip()
-        return dateparser.parse(dt_val, languages=['ru'])
+        dt_val = self.extract_fast('date_updated', url)
+
+        if dt_val is None:
+            dt_val = getattr(self.get_torrent_page(url).find(refresh_in_text).find('span'), 'text', '').strip()
+
+        return parse_human_datetime(dt_val)
 
     def get_download_link(self, url: str) -> str:
         """Tries to find .torrent file download link at forum thread page and return that one."""
 
+        topic_id = self.get_id_from_link(url)
+
+        download_link = self.extract_fast('download_link', url)
+
+        if download_link and download_link.endswith(f'={topic_id}'):
+            return self.expand_link(url, download_link)
+
         page_soup = self.get_torrent_page(url)
 
-        expected_link = rf'/download.+\={self.get_id_from_link(url)}'
+        expected_link = rf'/download.+\={topic_id}'
         download_link = self.find_links(url, page_soup, definite=expected_link)
 
         return download_link or ''
@@ -1,7 +1,8 @@
+import re
 from datetime import datetime
 from typing import ClassVar
 
-from ..base_tracker import GenericPrivateTracker
+from ..base_tracker import GenericPrivateTracker, SoupStrainer
 
 
 class NNMClubTracker(GenericPrivateTracker):
@@ -9,8 +10,23 @@ class NNMClubTracker(GenericPrivateTracker):
 
     alias: str = 'nnm-club.me'
     login_url: str = 'https://%(domain)s/forum/login.php'
+    auth_cookie_name: str = 'phpbb2mysql_4_data'
     auth_qs_param_name: str = 'sid'
     mirrors: ClassVar[list[str]] = ['nnmclub.to', 'nnmclub.ro', 'nnm-club.name']
+    info_hash_on_page: bool = True
+    feed_url: str = 'https://%(domain)s/forum/rss2.php'
+    page_parse_only: ClassVar[SoupStrainer] = SoupStrainer(['a', 'span', 'var', 'title'])
+    fast_extractors: ClassVar[dict[str, re.Pattern[bytes]]] = {
+        **GenericPrivateTracker.fast_extractors,
+        'download_link': re.compile(rb'href=["\'](?P<value>[^"\']*download\.php\?id=\d+)["\']'),
+        # Confined to the first post data span not to pick a date from later posts:
+        # the span matches even without a date in it (a miss then).
+        'date_updated': re.compile(
+            rb'<span class="postdata">(?:(?:(?!</span>).)*?>(?P<value>\d{1,2} [^ <]+ \d{4} \d\d:\d\d:\d\d)<)?',
+            re.DOTALL,
+        ),
+        'cover': re.compile(rb'<var\s+class="postImg[^"]*"\s+title="[^"]*?link=(?P<value>[^"]+)"'),
+    }
 
     test_urls: ClassVar[list[str]] = [
         'https://nnmclub.to/forum/viewtopic.php?t=889443',
@@ -20,24 +36,38 @@ class NNMClubTracker(GenericPrivateTracker):
         """Returns a dictionary with data to be pushed to authorization form."""
         return {'username': login, 'password': password, 'autologin': 1, 'redirect': '', 'login': 'pushed'}
 
-    def extract_page_cover(self) -> str:
-        attrs = getattr(self._torrent_page.select_one('var.postImg'), 'attrs', {})
+    def extract_page_cover(self, url: str) -> str:
+        cover = self.extract_fast('cover', url)
+
+        if cover:
+            return cover
+
+        attrs = getattr(self.get_torrent_page(url).select_one('var.postImg'), 'attrs', {})
         title = attrs.get('title')
 
         if not title:
-            return super().extract_page_cover()
+            return super().extract_page_cover(url)
 
         _, _, link = title.partition('link=')
 
         return link
 
-    def extract_page_date_updated(self) -> datetime | None:
-        dt_val = getattr(self._torrent_page.select_one('span.postdata'), 'text', '').strip()
-        return self.parse_datetime(dt_val, '%d %b %Y %H:%M:%S', locale='ru')
+    def extract_page_date_updated(self, url: str) -> datetime | None:
+        dt_val = self.extract_fast('date_updated', url)
+
+        if dt_val is None:
+            dt_val = getattr(self.get_torrent_page(url).select_one('span.postdata'), 'text', '').strip()
+
+        return self.parse_datetime(dt_val, '%d %b %Y %H:%M:%S')
 
     def get_download_link(self, url: str) -> str:
         """Tries to find .torrent file download link at forum thread page and return that one."""
 
+        download_link = self.extract_fast('download_link', url)
+
+        if download_link:
+            return self.expand_link(url, download_link)
+
         page_soup = self.get_torrent_page(url)
 
         download_link = self.find_links(url, page_soup, definite=r'download\.php')
@@ -48,6 +78,7 @@ class NNMClubTracker(GenericPrivateTracker):
             domain = self.extract_domain(url)
 
             if self.login(domain):
-                download_link = self.get_download_link(url)
+                page_soup = self.get_torrent_page(url, drop_cache=True)
+                download_link = self.find_links(url, page_soup, definite=r'download\.php')
 
         return download_link or ''
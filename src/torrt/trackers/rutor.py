@@ -1,6 +1,7 @@
+import re
 from typing import ClassVar
 
-from ..base_tracker import GenericPublicTracker
+from ..base_tracker import GenericPublicTracker, SoupStrainer
 
 
 class RutorTracker(GenericPublicTracker):
@@ -8,6 +9,13 @@ class RutorTracker(GenericPublicTracker):
 
     alias: str = 'rutor.org'
     mirrors: ClassVar[list[str]] = ['rutor.is', 'rutor.info', 'new-rutor.org']
+    info_hash_on_page: bool = True
+    feed_url: str = 'https://%(domain)s/rss.php?full=1'
+    page_parse_only: ClassVar[SoupStrainer] = SoupStrainer(['a', 'title'])
+    fast_extractors: ClassVar[dict[str, re.Pattern[bytes]]] = {
+        **GenericPublicTracker.fast_extractors,
+        'download_link': re.compile(rb'href=["\'](?P<value>[^"\']*/download/\d+)["\']'),
+    }
 
     def __init__(self, *, cookies: dict[str, str] | None = None):
 
@@ -33,9 +41,14 @@ class RutorTracker(GenericPublicTracker):
     def get_download_link(self, url: str) -> str:
         """Tries to find .torrent file download link at forum thread page and return that one."""
 
-        page_soup = self.get_torrent_page(url)
-
         expected_link = f'/download/{self.get_id_from_link(url)}'
+
+        download_link = self.extract_fast('download_link', url)
+
+        if download_link and download_link.endswith(expected_link):
+            return self.expand_link(url, download_link)
+
+        page_soup = self.get_torrent_page(url)
         download_link = self.find_links(url, page_soup, definite=expected_link)
 
         return download_link or ''
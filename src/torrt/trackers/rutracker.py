@@ -1,6 +1,9 @@
+import re
+from datetime import datetime
 from typing import ClassVar
 
-from ..base_tracker import BeautifulSoup, GenericPrivateTracker
+from ..base_tracker import BeautifulSoup, GenericPrivateTracker, SoupStrainer
+from ..utils import TorrentData
 
 
 class RuTrackerTracker(GenericPrivateTracker):
@@ -11,26 +14,74 @@ class RuTrackerTracker(GenericPrivateTracker):
     auth_cookie_name: str = 'bb_session'
     mirrors: ClassVar[list[str]] = ['rutracker.org', 'rutracker.net', 'maintracker.org']
     encoding: str = 'cp1251'
+    info_hash_on_page: bool = True
+    page_parse_only: ClassVar[SoupStrainer] = SoupStrainer(['a', 'script', 'title'])
+    fast_extractors: ClassVar[dict[str, re.Pattern[bytes]]] = {
+        **GenericPrivateTracker.fast_extractors,
+        'download_link': re.compile(rb'href=["\'](?P<value>[^"\']*dl\.php\?t=\d+)["\']'),
+        'form_token': re.compile(rb"form_token\s*:\s*'(?P<value>[^']*)'"),
+    }
 
     test_urls: ClassVar[list[str]] = [
         'https://rutracker.org/forum/viewtopic.php?t=4430338',
     ]
 
+    api_url: str = 'https://api.rutracker.cc/v1/'
+    """Public API base URL."""
+
+    api_chunk_size: int = 100
+    """Maximum number of topic IDs to be passed in one API request."""
+
     def get_id_from_link(self, url: str) -> str:
         """Returns forum thread identifier from full thread URL."""
         return url.split('=')[1]
 
+    def get_info_hashes(self, urls: list[str]) -> dict[str, str]:
+        """Returns current info hashes for many topics at once using public API."""
+
+        urls_by_ids: dict[str, list[str]] = {}
+
+        for url in urls:
+            urls_by_ids.setdefault(self.get_id_from_link(url), []).append(url)
+
+        topic_ids = list(urls_by_ids)
+        chunk_size = self.api_chunk_size
+        info_hashes = {}
+
+        for idx in range(0, len(topic_ids), chunk_size):
+
+            response = self.client.request(
+                f'{self.api_url}get_tor_hash',
+                params={'by': 'topic_id', 'val': ','.join(topic_ids[idx:idx + chunk_size])},
+                json=True,
+                silence_exceptions=True,
+            )
+
+            for topic_id, info_hash in ((response or {}).get('result') or {}).items():
+
+                if not info_hash:
+                    # Topic is not found.
+                    continue
+
+                for url in urls_by_ids.get(topic_id, []):
+                    info_hashes[url] = info_hash.lower()
+
+        return info_hashes
+
     def get_login_form_data(self, login: str, password: str) -> dict:
         """Returns a dictionary with data to be pushed to authorization form."""
         return {'login_username': login, 'login_password': password, 'login': 'pushed', 'redirect': 'index.php'}
 
-    def before_download(self, url: str):
-        """Used to perform some required actions right before .torrent download."""
-        self.cookies['bb_dl'] = self.get_id_from_link(url)  # A check that user himself have visited torrent's page ;)
-
     def get_download_link(self, url: str) -> str:
         """Tries to find .torrent file download link at forum thread page and return that one."""
 
+        download_link = self.extract_fast('download_link', url)
+        form_token = self.extract_fast('form_token', url)
+
+        if download_link and form_token:
+            # Form token is only issued to logged in users.
+            return self.expand_link(url, download_link)
+
         page_soup = self.get_torrent_page(url)
 
         domain = self.extract_domain(url)
@@ -44,10 +95,50 @@ class RuTrackerTracker(GenericPrivateTracker):
 
         download_link = self.find_links(url, page_soup, definite=r'dl\.php')
 
-        self.form_token = self.get_form_token(page_soup)
-
         return download_link or ''
 
+    def get_torrent_meta(
+            self,
+            url: str,
+            *,
+            last_updated: datetime | None = None,
+            known_hash: str = ''
+    ) -> TorrentData | None:
+        torrent = super().get_torrent_meta(url, last_updated=last_updated, known_hash=known_hash)
+
+        if torrent is not None:
+            # Kept along with torrent data, not in the tracker object, since pages
+            # are processed concurrently and may be processed in other processes.
+            torrent.meta['form_token'] = self.extract_form_token(url)
+
+        return torrent
+
+    def fetch_torrent_file(self, torrent: TorrentData) -> TorrentData | None:
+        contents = self.download_torrent(
+            torrent.url_file,
+            referer=torrent.url,
+            form_token=torrent.meta.get('form_token', ''),
+        )
+        return self.make_torrent_data(torrent, contents)
+
+    def extract_form_token(self, url: str) -> str:
+        """Returns download form token from torrent page or an empty string.
+
+        :param url: torrent page URL
+
+        """
+        form_token = self.extract_fast('form_token', url)
+
+        if form_token:
+            return form_token
+
+        page_soup = self.get_torrent_page(url)
+
+        if page_soup is None:
+            return ''
+
+        return self.get_form_token(page_soup) or ''
+
     def get_form_token(self, page_soup: BeautifulSoup) -> str | None:
 
         form_token_lines = [line for line in page_soup.text.split('\n\t') if line.startswith('form_token')]
@@ -58,23 +149,34 @@ class RuTrackerTracker(GenericPrivateTracker):
         except IndexError:
             return
 
-    def download_torrent(self, url: str, *, referer: str = '') -> bytes | None:
+    def download_torrent(self, url: str, *, referer: str = '', form_token: str = '') -> bytes | None:
+        """Returns .torrent file contents from the given URL.
+
+        :param url: torrent file URL
+        :param referer: Referer header value
+        :param form_token: download form token from torrent page (see .extract_form_token())
+
+        """
 
         self.log_debug(f'Downloading torrent file from {url} ...')
 
         self.before_download(url)
 
         # rutracker requires POST action to download torrent file
-        if self.form_token:
-            form_data = {'form_token': self.form_token}
+        if form_token:
+            form_data = {'form_token': form_token}
 
         else:
             form_data = None
 
+        # A check that user himself have visited torrent's page ;)
+        # Passed with the request not to interfere with concurrent downloads.
+        cookies = {**self.cookies, 'bb_dl': self.get_id_from_link(url)}
+
         response = self.get_response(
             url,
             form_data=form_data,
-            cookies=self.cookies,
+            cookies=cookies,
             query_string=self.get_query_string(),
             referer=referer,
         )
@@ -2,20 +2,30 @@ import base64
 import logging
 import re
 import threading
-from collections.abc import Callable, Generator, Mapping
+from collections import Counter
+from collections.abc import Callable, Generator, Iterable, Mapping
+from contextlib import contextmanager
+from copy import deepcopy
 from datetime import UTC, datetime
+from http.cookiejar import CookieJar
 from inspect import getfullargspec
 from json import JSONDecodeError, dump, load
 from pathlib import Path
 from pkgutil import iter_modules
-from time import time
 from typing import TYPE_CHECKING, Any, ClassVar, Optional
+from urllib.parse import urlsplit
 
-from bs4 import BeautifulSoup
+from bs4 import BeautifulSoup, SoupStrainer
 from requests import RequestException, Response, Session
+from requests.utils import get_encoding_from_headers
 from torrentool.api import Torrent
 from torrentool.exceptions import BencodeDecodingError
 
+from .cassettes import PLAYER
+from .context import get_run_context
+from .metrics import METRICS
+from .tracing import span
+
 if TYPE_CHECKING:
     from .base_bot import BaseBot
     from .base_notifier import BaseNotifier
@@ -25,13 +35,18 @@ if TYPE_CHECKING:
 
 LOGGER = logging.getLogger('torrt')
 
-_THREAD_LOCAL = threading.local()
-
 # This regex is used to get hyperlink from torrent comment.
 RE_LINK = re.compile(r'(?P<url>https?://[^\s]+)')
 
+# This regex is used to get info hash from magnet link.
+RE_BTIH = re.compile(r'urn:btih:(?P<hash>[0-9a-fA-F]{40}|[2-7A-Za-z]{32})(?![0-9A-Za-z])')
+
 DATETIME_FORMAT='%Y-%m-%d %H:%M:%S'
 
+DURATION_UNITS = {'s': 1, 'm': 60, 'h': 3600}
+"""Duration units multipliers (to seconds). See parse_duration()."""
+
+
 class HttpClient:
     """Common client to perform HTTP requests."""
 
@@ -40,6 +55,9 @@ class HttpClient:
     user_agent: str = (
         'Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/142.0.0.0 Safari/537.36')
 
+    proxies: ClassVar[dict[str, str]] = {}
+    """Proxies to tunnel requests through indexed by URL schemes. See toolbox.tunnel()."""
+
     def __init__(
             self,
             *,
@@ -58,9 +76,27 @@ class HttpClient:
         self.silence_exceptions = silence_exceptions,
         self.dump_fname_tpl = dump_fname_tpl
         self.json = json
-        self.last_error: str = ''
-        self.last_response: Response | None = None
         self.tunnel = tunnel
+        # Last error and response are of the current thread's request.
+        self._local = threading.local()
+
+    @property
+    def last_error(self) -> str:
+        """Description of the last request error in the current thread."""
+        return getattr(self._local, 'error', '')
+
+    @last_error.setter
+    def last_error(self, value: str):
+        self._local.error = value
+
+    @property
+    def last_response(self) -> Response | None:
+        """The last response got in the current thread."""
+        return getattr(self._local, 'response', None)
+
+    @last_response.setter
+    def last_response(self, value: Response | None):
+        self._local.response = value
 
     def request(
             self,
@@ -106,12 +142,20 @@ class HttpClient:
             headers['Referer'] = referer
 
         if not self.tunnel:
-            # Drop globally set tunnels settings. See toolbox.tunnel().
+            # Drop proxies set in environment.
             r_kwargs['proxies'] = {'http': None, 'https': None}
 
+        elif self.proxies:
+            # Requests updates proxies given with those from environment.
+            r_kwargs['proxies'] = {**self.proxies}
+
         if json is None:
             json = self.json
 
+        host = urlsplit(url).netloc
+
+        PLAYER.mount(self.session)
+
         try:
 
             if data or r_kwargs.get('files'):
@@ -126,12 +170,26 @@ class HttpClient:
             else:
                 method = self.session.get
 
-            response = method(url, **r_kwargs)
+            with (
+                METRICS.timed('torrt_http_request_seconds', host=host),
+                span('http.request', **{
+                    'http.request.method': 'POST' if method == self.session.post else 'GET',
+                    'server.address': host,
+                    'url.full': url,
+                }) as request_span,
+            ):
+                response = method(url, **r_kwargs)
+                request_span.set(**{
+                    'http.response.status_code': response.status_code,
+                    'http.response.body.size': len(response.content),
+                })
 
             self.last_response = response
 
         except RequestException as e:
 
+            METRICS.increment('torrt_http_requests_total', host=host, status='error')
+
             self.last_error = f'{e}'
             LOGGER.warning(f"Failed to get response from `{url}`: {e}")
 
@@ -145,10 +203,10 @@ class HttpClient:
 
         else:
 
-            dump_contents(
-                self.dump_fname_tpl,
-                contents=response.content
-            )
+            METRICS.increment('torrt_http_requests_total', host=host, status=f'{response.status_code}')
+
+            if get_run_context().dumper.enabled:
+                dump_contents(self.dump_fname_tpl, response.content, url=url, status=response.status_code)
 
             if json:
                 try:
@@ -189,34 +247,30 @@ class GlobalParam:
     """Represents global parameter value holder.
     Global params can used anywhere in torrt.
 
+    Values are stored in the current run context (see torrt.context),
+    so they are available in threads, processes and asyncio tasks started on its behalf.
+
     """
     @staticmethod
     def set(name: str, value: Any):
-        setattr(_THREAD_LOCAL, name, value)
+        get_run_context().params[name] = value
 
     @staticmethod
     def get(name: str) -> Any:
-        return getattr(_THREAD_LOCAL, name, None)
+        return get_run_context().params.get(name)
 
 
-def dump_contents(filename: str, contents: bytes):
-    """Dumps contents into a file with a given name.
+def dump_contents(filename: str, contents: bytes, *, url: str = '', status: int = 200):
+    """Dumps contents into a file with a given name (see `--dump` command line switch).
+    Contents are written in background.
 
-    :param filename:
+    :param filename: file name template. Supports `%(ts)s` - current timestamp.
     :param contents:
+    :param url: URL contents is got from
+    :param status: HTTP response status code
 
     """
-    dump_into = GlobalParam.get('dump_into')
-
-    if not dump_into:
-        return
-
-    filename = filename % {
-        'ts': time(),
-    }
-
-    with (Path(dump_into) / filename).open('wb') as f:
-        f.write(contents)
+    get_run_context().dumper.add(filename, contents, host=urlsplit(url).netloc, status=status)
 
 
 def configure_entity(
@@ -299,13 +353,34 @@ def parse_torrent(torrent: bytes) -> Torrent | None:
         return None
 
 
-def make_soup(html: str) -> BeautifulSoup:
+def make_soup(html: str, *, parse_only: SoupStrainer | None = None) -> BeautifulSoup:
     """Returns BeautifulSoup object from a html.
 
     :param html:
+    :param parse_only: Strainer to parse only matching parts of a document.
 
     """
-    return BeautifulSoup(html, 'lxml')
+    return BeautifulSoup(html, 'lxml', parse_only=parse_only)
+
+
+def get_links_from_feed(contents: bytes) -> list[str]:
+    """Returns item links from RSS or Atom feed contents.
+
+    :param contents: Feed contents.
+
+    """
+    soup = BeautifulSoup(contents, 'xml')
+    links = []
+
+    for item in soup.find_all(['item', 'entry']):
+        link = item.find('link')
+
+        if not link:
+            continue
+
+        links.append((link.get('href') or link.text).strip())
+
+    return links
 
 
 def get_url_from_string(string: str) -> str:
@@ -325,6 +400,78 @@ def get_url_from_string(string: str) -> str:
     return match
 
 
+def get_info_hash_from_magnet(string: str) -> str:
+    """Returns lowercase hex info hash (btih) from a string containing
+    a magnet link or an empty string if not found.
+
+    :param string:
+
+    """
+    match = RE_BTIH.search(string or '')
+
+    if not match:
+        return ''
+
+    info_hash = match.group('hash')
+
+    if len(info_hash) == 32:
+        # Base32 encoded form.
+        info_hash = base64.b32decode(info_hash.upper()).hex()
+
+    return info_hash.lower()
+
+
+def make_response(
+        url: str,
+        content: bytes,
+        *,
+        status_code: int = 200,
+        headers: Mapping[str, str] | None = None,
+        encoding: str | None = None
+) -> Response:
+    """Returns Requests response object made from the given data,
+    e.g. for contents got not with Requests.
+
+    :param url: response URL
+    :param content: response contents
+    :param status_code: HTTP status code
+    :param headers: response headers
+    :param encoding: contents encoding. If not set, deduced from headers as Requests does.
+
+    """
+    response = Response()
+    response.url = url
+    response.status_code = status_code
+    response._content = content
+    response.headers.update(headers or {})
+    response.encoding = encoding or get_encoding_from_headers(response.headers)
+
+    return response
+
+
+def split_cookie_jar(jar: CookieJar | Mapping[str, str]) -> tuple[dict[str, str], dict[str, int]]:
+    """Returns a tuple of two dictionaries made from a cookie jar:
+    cookies values and cookies expiration timestamps (for cookies having one),
+    both indexed by cookie names.
+
+    :param jar:
+
+    """
+    if not isinstance(jar, CookieJar):
+        return dict(jar), {}
+
+    values = {}
+    expires = {}
+
+    for cookie in jar:
+        values[cookie.name] = cookie.value
+
+        if cookie.expires:
+            expires[cookie.name] = int(cookie.expires)
+
+    return values, expires
+
+
 def get_iso_from_timestamp(ts: int) -> str:
     """Get ISO formatted string from timestamp.
 
@@ -334,6 +481,33 @@ def get_iso_from_timestamp(ts: int) -> str:
     return datetime.fromtimestamp(ts, tz=UTC).isoformat(' ')
 
 
+def parse_duration(value: str) -> int:
+    """Returns a number of seconds for a given duration string.
+
+    :param value: duration, e.g.: 90 (seconds), 30s, 15m, 2h
+
+    """
+    duration = value.strip().lower()
+    multiplier = DURATION_UNITS.get(duration[-1:])
+
+    if multiplier:
+        duration = duration[:-1]
+
+    else:
+        multiplier = 1
+
+    try:
+        seconds = int(duration) * multiplier
+
+    except ValueError:
+        raise ValueError(f'Unsupported duration: {value}') from None
+
+    if seconds < 0:
+        raise ValueError(f'Negative duration: {value}')
+
+    return seconds
+
+
 def update_dict(old_dict: dict, new_dict: dict) -> dict:
     """Updates [inplace] old dictionary with data from a new one with respect to existing values.
 
@@ -352,6 +526,49 @@ def update_dict(old_dict: dict, new_dict: dict) -> dict:
     return old_dict
 
 
+class HitsCounter:
+    """Thread-safe counter of hits and misses for keys, e.g. for fast paths or caches."""
+
+    __slots__ = ['_counter', '_lock']
+
+    def __init__(self):
+        self._counter: Counter = Counter()
+        self._lock = threading.Lock()
+
+    def register(self, key: tuple, *, hit: bool):
+        """Registers a hit or a miss for a given key.
+
+        :param key:
+        :param hit: flag whether it is a hit
+
+        """
+        with self._lock:
+            self._counter[(*key, hit)] += 1
+
+    def get_rates(self) -> dict[tuple, float]:
+        """Returns hit rates (0.0 - 1.0) indexed by keys."""
+
+        totals = Counter()
+        hits = Counter()
+
+        with self._lock:
+            counts = list(self._counter.items())
+
+        for (*key, hit), count in counts:
+            key = tuple(key)
+            totals[key] += count
+
+            if hit:
+                hits[key] += count
+
+        return {key: hits[key] / total for key, total in totals.items()}
+
+    def clear(self):
+        """Drops all counts."""
+        with self._lock:
+            self._counter.clear()
+
+
 class PageData:
     """Represents data extracted from torrent page."""
 
@@ -382,6 +599,7 @@ class TorrentData:
             raw: bytes = b'',
             page: PageData = None,
             parsed: Torrent = None,
+            meta: dict | None = None,
     ):
         self.url = url
         self.url_file = url_file
@@ -391,6 +609,12 @@ class TorrentData:
         self.page = page
         self.params = {}
 
+        self.meta: dict = meta or {}
+        """Tracker specific data passed from .get_torrent_meta() to .fetch_torrent_file()
+        (e.g. download form tokens). Not stored.
+
+        """
+
         self._name = name
         self._hash = hash
 
@@ -442,11 +666,18 @@ def structure_torrent_data(target_dict: dict, hash_str: str, data: TorrentData):
     target_dict[hash_str] = data.to_dict()
 
 
-def get_torrent_from_url(url: str | None, last_updated: datetime | None = None) -> TorrentData | None:
+def get_torrent_from_url(
+        url: str | None,
+        last_updated: datetime | None = None,
+        *,
+        known_hash: str = ''
+) -> TorrentData | None:
     """Downloads torrent from a given URL and returns torrent data.
 
     :param url: URL to download torrent file from
     :param last_updated: torrent last updated datetime
+    :param known_hash: torrent hash known to torrent client. Allows skipping
+        .torrent file download if tracker reports the same info hash.
 
     """
     LOGGER.debug(f'Downloading torrent file from `{url}` ...')
@@ -454,7 +685,7 @@ def get_torrent_from_url(url: str | None, last_updated: datetime | None = None)
     tracker: GenericTracker = TrackerObjectsRegistry.get_for_string(url)
 
     if tracker:
-        torrent_info = tracker.get_torrent(url, last_updated=last_updated)
+        torrent_info = tracker.get_torrent(url, last_updated=last_updated, known_hash=known_hash)
 
         if torrent_info is None:
             LOGGER.warning(f'Unable to get torrent from `{url}`')
@@ -469,6 +700,62 @@ def get_torrent_from_url(url: str | None, last_updated: datetime | None = None)
     return None
 
 
+def get_info_hashes_from_urls(urls: Iterable[str]) -> dict[str, str]:
+    """Returns current info hashes of torrents from given URLs indexed by URLs.
+    Only trackers supporting bulk lookups are addressed.
+
+    :param urls: torrent page URLs
+
+    """
+    urls_by_tracker: dict[GenericTracker, list[str]] = {}
+
+    for url in urls:
+        tracker: GenericTracker = TrackerObjectsRegistry.get_for_string(url)
+
+        if tracker:
+            urls_by_tracker.setdefault(tracker, []).append(url)
+
+    info_hashes = {}
+
+    for tracker, tracker_urls in urls_by_tracker.items():
+        LOGGER.debug(f'Getting info hashes for {len(tracker_urls)} torrent(s) from `{tracker.alias}` ...')
+        info_hashes.update(tracker.get_info_hashes(tracker_urls))
+
+    return info_hashes
+
+
+def get_feeds_unlisted_urls(urls: Iterable[str], *, feeds: dict[str, set[str] | None]) -> set[str]:
+    """Returns those of the given torrent page URLs which are not listed
+    in their trackers feeds of recently updated torrents.
+
+    Trackers without feeds are not considered.
+
+    :param urls: torrent page URLs
+    :param feeds: torrent identifiers from feeds indexed by tracker aliases.
+        Used as a cache and updated inplace.
+
+    """
+    unlisted = set()
+
+    for url in urls:
+        tracker: GenericTracker = TrackerObjectsRegistry.get_for_string(url)
+
+        if not tracker:
+            continue
+
+        alias = tracker.alias
+
+        if alias not in feeds:
+            feeds[alias] = tracker.get_feed_ids()
+
+        feed_ids = feeds[alias]
+
+        if feed_ids is not None and tracker.get_id_from_link(url) not in feed_ids:
+            unlisted.add(url)
+
+    return unlisted
+
+
 def iter_rpc() -> Generator[tuple[str, 'BaseRPC'], None, None]:
     """Generator to iterate through available and enable RPC objects.
         tuple - rpc_alias, rpc_object
@@ -583,8 +870,8 @@ class WithSettings:
         """
         LOGGER.error(f'{cls.__name__}: {msg}')
 
-    def save_settings(self):
-        """Saves object settings into torrt configuration file."""
+    def get_settings(self) -> dict[str, Any]:
+        """Returns object settings as they are passed to __init__()."""
 
         settings = {}
 
@@ -598,7 +885,11 @@ class WithSettings:
         except TypeError:
             pass  # Probably __init__ method is not user-defined.
 
-        config.update({self.config_entry_name: {self.alias: settings}})
+        return settings
+
+    def save_settings(self):
+        """Saves object settings into torrt configuration file."""
+        config.update({self.config_entry_name: {self.alias: self.get_settings()}})
 
 
 class TorrtConfig:
@@ -609,14 +900,104 @@ class TorrtConfig:
 
     _basic_settings: ClassVar[dict[str, Any]] = {
         'time_last_check': 0,
+        'time_last_full_check': 0,
         'walk_interval_hours': 1,
+        'full_check_interval_hours': 24,
+        'walk_pipeline': {},
+        'walk_cursor': '',
+        'failures_backoff_hours': 1,
+        'failures_dormant_threshold': 10,
+        'metrics': {'textfile': '', 'summary': ''},
         'rpc': {},
         'trackers': {},
         'torrents': {},
+        'torrents_failures': {},
         'notifiers': {},
         'bots': {}
     }
 
+    _lock: ClassVar[threading.RLock] = threading.RLock()
+
+    _deferred_depth: ClassVar[int] = 0
+    """Number of active deferred() contexts."""
+
+    _deferred_settings: ClassVar[dict | None] = None
+    """Settings as seen while in deferred() context: loaded ones with changes applied."""
+
+    _deferred_changes: ClassVar[list[tuple]] = []
+    """Changes made while in deferred() context and not yet written to a file:
+    ('update', settings), ('drop', realm, key) or ('save', settings).
+
+    """
+
+    _cached: ClassVar[tuple[tuple, dict] | None] = None
+    """Configuration file state (path, inode, modification time, size) and settings loaded from it."""
+
+    @classmethod
+    @contextmanager
+    def deferred(cls):
+        """Context manager deferring configuration file writes till the exit
+        from the outermost context. Changes made meanwhile are kept in memory
+        and are applied to the file re-loaded on exit, so that changes made
+        by other processes (e.g. torrents registered) are preserved.
+
+        """
+        with cls._lock:
+            cls._deferred_depth += 1
+
+        try:
+            yield
+
+        finally:
+            with cls._lock:
+                cls._deferred_depth -= 1
+
+                if not cls._deferred_depth and cls._deferred_settings is not None:
+                    changes = cls._deferred_changes
+                    cls._deferred_settings = None
+                    cls._deferred_changes = []
+
+                    settings = cls.load()
+
+                    for change in changes:
+                        cls._apply_change(settings, change)
+
+                    cls.save(settings)
+
+    @classmethod
+    def _apply_change(cls, settings: dict, change: tuple):
+        kind, *args = change
+
+        if kind == 'update':
+            update_dict(settings, deepcopy(args[0]))
+
+        elif kind == 'drop':
+            realm, key = args
+            settings.get(realm, {}).pop(key, None)
+
+        else:
+            settings.clear()
+            settings.update(deepcopy(args[0]))
+
+    @classmethod
+    def _defer(cls, change: tuple) -> bool:
+        """Records a change if in deferred() context. Returns True if recorded.
+
+        :param change:
+
+        """
+        if not cls._deferred_depth:
+            return False
+
+        if cls._deferred_settings is None:
+            cls._deferred_settings = cls.load()
+            cls._deferred_changes = []
+
+        cls._apply_change(cls._deferred_settings, change)
+        cls._deferred_changes.append(change)
+
+        return True
+
     @classmethod
     def drop_section(cls, realm: str, key: str):
         """Drops config section by its key (name) and updates config.
@@ -625,13 +1006,17 @@ class TorrtConfig:
         :param key:
 
         """
-        try:
-            cfg = cls.load()
-            del cfg[realm][key]
-            cls.save(cfg)
+        with cls._lock:
+            if cls._defer(('drop', realm, key)):
+                return
+
+            try:
+                cfg = cls.load()
+                del cfg[realm][key]
+                cls.save(cfg)
 
-        except KeyError:
-            pass
+            except KeyError:
+                pass
 
     @classmethod
     def bootstrap(cls):
@@ -641,7 +1026,7 @@ class TorrtConfig:
             cls.USER_DATA_PATH.mkdir(parents=True)
 
         if not cls.USER_SETTINGS_FILE.exists():
-            cls.save(cls._basic_settings)
+            cls._write(cls._basic_settings)
 
         # My precious.
         cls.USER_SETTINGS_FILE.chmod(0o600)
@@ -653,27 +1038,60 @@ class TorrtConfig:
         :param settings_dict:
 
         """
-        cls.save(update_dict(cls.load(), settings_dict))
+        with cls._lock:
+            if cls._defer(('update', deepcopy(settings_dict))):
+                return
+
+            cls.save(update_dict(cls.load(), settings_dict))
 
     @classmethod
     def load(cls) -> dict:
         """Returns current settings dictionary."""
 
-        LOGGER.debug(f'Loading configuration file {cls.USER_SETTINGS_FILE} ...')
+        with cls._lock:
+            if cls._deferred_settings is not None:
+                return deepcopy(cls._deferred_settings)
 
-        cls.bootstrap()
+            LOGGER.debug(f'Loading configuration file {cls.USER_SETTINGS_FILE} ...')
 
-        with cls.USER_SETTINGS_FILE.open() as f:
-            settings = load(f)
+            cls.bootstrap()
+
+            # Not to read a file being written.
+            with cls.USER_SETTINGS_FILE.open() as f:
+                settings = load(f)
 
         # Pick up settings entries added in new version
         # and put them into old user config.
         for key, val in cls._basic_settings.items():
             if key not in settings:
-                settings[key] = val
+                settings[key] = deepcopy(val)
 
         return settings
 
+    @classmethod
+    def load_cached(cls) -> dict:
+        """Returns current settings dictionary shared between calls, so it should not be modified.
+        Configuration file is re-read only if it has been changed (also by other processes).
+
+        """
+        with cls._lock:
+            if cls._deferred_settings is not None:
+                return deepcopy(cls._deferred_settings)
+
+            cls.bootstrap()
+
+            path = cls.USER_SETTINGS_FILE
+            stat = path.stat()
+            state = (path, stat.st_ino, stat.st_mtime_ns, stat.st_size)
+            cached = cls._cached
+
+            if cached is None or cached[0] != state:
+                # State is taken before the file is read: if it is changed meanwhile,
+                # it will be re-read next time.
+                cached = cls._cached = (state, cls.load())
+
+            return cached[1]
+
     @classmethod
     def save(cls, settings_dict: dict):
         """Saves a given dict as torrt configuration.
@@ -681,21 +1099,41 @@ class TorrtConfig:
         :param settings_dict:
 
         """
+        with cls._lock:
+            if not cls._defer(('save', deepcopy(settings_dict))):
+                cls._write(settings_dict)
+
+    @classmethod
+    def _write(cls, settings_dict: dict):
         LOGGER.debug(f'Saving configuration file {cls.USER_SETTINGS_FILE} ...')
 
-        with cls.USER_SETTINGS_FILE.open('w') as f:
+        path = cls.USER_SETTINGS_FILE
+        path_tmp = path.with_name(f'{path.name}.tmp')
+
+        # Written into a temporary file first, so that an interrupted write
+        # or a concurrent process read never sees a partial configuration.
+        with path_tmp.open('w') as f:
             dump(settings_dict, f, indent=4)
 
+        path_tmp.chmod(0o600)
+        path_tmp.replace(path)
+
+        cls._cached = None
+
 
 config = TorrtConfig
 
 
 class ObjectsRegistry:
+    """Objects indexed by aliases. Thread-safe: items are replaced on addition (copy-on-write),
+    so items got may be iterated while objects are being added.
 
-    __slots__ = ['_items']
+    """
+    __slots__ = ['_items', '_lock']
 
     def __init__(self):
         self._items: dict[str, Any] = {}
+        self._lock = threading.Lock()
 
     def add(self, obj: Any):
         """Add an object to registry.
@@ -709,7 +1147,8 @@ class ObjectsRegistry:
 
         LOGGER.debug(f'Registering `{name}` from {obj} ...')
 
-        self._items[name] = obj
+        with self._lock:
+            self._items = {**self._items, name: obj}
 
     def get(self, obj_alias: str | None = None) -> dict[str, Any] | Any:
         """Returns registered objects or a definite object by its alias,
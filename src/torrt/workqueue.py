@@ -0,0 +1,413 @@
+"""Distributed walk.
+
+Torrent pages checks are put into a work queue kept in SQLite database file
+and are leased by walk worker processes:
+
+    # Coordinator. Collects previous results into configuration file
+    # and puts new checks into the queue.
+    torrt walk --queue /var/lib/torrt/queue.sqlite
+
+    # Workers. Having the same RPC and trackers configured.
+    torrt work /var/lib/torrt/queue.sqlite
+
+SQLite relies on file locks, which are unreliable on network filesystems (e.g. NFS),
+so the database file should be kept on a local filesystem and workers should run
+on the same machine.
+
+Workers lease checks in batches for a limited time and prolong the leases (heartbeat)
+while checks are in progress. Leases of crashed workers expire and are reclaimed by others.
+Before torrents are replaced in torrent clients a worker confirms it still holds the lease,
+so that updates are not applied twice.
+
+Workers do not change torrents registry: checks results (including outdated torrents)
+are saved into configuration file by the coordinator.
+
+"""
+import json
+import logging
+import sqlite3
+from collections.abc import Generator
+from contextlib import closing, contextmanager
+from os import getpid
+from socket import gethostname
+from threading import Event, Thread
+from time import sleep, time
+
+from .context import propagate
+from .pipeline import WalkPipeline, WalkProgress
+from .toolbox import apply_walk_job, finish_walk, make_walk_progress, start_walk, unregister_torrent
+from .tracing import TRACER, span
+from .utils import config
+
+LOGGER = logging.getLogger(__name__)
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS checks (
+    url TEXT PRIMARY KEY,
+    torrents TEXT NOT NULL,
+    owner TEXT NOT NULL DEFAULT '',
+    lease_until REAL NOT NULL DEFAULT 0,
+    done INTEGER NOT NULL DEFAULT 0,
+    result TEXT NOT NULL DEFAULT ''
+);
+CREATE INDEX IF NOT EXISTS checks_pending ON checks (done, lease_until);
+'''
+
+
+class WorkQueue:
+    """Torrent pages checks queue kept in SQLite database."""
+
+    lease_time: int = 300
+    """Seconds a check is leased for. Prolonged by heartbeats while the check is in progress."""
+
+    def __init__(self, path: str, *, owner: str = ''):
+        """
+        :param path: SQLite database file path
+        :param owner: worker identifier. Defaults to host name and process ID.
+
+        """
+        self.path = path
+        self.owner = owner or f'{gethostname()}:{getpid()}'
+
+        with self._connect() as connection:
+            connection.executescript(SCHEMA)
+
+    def _connect(self) -> closing[sqlite3.Connection]:
+        # Connections are short-lived: they are not shared between threads
+        # and file locks are not kept for long.
+        return closing(sqlite3.connect(self.path, timeout=60, isolation_level=None))
+
+    @contextmanager
+    def _transaction(self) -> Generator[sqlite3.Connection, None, None]:
+
+        with self._connect() as connection:
+            # Write lock is taken at once not to fail on lock upgrade.
+            connection.execute('BEGIN IMMEDIATE')
+
+            try:
+                yield connection
+
+            except BaseException:
+                connection.execute('ROLLBACK')
+                raise
+
+            connection.execute('COMMIT')
+
+    def fill(self, torrents: dict[str, dict]) -> int:
+        """Puts torrents pages checks into the queue. Returns the number of checks.
+
+        :param torrents: registered torrents data indexed with hashes
+
+        """
+        by_urls = torrents_urls(torrents)
+
+        with self._transaction() as connection:
+            connection.executemany(
+                'INSERT OR REPLACE INTO checks (url, torrents) VALUES (?, ?)',
+                (
+                    (url, json.dumps({hash_str: torrents[hash_str] for hash_str in hashes}))
+                    for url, hashes in by_urls.items()
+                )
+            )
+
+        return len(by_urls)
+
+    def lease(self, limit: int) -> dict[str, dict]:
+        """Leases checks, including those with leases expired. Returns torrents data indexed with hashes.
+
+        :param limit: maximum number of checks (torrent pages) to lease
+
+        """
+        now = time()
+        torrents = {}
+
+        with self._transaction() as connection:
+            rows = connection.execute(
+                'SELECT url, torrents, owner FROM checks WHERE done = 0 AND lease_until < ? ORDER BY url LIMIT ?',
+                (now, limit)
+            ).fetchall()
+
+            for url, url_torrents, owner in rows:
+                if owner:
+                    LOGGER.info(f'Reclaiming `{url}` check from `{owner}`')
+
+                torrents.update(json.loads(url_torrents))
+
+            connection.executemany(
+                'UPDATE checks SET owner = ?, lease_until = ? WHERE url = ?',
+                ((self.owner, now + self.lease_time, url) for url, *_ in rows)
+            )
+
+        return torrents
+
+    def heartbeat(self) -> int:
+        """Prolongs leases held. Returns the number of checks leased.
+        Leases already expired are not prolonged.
+
+        """
+        now = time()
+
+        with self._transaction() as connection:
+            return connection.execute(
+                'UPDATE checks SET lease_until = ? WHERE owner = ? AND done = 0 AND lease_until >= ?',
+                (now + self.lease_time, self.owner, now)
+            ).rowcount
+
+    def confirm(self, url: str) -> bool:
+        """Confirms the lease for a check is still held, prolonging it.
+        Should be called right before results are applied.
+
+        :param url: torrent page URL
+
+        """
+        now = time()
+
+        with self._transaction() as connection:
+            return connection.execute(
+                'UPDATE checks SET lease_until = ? WHERE url = ? AND owner = ? AND done = 0 AND lease_until >= ?',
+                (now + self.lease_time, url, self.owner, now)
+            ).rowcount == 1
+
+    def complete(self, url: str, result: dict):
+        """Marks a leased check as done storing its result.
+
+        :param url: torrent page URL
+        :param result: check result
+
+        """
+        with self._transaction() as connection:
+            connection.execute(
+                'UPDATE checks SET done = 1, result = ? WHERE url = ? AND owner = ?',
+                (json.dumps(result), url, self.owner)
+            )
+
+    def collect(self) -> list[dict]:
+        """Removes done checks from the queue and returns their results."""
+
+        with self._transaction() as connection:
+            rows = connection.execute('SELECT result FROM checks WHERE done = 1').fetchall()
+            connection.execute('DELETE FROM checks WHERE done = 1')
+
+        return [json.loads(result) for result, in rows]
+
+    def get_stats(self) -> dict[str, int]:
+        """Returns the numbers of checks: pending, leased (by live workers), done."""
+
+        with self._transaction() as connection:
+            pending, leased, done = connection.execute(
+                'SELECT '
+                'COALESCE(SUM(done = 0 AND lease_until < :now), 0), '
+                'COALESCE(SUM(done = 0 AND lease_until >= :now), 0), '
+                'COALESCE(SUM(done = 1), 0) '
+                'FROM checks',
+                {'now': time()}
+            ).fetchone()
+
+        return {'pending': pending, 'leased': leased, 'done': done}
+
+
+def torrents_urls(torrents: dict[str, dict]) -> dict[str, list[str]]:
+    """Returns torrents hashes indexed by torrent page URLs.
+
+    :param torrents: torrents data indexed with hashes
+
+    """
+    by_urls: dict[str, list[str]] = {}
+
+    for hash_str, torrent in torrents.items():
+        by_urls.setdefault(torrent.get('url') or hash_str, []).append(hash_str)
+
+    return by_urls
+
+
+def get_check_results(
+        torrents: dict[str, dict],
+        progress: WalkProgress
+) -> Generator[tuple[str, dict], None, None]:
+    """Yields torrent page URLs and checks results for them.
+
+    :param torrents: leased torrents data indexed with hashes
+    :param progress:
+
+    """
+    for url, hashes in torrents_urls(torrents).items():
+        yield url, {
+            'hashes': hashes,
+            'updated': {hash_str: progress.updated[hash_str] for hash_str in hashes if hash_str in progress.updated},
+            'failed': {hash_str: progress.failed[hash_str] for hash_str in hashes if hash_str in progress.failed},
+        }
+
+
+def work(
+        queue: WorkQueue,
+        *,
+        batch: int = 16,
+        remove_outdated: bool = True,
+        pipeline: dict | None = None,
+        poll_interval: float = 10
+) -> int:
+    """Leases and performs torrent pages checks till the queue is empty.
+    Returns the number of checks performed.
+
+    :param queue:
+    :param batch: number of checks to lease at once
+    :param remove_outdated: flag to remove outdated torrents from torrent clients
+    :param pipeline: walk pipeline settings (stages concurrency, etc.). See WalkPipeline.
+    :param poll_interval: seconds to wait before checking for expired leases
+        when all remaining checks are leased by other workers
+
+    """
+    checked = 0
+    stopped = Event()
+
+    def beat():
+        while not stopped.wait(queue.lease_time / 3):
+            queue.heartbeat()
+
+    heart = Thread(target=propagate(beat), name='torrt-heartbeat', daemon=True)
+    heart.start()
+
+    try:
+        with config.deferred():
+
+            while True:
+                torrents = queue.lease(batch)
+
+                if not torrents:
+                    if not queue.get_stats()['leased']:
+                        break
+
+                    # Wait for other workers to finish or for their leases to expire.
+                    sleep(poll_interval)
+                    continue
+
+                with span('work_batch', worker=queue.owner, checks=len(torrents)):
+                    checked += work_batch(queue, torrents, remove_outdated=remove_outdated, pipeline=pipeline)
+
+    finally:
+        stopped.set()
+        TRACER.flush()
+
+    LOGGER.info(f'Worker `{queue.owner}` performed {checked} check(s)')
+
+    return checked
+
+
+def work_batch(
+        queue: WorkQueue,
+        torrents: dict[str, dict],
+        *,
+        remove_outdated: bool = True,
+        pipeline: dict | None = None
+) -> int:
+    """Performs leased torrent pages checks. Returns the number of checks performed.
+
+    :param queue:
+    :param torrents: leased torrents data indexed with hashes
+    :param remove_outdated: flag to remove outdated torrents from torrent clients
+    :param pipeline: walk pipeline settings (stages concurrency, etc.). See WalkPipeline.
+
+    """
+    progress = WalkProgress()
+    done = set()
+
+    def complete(urls: set[str]):
+        for url, result in get_check_results(torrents, progress):
+            if url in urls and url not in done:
+                queue.complete(url, result)
+                done.add(url)
+
+    for job in WalkPipeline.from_settings(pipeline).run(torrents, progress=progress):
+        progress.succeed(job)
+
+        # Queued checks are indexed by URLs from configuration, whereas URLs
+        # from torrent comments are used by walk jobs.
+        urls = {torrents[rpc_torrent['hash']].get('url') or rpc_torrent['hash'] for _, rpc_torrent in job.torrents}
+
+        if not all(queue.confirm(url) for url in urls):
+            # The lease has expired and the check may be reclaimed by another worker.
+            LOGGER.warning(f'  Lease for `{job.url}` check is lost. Skipped')
+            done.update(urls)
+            continue
+
+        # Outdated torrents are reported in check results (see `updated`)
+        # and are unregistered by the coordinator (see collect()).
+        apply_walk_job(job, remove_outdated=remove_outdated, updated=progress.updated)
+
+        # Mark as done right away not to be applied again.
+        complete(urls)
+
+    complete(set(torrents_urls(torrents)))
+
+    return len(done)
+
+
+def walk(queue: WorkQueue, *, forced: bool = False):
+    """Coordinates a distributed walk: saves results of checks performed by workers
+    into configuration file and puts new checks into the queue when the previous ones are done.
+
+    :param queue:
+    :param forced: flag not to count walk interval setting
+
+    """
+    LOGGER.info('Distributed torrent walk is triggered')
+
+    with config.deferred():
+        collect(queue)
+
+        stats = queue.get_stats()
+
+        if stats['pending'] or stats['leased']:
+            LOGGER.info(f"Previous walk is in progress: {stats['pending']} pending, {stats['leased']} leased")
+            return
+
+        started = start_walk(forced=forced)
+
+        if started is None:
+            return
+
+        cfg, _, _ = started
+        progress = make_walk_progress(cfg)
+
+        torrents = {
+            hash_str: torrent
+            for hash_str, torrent in cfg['torrents'].items()
+            if not progress.is_postponed(hash_str)
+        }
+
+        num = queue.fill(torrents)
+        config.update({'time_last_check': int(time())})
+
+    LOGGER.info(f'{num} check(s) are put into the queue')
+
+
+def collect(queue: WorkQueue):
+    """Saves results of checks performed by workers into configuration file.
+
+    :param queue:
+
+    """
+    results = queue.collect()
+
+    if not results:
+        return
+
+    cfg = config.load()
+    progress = make_walk_progress(cfg)
+
+    for result in results:
+        progress.updated.update(result['updated'])
+        progress.failed.update(result['failed'])
+
+        for hash_str in result['hashes']:
+            if hash_str in progress.failures:
+                progress.recovered.add(hash_str)
+
+    # Outdated torrents.
+    for hash_str in progress.updated:
+        unregister_torrent(hash_str)
+
+    LOGGER.info(f'Collected {len(results)} check(s) result(s), {len(progress.updated)} torrent(s) updated')
+
+    # Walk time is counted from the moment checks are put into the queue.
+    finish_walk(cfg, progress.updated, now=cfg['time_last_check'], full_check=False, progress=progress)
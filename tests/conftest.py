@@ -1,7 +1,43 @@
+from copy import deepcopy
+from time import sleep
+
 import pytest
 
+from torrt.base_rpc import BaseRPC
+from torrt.base_tracker import GenericPublicTracker
 from torrt.toolbox import bootstrap
-from torrt.utils import TorrtConfig
+from torrt.utils import RPCObjectsRegistry, TorrtConfig, TrackerObjectsRegistry, make_response
+
+TORRENT_TWO_HASH = '65f491bbdef45a26388a9337a91826a75c4c59fb'
+
+
+class PipeTracker(GenericPublicTracker):
+
+    alias = 'pipe.local'
+    active = False  # Not to be registered globally.
+
+    def get_download_link(self, url):
+        return f'{url}/dl'
+
+
+class PipeRPC(BaseRPC):
+
+    alias = 'pipe'
+
+    def __init__(self, torrents: list[dict]):
+        self.enabled = True
+        self.torrents = torrents
+        self.added = []
+        super().__init__()
+
+    def method_get_torrents(self, hashes: list[str] | None = None):
+        return [torrent for torrent in self.torrents if torrent['hash'] in hashes]
+
+    def method_add_torrent(self, torrent, *, download_to='', params=None):
+        self.added.append(torrent.url)
+
+    def method_remove_torrent(self, hash_str, *, with_data=False):
+        pass
 
 
 @pytest.fixture(autouse=True)
@@ -21,7 +57,8 @@ def mock_config(monkeypatch):
 
         @classmethod
         def bootstrap(cls):
-            cls.save(cls._basic_settings)
+            if not settings:
+                cls.save(deepcopy(cls._basic_settings))
 
         @classmethod
         def save(cls, settings_dict: dict):
@@ -32,8 +69,59 @@ def mock_config(monkeypatch):
             cls.bootstrap()
             return settings
 
+        @classmethod
+        def load_cached(cls) -> dict:
+            return cls.load()
+
     monkeypatch.setattr('torrt.toolbox.config', MockConfig)
     monkeypatch.setattr('torrt.utils.config', MockConfig)
     monkeypatch.setattr('torrt.utils.TorrtConfig', MockConfig)
 
     return settings
+
+
+@pytest.fixture
+def torrent_two_hash() -> str:
+    """Info hash of `torr_two.torrent` data fixture."""
+    return TORRENT_TWO_HASH
+
+
+@pytest.fixture
+def pipe_env(monkeypatch, datafix_dir):
+    """Public tracker `pipe.local` with pages served after a short delay
+    and a factory of torrents known to two RPCs.
+
+    """
+    torrent_data = (datafix_dir / 'torr_two.torrent').read_bytes()
+
+    def get(session, url, **kwargs):
+        sleep(0.01)
+        if url.endswith('/dl'):
+            return make_response(url, torrent_data)
+        return make_response(url, b'<html><title>Some</title></html>', encoding='utf-8')
+
+    monkeypatch.setattr('torrt.utils.Session.get', get)
+
+    tracker = PipeTracker()
+    monkeypatch.setattr(TrackerObjectsRegistry, '_items', {'pipe.local': tracker})
+
+    def make_torrents(num: int, *, url: str = 'http://pipe.local/{idx}') -> dict[str, dict]:
+        torrents = {
+            f'{idx:040}': {'url': url.format(idx=idx), 'page': {}}
+            for idx in range(num)
+        }
+
+        def get_rpc_torrents():
+            return [
+                {'hash': hash_str, 'name': hash_str, 'comment': data['url'], 'download_to': None}
+                for hash_str, data in torrents.items()
+            ]
+
+        monkeypatch.setattr(RPCObjectsRegistry, '_items', {
+            'one': PipeRPC(get_rpc_torrents()),
+            'two': PipeRPC(get_rpc_torrents()),
+        })
+
+        return torrents
+
+    return tracker, make_torrents
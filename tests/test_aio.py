@@ -0,0 +1,240 @@
+import asyncio
+from collections import Counter
+from time import sleep
+
+import pytest
+
+from torrt.base_rpc import BaseRPC
+from torrt.base_tracker import GenericPublicTracker
+from torrt.cassettes import PLAYER
+from torrt.pipeline import WalkProgress
+from torrt.utils import RPCObjectsRegistry, TrackerObjectsRegistry, config
+
+aiohttp = pytest.importorskip('aiohttp')
+
+from aiohttp import web  # noqa: E402
+
+from torrt import aio  # noqa: E402
+
+TORRENT_TWO_HASH = '65f491bbdef45a26388a9337a91826a75c4c59fb'
+
+
+class AioTracker(GenericPublicTracker):
+
+    alias = '127.0.0.1'
+    active = False  # Not to be registered globally.
+
+    def get_download_link(self, url):
+        return f'{url}/dl'
+
+
+class AioRPC(BaseRPC):
+
+    alias = 'aio'
+
+    def __init__(self, torrents: list[dict]):
+        self.enabled = True
+        self.torrents = torrents
+        self.added = []
+        self.removed = []
+        super().__init__()
+
+    def method_get_torrents(self, hashes: list[str] | None = None):
+        return [torrent for torrent in self.torrents if torrent['hash'] in hashes]
+
+    def method_add_torrent(self, torrent, *, download_to='', params=None):
+        self.added.append(torrent.hash)
+
+    def method_remove_torrent(self, hash_str, *, with_data=False):
+        self.removed.append(hash_str)
+
+
+def run_with_server(datafix_dir, func):
+    torrent_data = (datafix_dir / 'torr_two.torrent').read_bytes()
+    requested = []
+
+    async def handle(request):
+        requested.append(request.path)
+        await asyncio.sleep(0.01)
+
+        if request.path.endswith('/dl'):
+            return web.Response(body=torrent_data)
+
+        if request.path == '/json':
+            return web.json_response({'a': 1})
+
+        return web.Response(text='<html><title>Some</title></html>', content_type='text/html')
+
+    async def main():
+        app = web.Application()
+        app.router.add_get('/{tail:.*}', handle)
+
+        runner = web.AppRunner(app)
+        await runner.setup()
+
+        site = web.TCPSite(runner, '127.0.0.1', 0)
+        await site.start()
+
+        port = site._server.sockets[0].getsockname()[1]
+
+        try:
+            return await func(f'http://127.0.0.1:{port}')
+
+        finally:
+            await runner.cleanup()
+
+    return asyncio.run(main()), requested
+
+
+@pytest.fixture
+def aio_env(monkeypatch):
+    monkeypatch.setattr(TrackerObjectsRegistry, '_items', {'127.0.0.1': AioTracker()})
+
+    def make_torrents(base_url: str, num: int) -> tuple[dict[str, dict], AioRPC]:
+        torrents = {
+            f'{idx:040}': {'hash': f'{idx:040}', 'url': f'{base_url}/{idx}', 'page': {}}
+            for idx in range(num)
+        }
+        rpc = AioRPC([
+            {'hash': hash_str, 'name': hash_str, 'comment': data['url'], 'download_to': None}
+            for hash_str, data in torrents.items()
+        ])
+        monkeypatch.setattr(RPCObjectsRegistry, '_items', {'aio': rpc})
+
+        return torrents, rpc
+
+    return make_torrents
+
+
+def test_client(datafix_dir):
+
+    async def check(base_url):
+        async with aio.AsyncHttpClient(json=True) as client:
+            assert await client.request(f'{base_url}/json') == {'a': 1}
+
+            response = await client.request(f'{base_url}/1', json=False)
+            assert response.ok
+            assert response.text == '<html><title>Some</title></html>'
+
+            # Port 1 is not expected to be listened to.
+            assert await client.request('http://127.0.0.1:1/', silence_exceptions=True) is None
+            assert client.last_error
+
+            with pytest.raises(aiohttp.ClientError):
+                await client.request('http://127.0.0.1:1/')
+
+    run_with_server(datafix_dir, check)
+
+
+def test_client_cassette(datafix_dir, tmp_path):
+    urls = []
+
+    async def record(base_url):
+        urls.append(base_url)
+        PLAYER.insert(tmp_path, record=True)
+
+        async with aio.AsyncHttpClient() as client:
+            assert (await client.request(f'{base_url}/1')).text == '<html><title>Some</title></html>'
+
+    async def replay():
+        PLAYER.insert(tmp_path, latency=True)
+
+        async with aio.AsyncHttpClient() as client:
+            response = await client.request(f'{urls[0]}/1')
+            assert response.text == '<html><title>Some</title></html>'
+            assert response.encoding == 'utf-8'
+
+            with pytest.raises(aiohttp.ClientConnectionError):
+                await client.request(f'{urls[0]}/2')
+
+    try:
+        _, requested = run_with_server(datafix_dir, record)
+        # The server is stopped.
+        asyncio.run(replay())
+
+    finally:
+        PLAYER.eject()
+
+    assert requested == ['/1']
+
+
+def test_update_torrents(datafix_dir, aio_env):
+    rpc = None
+
+    async def check(base_url):
+        nonlocal rpc
+        torrents, rpc = aio_env(base_url, 10)
+        return await aio.update_torrents(torrents, concurrency=4)
+
+    updated, requested = run_with_server(datafix_dir, check)
+
+    assert len(updated) == 10
+    assert len(requested) == 20  # Pages and .torrent files.
+    assert rpc.added == [TORRENT_TWO_HASH] * 10
+    assert len(rpc.removed) == 10
+
+
+def test_update_torrents_concurrent(datafix_dir, aio_env, monkeypatch):
+    # More pages in flight than tracker pages caches hold.
+    monkeypatch.setattr(AioTracker, 'pages_cache_size', 2)
+    monkeypatch.setattr('torrt.base_tracker._OFFLINE_TRACKERS', {})
+    TrackerObjectsRegistry.get('127.0.0.1').pages.size = 2
+
+    def get_download_link(self, url):
+        # Slow extraction lets other extractions in.
+        sleep(0.01)
+        self.get_page(url)
+        return f'{url}/dl'
+
+    monkeypatch.setattr(AioTracker, 'get_download_link', get_download_link)
+
+    async def check(base_url):
+        torrents, _ = aio_env(base_url, 100)
+        return await aio.update_torrents(torrents, concurrency=100)
+
+    updated, requested = run_with_server(datafix_dir, check)
+
+    assert len(updated) == 100
+    # Every page is fetched once.
+    assert set(Counter(requested).values()) == {1}
+    assert len(requested) == 200
+
+
+def test_update_torrents_error(datafix_dir, aio_env, monkeypatch):
+    rpc = None
+
+    def get_download_link(self, url):
+        if url.endswith('/1'):
+            raise AttributeError('changed')
+        return f'{url}/dl'
+
+    monkeypatch.setattr(AioTracker, 'get_download_link', get_download_link)
+
+    progress = WalkProgress()
+
+    async def check(base_url):
+        nonlocal rpc
+        torrents, rpc = aio_env(base_url, 5)
+        return await aio.update_torrents(torrents, concurrency=2, progress=progress)
+
+    updated, _ = run_with_server(datafix_dir, check)
+
+    # Other torrents are updated.
+    assert len(updated) == 4
+    assert progress.failed == {f'{1:040}': "AttributeError('changed')"}
+
+
+def test_walk(datafix_dir, aio_env):
+    rpc = None
+
+    async def check(base_url):
+        nonlocal rpc
+        torrents, rpc = aio_env(base_url, 3)
+        config.update({'torrents': torrents})
+        await aio.walk(forced=True)
+
+    run_with_server(datafix_dir, check)
+
+    assert len(rpc.added) == 3
+    # Outdated torrents are replaced with the updated one.
+    assert list(config.load()['torrents']) == [TORRENT_TWO_HASH]
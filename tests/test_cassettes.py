@@ -0,0 +1,92 @@
+import pytest
+
+from torrt.cassettes import PLAYER, Cassette, CassetteMiss
+from torrt.utils import HttpClient
+
+
+@pytest.fixture
+def player():
+    yield PLAYER
+    PLAYER.eject()
+
+
+def test_record_replay(response_mock, player, tmp_path):
+    client = HttpClient(silence_exceptions=True)
+
+    player.insert(tmp_path, record=True)
+
+    with response_mock([
+        'GET https://some.url/topic -> 200:<title>topic</title>',
+        'POST https://some.url/login -> 403:denied',
+    ]):
+        assert client.request('https://some.url/topic').text == '<title>topic</title>'
+        assert client.request('https://some.url/login', data={'user': 'me'}).status_code == 403
+
+    assert len((tmp_path / 'interactions.jsonl').read_text().splitlines()) == 2
+    assert len(list((tmp_path / 'bodies').iterdir())) == 2
+
+    # No network access from here on: responses mock would fail on unknown URLs.
+    player.insert(tmp_path)
+
+    with response_mock([]):
+        client = HttpClient(silence_exceptions=True)
+
+        response = client.request('https://some.url/topic')
+        assert response.status_code == 200
+        assert response.text == '<title>topic</title>'
+        assert response.headers['Content-Type'] == 'text/plain'
+
+        response = client.request('https://some.url/login', data={'user': 'me'})
+        assert response.status_code == 403
+        assert response.text == 'denied'
+
+        assert client.request('https://some.url/other') is None
+        assert 'No recorded response for GET https://some.url/other' in client.last_error
+
+    player.eject()
+
+    with response_mock('GET https://some.url/topic -> 200:live'):
+        assert client.request('https://some.url/topic').text == 'live'
+
+
+def test_replay_cookies(player, tmp_path):
+    cassette = Cassette(tmp_path, record=True)
+    cassette.add(
+        'POST', 'https://some.url/login', 'user=me',
+        status=200, reason='OK', headers=[('Set-Cookie', 'sid=123; path=/')], content=b'ok', elapsed=0.1)
+
+    player.insert(tmp_path)
+
+    client = HttpClient()
+    client.request('https://some.url/login', data={'user': 'me'})
+
+    assert client.session.cookies['sid'] == '123'
+
+
+def test_order(tmp_path):
+    cassette = Cassette(tmp_path, record=True)
+
+    for idx, body in enumerate(['a', 'b', 'a', 'a']):
+        cassette.add(
+            'POST', 'https://some.url/rpc', body,
+            status=200 + idx, reason='', headers=[], content=f'{idx}'.encode(), elapsed=0)
+
+    cassette = Cassette(tmp_path)
+
+    def find(body):
+        interaction, content = cassette.find('POST', 'https://some.url/rpc', body)
+        return interaction['status'], content
+
+    # Responses for the same request are replayed in order, the last one is reused.
+    assert find('a') == (200, b'0')
+    assert find('b') == (201, b'1')
+    assert find('b') == (201, b'1')
+    assert find('a') == (202, b'2')
+    assert find('a') == (203, b'3')
+    assert find('a') == (203, b'3')
+
+    # Unknown body: matched by URL.
+    assert find('c')[0] == 200
+
+    with pytest.raises(CassetteMiss):
+        cassette.find('GET', 'https://some.url/rpc', None)
@@ -9,12 +9,14 @@ from torrt.main import process_commands
     (['list_rpc'], ['utorrent\t status=unconfigured']),
     (['list_trackers'], ['rutracker.org']),
     (['list_torrents'], ['Loading configuration']),
+    (['list_torrents', '--failing'], ['Loading configuration']),
     (['list_notifiers'], ['email\t status=unconfigured']),
     (['configure_tracker', 'some', 'username=a', 'password=b'], ['Tracker `some` is unknown']),
     (['configure_rpc', 'other', 'host=a', 'password=b'], ['RPC `other` is unknown']),
     (['configure_notifier', 'else', 'token=a', 'chat_id=b'], ['Notifier `else` is unknown']),
     (['configure_bot', 'boooot', 'token=a'], ['Bot `boooot` is unknown']),
     (['walk', '-f', '--dump', '/tmp/'], ['Torrent walk is finished']),
+    (['walk', '-f', '--budget', '1m'], ['Torrent walk is finished']),
     (['set_walk_interval', '1'], ['Saving configuration file']),
     (['enable_rpc', 'a'], ['RPC `a` class is not registered']),
     (['disable_rpc', 'a'], ['RPC `a` class is not registered']),
@@ -32,3 +34,11 @@ def test_smoke(caplog, command, expected):
     messages = caplog.text
     for expected_chunk in expected:
         assert expected_chunk in messages, f'NOT FOUND {expected_chunk} in {messages}'
+
+
+def test_walk_queue_budget(tmp_path, capsys):
+    with pytest.raises(SystemExit):
+        process_commands(['walk', '--queue', f"{tmp_path / 'queue.sqlite'}", '--budget', '15m'])
+
+    assert '--budget is not supported with --queue' in capsys.readouterr().err
+    assert not (tmp_path / 'queue.sqlite').exists()
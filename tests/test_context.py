@@ -0,0 +1,90 @@
+import gzip
+import os
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from multiprocessing import get_context
+from threading import Thread
+
+from torrt.context import get_run_context, init_process, propagate, run_context
+from torrt.dumping import DUMPER
+from torrt.tracing import TRACER, get_current_span, span
+from torrt.utils import GlobalParam, dump_contents
+
+
+def test_params():
+    with run_context(dump_into='/tmp/a') as context:
+        assert GlobalParam.get('dump_into') == '/tmp/a'
+        assert context.dumper is DUMPER
+
+        GlobalParam.set('other', 1)
+
+        with run_context(dump_into='/tmp/b'):
+            assert GlobalParam.get('dump_into') == '/tmp/b'
+            assert GlobalParam.get('other') == 1
+
+        assert GlobalParam.get('dump_into') == '/tmp/a'
+
+        thread = Thread(target=propagate(lambda: GlobalParam.set('from_thread', get_run_context())))
+        thread.start()
+        thread.join()
+
+        # Threads share the context propagated.
+        assert GlobalParam.get('from_thread') is context
+
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            futures = [executor.submit(propagate(GlobalParam.get), 'dump_into') for _ in range(4)]
+            assert [future.result() for future in futures] == ['/tmp/a'] * 4
+            # Not propagated.
+            assert executor.submit(GlobalParam.get, 'dump_into').result() is None
+
+    assert GlobalParam.get('dump_into') is None
+
+
+def test_tracing(tmp_path):
+    TRACER.enable(tmp_path / 'trace.jsonl')
+
+    try:
+        with span('walk') as walk_span:
+            results = []
+            thread = Thread(target=propagate(lambda: results.append(get_current_span())))
+            thread.start()
+            thread.join()
+
+        assert results == [walk_span]
+
+    finally:
+        TRACER.disable()
+
+
+def test_process(tmp_path):
+    dump_path = tmp_path / 'dumps'
+    DUMPER.enable(dump_path, compress='gzip')
+
+    try:
+        with run_context(dump_into='/tmp/a') as context:
+            snapshot = context.snapshot()
+
+        assert snapshot == {
+            'params': {'dump_into': '/tmp/a'},
+            'dump': {'path': f'{dump_path}', 'compress': 'gzip', 'sample': ''},
+        }
+
+        with ProcessPoolExecutor(
+            max_workers=1,
+            mp_context=get_context('spawn'),
+            max_tasks_per_child=2,  # Exits right after the dump.
+            initializer=init_process,
+            initargs=(snapshot,),
+        ) as executor:
+            assert executor.submit(GlobalParam.get, 'dump_into').result() == '/tmp/a'
+            # Big enough not to be written in time by the writer thread only.
+            contents = os.urandom(10_000_000)
+            executor.submit(dump_contents, 'some.html', contents, url='http://some.local/a').result()
+
+    finally:
+        DUMPER.disable()
+
+    # Written on the worker exit.
+    files = list(dump_path.iterdir())
+    assert len(files) == 1
+    assert files[0].name.startswith('some.local_0000001_')
+    assert gzip.decompress(files[0].read_bytes()) == contents
@@ -0,0 +1,43 @@
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+import pytest
+
+from torrt.dates import parse_datetime, parse_human_datetime
+
+
+@pytest.mark.parametrize('dt_str,fmt,expected', [
+    ('17 Апр 2015 17:50:51', '%d %b %Y %H:%M:%S', datetime(2015, 4, 17, 17, 50, 51)),
+    ('17 апреля 2015 17:50', '%d %B %Y %H:%M', datetime(2015, 4, 17, 17, 50)),
+    ('5 Sep 2020', '%d %b %Y', datetime(2020, 9, 5)),
+    ('2020-09-05', '%Y-%m-%d', datetime(2020, 9, 5)),
+    ('17 Бла 2015', '%d %b %Y', None),
+    ('', '%d %b %Y', None),
+])
+def test_parse_datetime(dt_str, fmt, expected):
+    assert parse_datetime(dt_str, fmt) == expected
+
+
+@pytest.mark.parametrize('dt_str,expected', [
+    ('16 мая 2015 в 18:00', datetime(2015, 5, 16, 18, 0)),
+    ('16 мая 2015', datetime(2015, 5, 16)),
+    ('1 Dec. 2019, 08:15:20', datetime(2019, 12, 1, 8, 15, 20)),
+    ('16.05.2015 18:00', datetime(2015, 5, 16, 18, 0)),
+    ('сегодня в 18:00', datetime(2021, 3, 10, 18, 0)),
+    ('Вчера в 12:31', datetime(2021, 3, 9, 12, 31)),
+    ('yesterday at 10:00', datetime(2021, 3, 9, 10, 0)),
+    ('31 фев 2015', None),
+    ('когда-то', None),
+    ('', None),
+])
+def test_parse_human_datetime(dt_str, expected):
+    assert parse_human_datetime(dt_str, now=datetime(2021, 3, 10, 7, 0, 15)) == expected
+
+
+def test_threads():
+    dt_strings = [f'{day} Апр 2015 17:50:51' for day in range(1, 29)] * 20
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        results = list(executor.map(lambda dt_str: parse_datetime(dt_str, '%d %b %Y %H:%M:%S'), dt_strings))
+
+    assert [dt.day for dt in results] == [int(dt_str.split(' ')[0]) for dt_str in dt_strings]
@@ -0,0 +1,132 @@
+import gzip
+from threading import Event
+
+import pytest
+
+from torrt.dumping import DUMPER, Dumper, Sampler
+from torrt.exceptions import TorrtException
+from torrt.main import process_commands
+from torrt.utils import HttpClient
+
+
+@pytest.fixture
+def dumper(tmp_path):
+    yield DUMPER
+    DUMPER.disable()
+
+
+def test_sampler():
+    sample = Sampler('errors')
+    assert not sample('a', 200)
+    assert sample('a', 404)
+    assert sample('a', 503)
+
+    sample = Sampler('first:2')
+    assert [sample('a', 200) for _ in range(3)] == [True, True, False]
+    assert sample('b', 200)
+
+    assert all(Sampler('100%')('a', 200) for _ in range(10))
+    assert not any(Sampler('0%')('a', 200) for _ in range(10))
+    assert Sampler('')('a', 500)
+
+    with pytest.raises(TorrtException):
+        Sampler('some')
+
+
+def test_dump(response_mock, dumper, tmp_path):
+    client = HttpClient(silence_exceptions=True, dump_fname_tpl='%(ts)s_Some.html')
+
+    with response_mock([
+        'GET https://some.url/a -> 200:aaa',
+        'GET https://other.url:8080/b -> 404:bbb',
+    ]):
+        # Not enabled.
+        client.request('https://some.url/a')
+        assert not (tmp_path / 'dumps').exists()
+
+        dumper.enable(tmp_path / 'dumps')
+
+        for _ in range(3):
+            client.request('https://some.url/a')
+        client.request('https://other.url:8080/b')
+
+        dumper.flush()
+
+        files = sorted((tmp_path / 'dumps').iterdir())
+        assert len(files) == 4
+        assert files[0].name.startswith('other.url_8080_0000004_')
+        assert files[1].name.startswith('some.url_0000001_')
+        assert files[1].name.endswith('_Some.html')
+        assert files[1].read_bytes() == b'aaa'
+
+        dumper.enable(tmp_path / 'errors', sample='errors', compress='gzip')
+        client.request('https://some.url/a')
+        client.request('https://other.url:8080/b')
+        dumper.disable()
+
+    files = list((tmp_path / 'errors').iterdir())
+    assert len(files) == 1
+    assert files[0].name.endswith('_Some.html.gz')
+    assert gzip.decompress(files[0].read_bytes()) == b'bbb'
+
+
+def test_compress_unsupported(dumper, tmp_path):
+    with pytest.raises(TorrtException):
+        dumper.enable(tmp_path, compress='lzma')
+
+    assert not dumper.enabled
+
+
+def test_queue_bytes(tmp_path, monkeypatch):
+    monkeypatch.setattr(Dumper, 'queue_bytes', 10)
+    dumper = Dumper()
+    dumper.enable(tmp_path)
+
+    written = Event()
+    writing = Event()
+
+    def compress(data):
+        # Holds the writer.
+        writing.set()
+        written.wait(5)
+        return data
+
+    dumper._compress = compress
+
+    try:
+        dumper.add('a', b'1' * 20)  # Oversized is let through when nothing is queued.
+        writing.wait(5)
+        dumper.add('b', b'2')  # Queue is "full".
+        assert dumper.dropped == 1
+
+    finally:
+        written.set()
+        dumper.disable()
+
+    dumper.enable(tmp_path)
+
+    try:
+        for idx in range(10):
+            dumper.add(f'{idx}', b'1' * 5)
+        dumper.flush()
+
+    finally:
+        dumper.disable()
+
+    assert dumper._queued_bytes == 0
+
+
+def test_dump_on_failure(dumper, tmp_path, monkeypatch):
+
+    def run_command(args):
+        dumper.add('some.html', b'some')
+        raise TorrtException('bogus')
+
+    monkeypatch.setattr('torrt.main.run_command', run_command)
+
+    with pytest.raises(TorrtException):
+        process_commands(['walk', '--dump', f'{tmp_path / "dumps"}'])
+
+    # Pending responses are written.
+    assert not dumper.enabled
+    assert len(list((tmp_path / 'dumps').iterdir())) == 1
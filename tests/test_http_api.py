@@ -0,0 +1,218 @@
+from http import HTTPStatus
+from threading import Event, Thread
+from time import sleep
+
+import pytest
+import requests
+
+from torrt.bots.http_api import HttpApiBot
+from torrt.toolbox import get_registered_torrents, register_torrent
+from torrt.utils import TorrentData
+
+HASH = 'c815be93f20bf8b12fed14bee35c14b19b1d1984'
+
+HEADERS = {
+    'host': '127.0.0.1:8787',
+    'authorization': 'Bearer secret',
+    'content-type': 'application/json',
+}
+
+
+@pytest.fixture
+def bot(mock_config):
+
+    def dispatch(method, path, *, body=b'', headers=None):
+        return bot_obj.dispatch(method, path, headers={**HEADERS, **(headers or {})}, body=body)
+
+    bot_obj = HttpApiBot(port=0, token='secret')
+    bot_obj.call = dispatch
+
+    return bot_obj
+
+
+def test_status(bot):
+    status, data = bot.call('GET', '/status')
+    assert status == HTTPStatus.OK
+    assert data['torrents'] == 0
+    assert not data['walk']['running']
+
+    assert bot.call('GET', '/unknown') == (HTTPStatus.NOT_FOUND, {'error': 'Not found'})
+    assert bot.call('DELETE', '/status/') == (HTTPStatus.NOT_FOUND, {'error': 'Not found'})
+
+
+def test_auth(bot):
+    assert bot.call('GET', '/status', headers={'authorization': ''})[0] == HTTPStatus.UNAUTHORIZED
+    assert bot.call('GET', '/status', headers={'authorization': 'Bearer other'})[0] == HTTPStatus.UNAUTHORIZED
+    assert bot.call('GET', '/status')[0] == HTTPStatus.OK
+
+    # Token is required for TCP listeners.
+    bot.token = ''
+    assert bot.call('GET', '/status', headers={'authorization': 'Bearer '})[0] == HTTPStatus.UNAUTHORIZED
+
+    # But not for Unix sockets.
+    bot.socket = '/tmp/torrt.sock'
+    assert bot.call('GET', '/status', headers={'authorization': '', 'host': 'torrt'})[0] == HTTPStatus.OK
+
+
+def test_cross_site(bot):
+    for host in ('localhost', 'localhost:8787', '[::1]:8787', '127.0.0.1'):
+        assert bot.call('GET', '/status', headers={'host': host})[0] == HTTPStatus.OK
+
+    # DNS rebinding.
+    assert bot.call('GET', '/torrents', headers={'host': 'evil.example.com:8787'})[0] == HTTPStatus.FORBIDDEN
+    assert bot.call('GET', '/torrents', headers={'host': ''})[0] == HTTPStatus.FORBIDDEN
+
+    # Requests from web pages.
+    for origin in ('https://evil.example.com', 'null'):
+        assert bot.call('GET', '/torrents', headers={'origin': origin})[0] == HTTPStatus.FORBIDDEN
+
+    assert bot.call('GET', '/torrents', headers={'origin': 'http://localhost:8787'})[0] == HTTPStatus.OK
+
+    # Simple (not preflighted) requests.
+    for content_type in ('text/plain', 'application/x-www-form-urlencoded', ''):
+        status, _ = bot.call(
+            'POST', '/torrents', body=b'{"url": "https://some.url/1"}', headers={'content-type': content_type})
+        assert status == HTTPStatus.UNSUPPORTED_MEDIA_TYPE
+
+        assert bot.call('POST', '/walk', headers={'content-type': content_type})[0] == HTTPStatus.UNSUPPORTED_MEDIA_TYPE
+
+    assert not bot.walk_state.running
+
+
+def test_token_generated(mock_config):
+    bot = HttpApiBot(host='127.0.0.1', port=0)
+    server = bot.make_server()
+    server.server_close()
+
+    assert len(bot.token) > 20
+    assert mock_config['bots']['http']['token'] == bot.token
+
+
+def test_torrents(bot):
+    assert bot.call('POST', '/torrents/register', body=b'{') == (HTTPStatus.BAD_REQUEST, {'error': 'Invalid JSON'})
+    assert bot.call('POST', '/torrents/register', body=b'[]')[0] == HTTPStatus.BAD_REQUEST
+    assert bot.call('POST', '/torrents/register', body=b'{}')[0] == HTTPStatus.BAD_REQUEST
+
+    status, data = bot.call(
+        'POST', '/torrents/register', body=f'{{"hash": "{HASH}", "url": "https://some.url/1"}}'.encode())
+    assert status == HTTPStatus.CREATED
+    assert data == {'hash': HASH}
+
+    status, data = bot.call('GET', '/torrents')
+    assert status == HTTPStatus.OK
+    assert data[HASH]['url'] == 'https://some.url/1'
+
+    assert bot.call('DELETE', '/torrents/unknown')[0] == HTTPStatus.NOT_FOUND
+
+    bot.walk_state.running = True
+    assert bot.call('DELETE', f'/torrents/{HASH}')[0] == HTTPStatus.CONFLICT
+    assert bot.call('POST', '/walk')[0] == HTTPStatus.CONFLICT
+    assert HASH in get_registered_torrents()
+
+    bot.walk_state.running = False
+    assert bot.call('DELETE', f'/torrents/{HASH}?with_data=1') == (HTTPStatus.OK, {'hash': HASH})
+    assert not get_registered_torrents()
+
+
+def test_add(bot, monkeypatch):
+    resolving = Event()
+    resolved = Event()
+    added = []
+
+    def get_torrent_from_url(url):
+        resolving.set()
+        resolved.wait(5)
+        return TorrentData(hash=HASH, name='one', url=url)
+
+    class RPC:
+
+        def method_add_torrent(self, torrent, *, download_to='', params=None):
+            added.append((torrent.url, download_to, params))
+
+    monkeypatch.setattr('torrt.bots.http_api.get_torrent_from_url', get_torrent_from_url)
+    monkeypatch.setattr('torrt.bots.http_api.iter_rpc', lambda: [('some', RPC())])
+    monkeypatch.setattr('torrt.bots.http_api.walk', lambda **kwargs: None)
+
+    results = []
+    body = b'{"url": "https://some.url/1", "download_to": "/here", "params": {"a": 1}}'
+    thread = Thread(target=lambda: results.append(bot.call('POST', '/torrents', body=body)))
+    thread.start()
+
+    assert resolving.wait(5)
+
+    # A slow tracker doesn't block walks.
+    assert not bot.walk_state.lock.locked()
+    assert bot.call('POST', '/walk')[0] == HTTPStatus.ACCEPTED
+
+    resolved.set()
+    thread.join()
+
+    assert results == [(HTTPStatus.CREATED, {'hash': HASH, 'name': 'one'})]
+    assert added == [('https://some.url/1', '/here', {'a': 1})]
+    assert get_registered_torrents()[HASH]['url'] == 'https://some.url/1'
+
+
+def test_add_failed(bot, monkeypatch):
+    monkeypatch.setattr('torrt.bots.http_api.get_torrent_from_url', lambda url: None)
+
+    assert bot.call('POST', '/torrents', body=b'{}')[0] == HTTPStatus.BAD_REQUEST
+
+    status, data = bot.call('POST', '/torrents', body=b'{"url": "https://some.url/1"}')
+    assert status == HTTPStatus.UNPROCESSABLE_ENTITY
+    assert 'https://some.url/1' in data['error']
+
+
+def test_walk(bot, monkeypatch):
+    calls = []
+    monkeypatch.setattr('torrt.bots.http_api.walk', lambda **kwargs: calls.append(kwargs))
+
+    assert bot.call('POST', '/walk', body=b'{"budget": "bogus"}')[0] == HTTPStatus.BAD_REQUEST
+
+    status, data = bot.call('POST', '/walk', body=b'{"budget": "2m"}')
+    assert status == HTTPStatus.ACCEPTED
+    assert data['running']
+
+    for _ in range(100):
+        if not bot.walk_state.running:
+            break
+        sleep(0.05)
+
+    assert calls == [{'forced': True, 'silent': True, 'budget': 120}]
+    assert not bot.walk_state.running
+    assert bot.walk_state.time_finished
+
+
+def test_server(bot):
+    register_torrent(HASH, url='https://some.url/1')
+
+    server = bot.make_server()
+    thread = Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+
+    try:
+        url = f'http://127.0.0.1:{server.server_address[1]}'
+
+        with requests.Session() as session:
+            response = session.get(f'{url}/torrents')
+            assert response.status_code == HTTPStatus.UNAUTHORIZED
+
+            session.headers['Authorization'] = 'Bearer secret'
+
+            response = session.get(f'{url}/torrents')
+            assert response.status_code == HTTPStatus.OK
+            assert list(response.json()) == [HASH]
+
+            # Keep-alive connection is reused.
+            response = session.delete(f'{url}/torrents/{HASH}')
+            assert response.json() == {'hash': HASH}
+
+            response = session.post(f'{url}/torrents/register', data='{')
+            assert response.status_code == HTTPStatus.UNSUPPORTED_MEDIA_TYPE
+
+            response = session.post(
+                f'{url}/torrents/register', data='{', headers={'Content-Type': 'application/json'})
+            assert response.status_code == HTTPStatus.BAD_REQUEST
+
+    finally:
+        server.shutdown()
+        server.server_close()
@@ -16,9 +16,10 @@ from torrt.toolbox import (
     get_registered_torrents,
     remove_torrent,
     toggle_rpc,
+    update_torrents,
     walk,
 )
-from torrt.utils import RPCObjectsRegistry, TorrentData, TorrtConfig
+from torrt.utils import RPCObjectsRegistry, TorrentData, TorrtConfig, TrackerObjectsRegistry
 
 CURRENT_DIR = Path(__file__).parent
 
@@ -117,11 +118,17 @@ def test_fullcycle(monkeypatch, datafix_dir):
             self.url = url
             self.data = data
             self.ok = True
+            self.status_code = 200
+            self.headers = {}
 
         @property
         def content(self):
             return self.data
 
+        @property
+        def text(self):
+            return self.data.decode(errors='replace')
+
     patch_requests(torrent_one_data)
 
     monkeypatch.setattr('torrt.utils.config', DummyConfig)
@@ -169,3 +176,52 @@ def test_fullcycle(monkeypatch, datafix_dir):
 
     finally:
         RPCObjectsRegistry._items = rpc_old
+
+
+def test_update_torrents_bulk_hashes(monkeypatch, datafix_dir):
+
+    torrent_one_hash = 'c815be93f20bf8b12fed14bee35c14b19b1d1984'
+    torrent_one_data = (datafix_dir / 'torr_one.torrent').read_bytes()
+
+    def fail_request(*args, **kwargs):
+        raise AssertionError('Unexpected page request')
+
+    monkeypatch.setattr('torrt.utils.Session.get', fail_request)
+    monkeypatch.setattr(
+        DummyTracker, 'get_info_hashes',
+        lambda self, urls: dict.fromkeys(urls, torrent_one_hash))
+
+    rpc_dummy = DummyRPC(enabled=True)
+    rpc_dummy.method_add_torrent(TorrentData(raw=torrent_one_data))
+
+    monkeypatch.setattr(RPCObjectsRegistry, '_items', {'dummy': rpc_dummy})
+    monkeypatch.setattr(TrackerObjectsRegistry, '_items', {'dummy.local': DummyTracker()})
+
+    updated = update_torrents({torrent_one_hash: {'url': 'http://dummy-a.local/id/one', 'page': {}}})
+
+    assert not updated
+    assert torrent_one_hash in rpc_dummy.torrents
+
+
+def test_update_torrents_feeds(monkeypatch, datafix_dir):
+
+    torrent_one_hash = 'c815be93f20bf8b12fed14bee35c14b19b1d1984'
+    torrent_one_data = (datafix_dir / 'torr_one.torrent').read_bytes()
+
+    def fail_request(*args, **kwargs):
+        raise AssertionError('Unexpected page request')
+
+    monkeypatch.setattr('torrt.utils.Session.get', fail_request)
+    monkeypatch.setattr(DummyTracker, 'get_feed_ids', lambda self: {'two'})
+
+    rpc_dummy = DummyRPC(enabled=True)
+    rpc_dummy.method_add_torrent(TorrentData(raw=torrent_one_data))
+
+    monkeypatch.setattr(RPCObjectsRegistry, '_items', {'dummy': rpc_dummy})
+    monkeypatch.setattr(TrackerObjectsRegistry, '_items', {'dummy.local': DummyTracker()})
+
+    updated = update_torrents(
+        {torrent_one_hash: {'url': 'http://dummy-a.local/id/one', 'page': {}}}, use_feeds=True)
+
+    assert not updated
+    assert torrent_one_hash in rpc_dummy.torrents
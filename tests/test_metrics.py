@@ -0,0 +1,100 @@
+import json
+
+import pytest
+
+from torrt.base_tracker import GenericPublicTracker
+from torrt.exceptions import TorrtTrackerOfflineException
+from torrt.metrics import METRICS, Metrics
+from torrt.toolbox import register_torrent, walk
+from torrt.utils import config
+
+
+def test_metrics():
+    metrics = Metrics()
+    metrics.increment('some_total', host='a')
+    metrics.increment('some_total', 2, host='a')
+    metrics.set('some_gauge', 5)
+    metrics.observe('some_seconds', 0.007, host='a"b')
+    metrics.observe('some_seconds', 100, host='a"b')
+
+    with pytest.raises(ValueError, match='bogus'), metrics.timed('other_seconds', errors='other_errors', op='x'):
+        raise ValueError('bogus')
+
+    text = metrics.to_prometheus()
+
+    assert '# TYPE some_total counter\nsome_total{host="a"} 3' in text
+    assert 'some_gauge 5' in text
+    assert 'some_seconds_bucket{host="a\\"b",le="0.005"} 0\n' in text
+    assert 'some_seconds_bucket{host="a\\"b",le="0.01"} 1\n' in text
+    assert 'some_seconds_bucket{host="a\\"b",le="60"} 1\n' in text
+    assert 'some_seconds_bucket{host="a\\"b",le="+Inf"} 2\n' in text
+    assert 'some_seconds_count{host="a\\"b"} 2\n' in text
+    assert 'other_errors{op="x"} 1' in text
+    assert 'other_seconds_count{op="x"} 1' in text
+
+    summary = metrics.get_summary()
+    assert summary['some_total'] == [{'host': 'a', 'value': 3}]
+    assert summary['some_seconds'][0]['count'] == 2
+    assert summary['some_seconds'][0]['max'] == 100
+
+    metrics.reset()
+    assert not metrics.get_summary()
+
+
+def test_walk_metrics(pipe_env, tmp_path):
+    _, make_torrents = pipe_env
+    torrents = make_torrents(3)
+
+    for hash_str, data in torrents.items():
+        register_torrent(hash_str, url=data['url'])
+
+    textfile = tmp_path / 'torrt.prom'
+    summary = tmp_path / 'torrt.json'
+
+    config.update({'metrics': {'textfile': f'{textfile}', 'summary': f'{summary}'}})
+
+    walk(forced=True)
+
+    text = textfile.read_text()
+    assert 'torrt_walk_phase_seconds_count{phase="fetch",tracker="pipe.local"} 3' in text
+    assert 'torrt_walk_phase_seconds_count{phase="apply",tracker="pipe.local"} 3' in text
+    assert 'torrt_tracker_call_seconds_count{operation="get_torrent_meta",tracker="pipe.local"} 3' in text
+    assert 'torrt_tracker_call_seconds_count{operation="fetch_torrent_file",tracker="pipe.local"} 3' in text
+    assert 'torrt_http_requests_total{host="pipe.local",status="200"} 6' in text
+    assert 'torrt_walk_torrents_total{result="updated"} 3' in text
+
+    summary = json.loads(summary.read_text())
+    rpc_calls = {(item['rpc'], item['method']): item['count'] for item in summary['torrt_rpc_call_seconds']}
+    assert rpc_calls[('pipe', 'method_get_torrents')] == 2
+    assert rpc_calls[('pipe', 'method_add_torrent')] == 6
+
+
+def test_tracker_operations():
+
+    class OpsTracker(GenericPublicTracker):
+
+        alias = 'ops.local'
+        active = False  # Not to be registered globally.
+
+        def get_torrent_meta(self, url, **kwargs):
+            if self.offline:
+                raise TorrtTrackerOfflineException('login')
+            return None
+
+    class OpsChildTracker(OpsTracker):
+
+        def get_torrent_meta(self, url, **kwargs):
+            return super().get_torrent_meta(url, **kwargs)
+
+    METRICS.reset()
+    tracker = OpsChildTracker()
+
+    tracker.get_torrent_meta('http://ops.local/1')
+    handled, _ = OpsChildTracker.extract_offline({}, 'http://ops.local/1', b'')
+    assert not handled
+
+    # Nested and offline calls are not recorded.
+    (calls,) = METRICS.get_summary()['torrt_tracker_call_seconds']
+    assert calls['operation'] == 'get_torrent_meta'
+    assert calls['count'] == 1
+    assert 'torrt_tracker_errors_total' not in METRICS.get_summary()
@@ -0,0 +1,374 @@
+from collections import Counter
+from threading import Lock, Thread
+from time import sleep
+
+import pytest
+
+from torrt.base_tracker import GenericPublicTracker
+from torrt.exceptions import TorrtException, TorrtTrackerException
+from torrt.pipeline import (
+    BytesBudget,
+    WalkJob,
+    WalkPipeline,
+    WalkProgress,
+    get_rpc_torrents,
+    make_walk_jobs,
+    order_walk_jobs,
+)
+from torrt.toolbox import get_failing_torrents, register_torrent, walk
+from torrt.trackers.rutracker import RuTrackerTracker
+from torrt.utils import Session, TrackerObjectsRegistry, config, make_response
+
+
+class ProcessPipeTracker(GenericPublicTracker):
+
+    alias = 'pipe.local'
+    active = False  # Not to be registered globally.
+
+    def get_download_link(self, url):
+        return f'{url}/dl'
+
+
+def test_bytes_budget():
+    budget = BytesBudget(10)
+    budget.acquire(8)
+
+    acquired = []
+    thread = Thread(target=lambda: acquired.append(budget.acquire(5)))
+    thread.start()
+    sleep(0.05)
+
+    assert not acquired  # Waits for a release.
+
+    budget.release(8)
+    thread.join(1)
+
+    assert acquired
+    assert budget.used == 5
+
+    # Oversized item is let through when nothing is held.
+    budget.release(5)
+    budget.acquire(100)
+    assert budget.used == 100
+
+    budget.resize(100, 3)
+    assert budget.used == 3
+
+
+def test_pipeline(pipe_env, torrent_two_hash):
+    _, make_torrents = pipe_env
+    torrents = make_torrents(20)
+
+    pipeline = WalkPipeline(fetch_workers=4, extract_workers=2, download_workers=3, queue_size=2)
+    jobs = list(pipeline.run(torrents))
+
+    # One job per page for both RPCs.
+    assert len(jobs) == 20
+    assert {job.url for job in jobs} == {data['url'] for data in torrents.values()}
+
+    for job in jobs:
+        assert job.result.hash == torrent_two_hash
+        assert len(job.torrents) == 2
+
+    assert pipeline.downloads_budget.used == 0
+
+
+def test_pipeline_settings():
+    assert WalkPipeline.from_settings(None).fetch_workers == 4
+    assert WalkPipeline.from_settings({'fetch_workers': 8}).fetch_workers == 8
+
+    with pytest.raises(TorrtException, match='fetch_worker, queue'):
+        WalkPipeline.from_settings({'fetch_worker': 8, 'queue': 2, 'queue_size': 2})
+
+
+def test_pipeline_backpressure(pipe_env, monkeypatch):
+    _, make_torrents = pipe_env
+    torrents = make_torrents(100)
+
+    get = Session.get
+    requested = Counter()
+
+    def get_counted(session, url, **kwargs):
+        requested[url] += 1
+        return get(session, url, **kwargs)
+
+    monkeypatch.setattr('torrt.utils.Session.get', get_counted)
+
+    urls = []
+
+    # Pages wait for the slow consumer more than the tracker caches.
+    for job in WalkPipeline().run(torrents):
+        urls.append(job.url)
+        sleep(0.005)
+
+    assert len(urls) == 100
+    # Every page is fetched once.
+    assert all(requested[url] == 1 for url in urls)
+
+
+def test_pipeline_bytes_limit(pipe_env, monkeypatch):
+    tracker, make_torrents = pipe_env
+    torrents = make_torrents(5)
+
+    fetch_torrent_file = tracker.fetch_torrent_file
+    in_flight = {'now': 0, 'max': 0}
+    lock = Lock()
+
+    def fetch_torrent_file_counted(torrent):
+        with lock:
+            in_flight['now'] += 1
+            in_flight['max'] = max(in_flight['max'], in_flight['now'])
+        try:
+            sleep(0.01)
+            return fetch_torrent_file(torrent)
+        finally:
+            with lock:
+                in_flight['now'] -= 1
+
+    monkeypatch.setattr(tracker, 'fetch_torrent_file', fetch_torrent_file_counted)
+
+    pipeline = WalkPipeline(download_bytes_limit=1, download_workers=4)
+
+    for job in pipeline.run(torrents):
+        assert pipeline.downloads_budget.used == len(job.result.raw)
+
+    assert pipeline.downloads_budget.used == 0
+
+    # Downloads in flight are limited too.
+    assert in_flight['max'] == 1
+
+
+def test_pipeline_error(pipe_env, monkeypatch):
+    tracker, make_torrents = pipe_env
+    torrents = make_torrents(10)
+
+    get_torrent_meta = tracker.get_torrent_meta
+    fetch_torrent_file = tracker.fetch_torrent_file
+
+    def get_torrent_meta_failing(url, **kwargs):
+        if url.endswith('/1'):
+            raise TorrtTrackerException('bogus')
+        return get_torrent_meta(url, **kwargs)
+
+    def fetch_torrent_file_failing(torrent):
+        if torrent.url.endswith('/2'):
+            raise AttributeError('changed')
+        return fetch_torrent_file(torrent)
+
+    monkeypatch.setattr(tracker, 'get_torrent_meta', get_torrent_meta_failing)
+    monkeypatch.setattr(tracker, 'fetch_torrent_file', fetch_torrent_file_failing)
+
+    progress = WalkProgress()
+    pipeline = WalkPipeline(download_bytes_limit=1)
+    jobs = list(pipeline.run(torrents, progress=progress))
+
+    # Other jobs are finished.
+    assert len(jobs) == 8
+    assert progress.failed == {
+        f'{1:040}': "TorrtTrackerException('bogus')",
+        f'{2:040}': "AttributeError('changed')",
+    }
+    assert pipeline.downloads_budget.used == 0
+
+
+def test_pipeline_processes(pipe_env, monkeypatch, torrent_two_hash):
+    _, make_torrents = pipe_env
+    torrents = make_torrents(4)
+
+    # Tracker class is to be importable in worker processes.
+    monkeypatch.setattr(TrackerObjectsRegistry, '_items', {'pipe.local': ProcessPipeTracker()})
+
+    jobs = list(WalkPipeline(extract_processes=2).run(torrents))
+
+    assert len(jobs) == 4
+
+    for job in jobs:
+        assert job.result.hash == torrent_two_hash
+        assert job.result.page.title == 'Some'
+
+
+def test_pipeline_processes_rutracker(pipe_env, monkeypatch, datafix_dir, torrent_two_hash):
+    _, make_torrents = pipe_env
+    torrents = make_torrents(4, url='https://rutracker.org/forum/viewtopic.php?t={idx}')
+
+    torrent_data = (datafix_dir / 'torr_two.torrent').read_bytes()
+    posted = {}
+
+    def get(session, url, **kwargs):
+        topic_id = url.rsplit('=', 1)[-1]
+        page = (
+            f"<html><head><title>Topic {topic_id}</title>"
+            f"<script>var BB = {{\n\tform_token: 'token{topic_id}',\n}};</script></head>"
+            f'<body><a href="dl.php?t={topic_id}">Download</a></body></html>'
+        )
+        return make_response(url, page.encode(), encoding='utf-8')
+
+    def post(session, url, **kwargs):
+        posted[url] = kwargs['data']
+        return make_response(url, torrent_data)
+
+    monkeypatch.setattr('torrt.utils.Session.get', get)
+    monkeypatch.setattr('torrt.utils.Session.post', post)
+
+    tracker = RuTrackerTracker()
+    tracker.mirror_picked = 'rutracker.org'
+    monkeypatch.setattr(tracker, 'get_info_hashes', lambda urls: {})
+    monkeypatch.setattr(TrackerObjectsRegistry, '_items', {tracker.alias: tracker})
+
+    jobs = list(WalkPipeline(extract_processes=2, extract_workers=2).run(torrents))
+
+    assert len(jobs) == 4
+
+    for job in jobs:
+        assert job.result.hash == torrent_two_hash
+
+    # Every download is made with a token from its own page.
+    assert posted == {
+        f'https://rutracker.org/forum/dl.php?t={idx}': {'form_token': f'token{idx}'}
+        for idx in range(4)
+    }
+
+
+def test_order_walk_jobs():
+    jobs = [WalkJob(url, None) for url in ('http://a/3', 'http://a/1', 'http://a/2')]
+
+    def urls(cursor):
+        return [job.url for job in order_walk_jobs(jobs, cursor=cursor)]
+
+    assert urls('') == ['http://a/1', 'http://a/2', 'http://a/3']
+    assert urls('http://a/1') == ['http://a/2', 'http://a/3', 'http://a/1']
+    assert urls('http://a/3') == ['http://a/1', 'http://a/2', 'http://a/3']
+    # Cursor page may be gone.
+    assert urls('http://a/15') == ['http://a/2', 'http://a/3', 'http://a/1']
+
+
+def test_pipeline_budget(pipe_env, monkeypatch):
+    _, make_torrents = pipe_env
+    torrents = make_torrents(5)
+
+    checks = []
+
+    def expired(self):
+        checks.append(1)
+        return len(checks) > 2
+
+    monkeypatch.setattr(WalkProgress, 'expired', expired)
+
+    def walk(progress):
+        checks.clear()
+        return sorted(job.url for job in WalkPipeline().run(torrents, progress=progress))
+
+    progress = WalkProgress(cursor='http://pipe.local/1', budget=10)
+
+    assert walk(progress) == ['http://pipe.local/2', 'http://pipe.local/3']
+    assert progress.cursor == 'http://pipe.local/3'
+    assert not progress.complete
+
+    # Resumed with a round-robin.
+    assert walk(progress) == ['http://pipe.local/0', 'http://pipe.local/4']
+    assert progress.cursor == 'http://pipe.local/0'
+
+    monkeypatch.setattr(WalkProgress, 'expired', lambda self: False)
+
+    assert len(walk(progress)) == 5
+    assert progress.complete
+    assert progress.cursor == ''
+
+
+def test_walk_progress_failures(monkeypatch):
+    monkeypatch.setattr('torrt.pipeline.time', lambda: 1000)
+
+    progress = WalkProgress(
+        failures={
+            'a': {'count': 1, 'time_last': 900, 'error': 'x'},
+            'b': {'count': 3, 'time_last': 900, 'error': 'x'},
+            'c': {'count': 5, 'time_last': 0, 'error': 'x'},
+        },
+        backoff=100,
+        dormant_threshold=5,
+    )
+    assert progress.get_time_next_check('a') == 1000
+    assert progress.get_time_next_check('b') == 1300
+    assert progress.get_time_next_check('d') == 0
+
+    assert not progress.is_postponed('a')
+    assert progress.is_postponed('b')
+    assert progress.is_postponed('c')
+    assert progress.is_dormant('c')
+    assert not progress.is_postponed('d')
+
+
+def test_make_walk_jobs_unchanged(pipe_env, monkeypatch):
+    _, make_torrents = pipe_env
+    torrents = make_torrents(3)
+    hashes = list(torrents)
+
+    failure = {'count': 1, 'time_last': 0, 'error': 'x'}
+    progress = WalkProgress(failures=dict.fromkeys(hashes, failure))
+
+    # Unchanged according to a bulk lookup and a feed.
+    monkeypatch.setattr('torrt.pipeline.get_info_hashes_from_urls', lambda urls: {'http://pipe.local/0': hashes[0]})
+    monkeypatch.setattr('torrt.pipeline.get_feeds_unlisted_urls', lambda urls, feeds: {'http://pipe.local/1'})
+
+    jobs = make_walk_jobs(torrents, get_rpc_torrents(torrents), use_feeds=True, progress=progress)
+
+    assert [job.url for job in jobs] == ['http://pipe.local/2']
+    # Failures of skipped torrents are forgotten.
+    assert progress.recovered == {hashes[0], hashes[1]}
+
+
+def test_walk_failures(pipe_env, monkeypatch):
+    tracker, make_torrents = pipe_env
+    torrents = make_torrents(3)
+    failing_hash = f'{1:040}'
+
+    for hash_str, data in torrents.items():
+        register_torrent(hash_str, url=data['url'])
+
+    get_torrent_meta = tracker.get_torrent_meta
+    checked = []
+
+    def get_torrent_meta_failing(url, **kwargs):
+        checked.append(url)
+        if url.endswith('/1'):
+            return None
+        return get_torrent_meta(url, **kwargs)
+
+    monkeypatch.setattr(tracker, 'get_torrent_meta', get_torrent_meta_failing)
+    # Torrents are kept registered, to be checked again.
+    monkeypatch.setattr('torrt.toolbox.unregister_torrent', lambda hash_str: None)
+
+    walk(forced=True)
+
+    assert len(checked) == 3
+    failure = config.load()['torrents_failures'][failing_hash]
+    assert failure['count'] == 1
+    assert failure['error'] == 'Unable to get torrent data from page'
+
+    failing = get_failing_torrents()
+    assert list(failing) == [failing_hash]
+    assert not failing[failing_hash]['dormant']
+
+    # Postponed.
+    checked.clear()
+    walk(forced=True)
+    assert len(checked) == 2
+
+    # Backoff is passed, recovered.
+    config.update({'torrents_failures': {failing_hash: {'time_last': 0}}})
+    monkeypatch.setattr(tracker, 'get_torrent_meta', get_torrent_meta)
+    walk(forced=True)
+
+    assert not config.load()['torrents_failures']
+
+    # Dormant.
+    config.update({'torrents_failures': {failing_hash: {'count': 10, 'time_last': 0, 'error': 'x'}}})
+    assert get_failing_torrents()[failing_hash]['dormant']
+    monkeypatch.setattr(tracker, 'get_torrent_meta', get_torrent_meta_failing)
+    checked.clear()
+    walk(forced=True)
+    assert len(checked) == 2
+
+    # Revived on registration.
+    register_torrent(failing_hash, url=torrents[failing_hash]['url'])
+    assert not get_failing_torrents()
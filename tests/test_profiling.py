@@ -0,0 +1,59 @@
+import logging
+import pstats
+import tracemalloc
+from threading import Thread
+
+import pytest
+
+from torrt.exceptions import TorrtException
+from torrt.main import process_commands
+from torrt.profiling import profiled
+
+
+def busy_in_thread():
+    return sum(range(1000))
+
+
+def test_profiled_cpu(tmp_path):
+
+    with profiled('cpu', name='some', into=tmp_path) as path:
+        thread = Thread(target=busy_in_thread)
+        thread.start()
+        thread.join()
+
+    assert path.name.startswith('torrt_some_')
+    assert path.suffix == '.pstats'
+
+    functions = {function for _, _, function in pstats.Stats(f'{path}').stats}
+    assert 'busy_in_thread' in functions
+
+
+def test_profiled_mem(tmp_path):
+
+    with profiled('mem', into=tmp_path) as path:
+        data = [f'{idx}' for idx in range(10000)]
+
+    assert data
+    assert not tracemalloc.is_tracing()
+
+    snapshot = tracemalloc.Snapshot.load(f'{path}')
+    assert any(stat.traceback[0].filename == __file__ for stat in snapshot.statistics('lineno'))
+
+
+def test_profiled_unknown(tmp_path):
+    with pytest.raises(TorrtException, match='Unsupported'), profiled('disk', into=tmp_path):
+        pass
+
+
+@pytest.mark.parametrize('kind,expected', [
+    ('cpu', 'CPU profile is written'),
+    ('mem', 'Top allocation sites'),
+])
+def test_profile_command(caplog, tmp_path, monkeypatch, kind, expected):
+    caplog.set_level(logging.INFO, logger='torrt')
+    monkeypatch.chdir(tmp_path)
+
+    process_commands(['list_trackers', '--profile', kind])
+
+    assert expected in caplog.text
+    assert len(list(tmp_path.glob('torrt_list_trackers_*'))) == 1
@@ -0,0 +1,132 @@
+import json
+
+import pytest
+
+from torrt.toolbox import register_torrent, walk
+from torrt.tracing import NOOP_SPAN, TRACER, get_current_span, span, start_span
+
+
+@pytest.fixture
+def trace_file(tmp_path):
+    path = tmp_path / 'trace.jsonl'
+    TRACER.enable(path)
+
+    def read() -> list[dict]:
+        TRACER.flush()
+        spans = []
+
+        for line in path.read_text().splitlines():
+            for resource_spans in json.loads(line)['resourceSpans']:
+                for scope_spans in resource_spans['scopeSpans']:
+                    spans.extend(scope_spans['spans'])
+
+        return spans
+
+    yield read
+
+    TRACER.disable()
+
+
+def test_disabled():
+    assert span('some') is NOOP_SPAN
+    assert start_span('some') is NOOP_SPAN
+
+    with span('some') as some:
+        some.set(a=1)
+        assert get_current_span() is NOOP_SPAN
+
+
+def test_spans(trace_file):
+
+    with span('outer', a=1) as outer:
+        outer.set(b=True)
+
+        with pytest.raises(ValueError, match='bogus'), span('inner', c='x'):
+            raise ValueError('bogus')
+
+        detached = start_span('detached', d=0.5)
+
+    with detached.activate():
+        assert get_current_span() is detached
+
+        with span('child'):
+            pass
+
+    detached.end()
+    detached.end()  # Ignored.
+
+    spans = {item['name']: item for item in trace_file()}
+    assert len(spans) == 4
+
+    outer = spans['outer']
+    assert 'parentSpanId' not in outer
+    assert outer['status'] == {'code': 1}
+    assert outer['attributes'] == [
+        {'key': 'a', 'value': {'intValue': '1'}},
+        {'key': 'b', 'value': {'boolValue': True}},
+    ]
+    assert int(outer['endTimeUnixNano']) >= int(outer['startTimeUnixNano'])
+
+    inner = spans['inner']
+    assert inner['parentSpanId'] == outer['spanId']
+    assert inner['traceId'] == outer['traceId']
+    assert inner['status']['code'] == 2
+    assert 'bogus' in inner['status']['message']
+
+    assert spans['detached']['parentSpanId'] == outer['spanId']
+    assert spans['detached']['attributes'] == [{'key': 'd', 'value': {'doubleValue': 0.5}}]
+    assert spans['child']['parentSpanId'] == spans['detached']['spanId']
+
+
+def test_walk_spans(pipe_env, trace_file):
+    _, make_torrents = pipe_env
+    torrents = make_torrents(2)
+
+    for hash_str, data in torrents.items():
+        register_torrent(hash_str, url=data['url'])
+
+    walk(forced=True)
+
+    spans = trace_file()
+    by_ids = {item['spanId']: item for item in spans}
+
+    def get_parent(item: dict) -> dict:
+        return by_ids[item['parentSpanId']]
+
+    (walk_span,) = [item for item in spans if item['name'] == 'walk']
+    topics = [item for item in spans if item['name'] == 'topic']
+
+    assert len(topics) == 2
+    assert all(get_parent(topic) is walk_span for topic in topics)
+    assert len({item['traceId'] for item in spans}) == 1
+
+    listing = [item for item in spans if item['name'] == 'rpc.method_get_torrents']
+    assert listing
+    assert all(get_parent(item) is walk_span for item in listing)
+
+    # Tracker operations called by pipeline stages.
+    for name in ('tracker.get_torrent_meta', 'tracker.fetch_torrent_file'):
+        operations = [item for item in spans if item['name'] == name]
+        assert len(operations) == 2
+        assert all(get_parent(item)['name'] == 'topic' for item in operations)
+
+    pages = [item for item in spans if item['name'] == 'get_page']
+    assert {get_parent(page)['name'] for page in pages} == {'topic', 'tracker.get_torrent_meta'}
+
+    # Pages fetched are then got from cache by extract stage.
+    cache_hits = [
+        attr['value']['boolValue'] for page in pages for attr in page['attributes'] if attr['key'] == 'cache_hit'
+    ]
+    assert sorted(cache_hits) == [False, False, True, True]
+
+    requests = [item for item in spans if item['name'] == 'http.request']
+    assert {get_parent(item)['name'] for item in requests} == {'get_page', 'tracker.fetch_torrent_file'}
+
+    attributes = {attr['key']: attr['value'] for attr in requests[0]['attributes']}
+    assert attributes['server.address'] == {'stringValue': 'pipe.local'}
+    assert attributes['http.response.status_code'] == {'intValue': '200'}
+    assert 'http.response.body.size' in attributes
+
+    added = [item for item in spans if item['name'] == 'rpc.method_add_torrent']
+    assert len(added) == 4
+    assert all(get_parent(item)['name'] == 'topic' for item in added)
@@ -1,5 +1,15 @@
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from threading import Lock, Thread
+from time import sleep, time
+
 import pytest
+from torrentool.api import Torrent
 
+from torrt.base_tracker import GenericPublicTracker, PagesCache, TorrentPage
+from torrt.trackers.eniahd import EniaHDTracker
+from torrt.trackers.nnmclub import NNMClubTracker
 from torrt.utils import TrackerObjectsRegistry, get_torrent_from_url
 
 NEED_SKIP = False
@@ -22,3 +32,205 @@ def test_trackers():
         for url in urls:
             torrent_data = get_torrent_from_url(url)
             assert torrent_data, f'{tracker_alias}: Unable to deal with test URL {url}'
+
+
+def test_pages_cache(monkeypatch):
+    cache = PagesCache(size=2, ttl=10)
+
+    for url in ('a', 'b'):
+        cache.add(TorrentPage(url, None))
+
+    assert cache.get('a').url == 'a'  # 'a' is now most recent
+
+    cache.add(TorrentPage('c', None))
+    assert cache.get('b') is None
+    assert cache.get('a')
+    assert cache.get('c')
+
+    page = cache.get('c')
+    monkeypatch.setattr(page, 'time_fetched', page.time_fetched - 11)
+    assert cache.get('c') is None
+
+    # Pinned pages are neither evicted nor expired.
+    pinned = TorrentPage('p', None)
+    monkeypatch.setattr(pinned, 'time_fetched', pinned.time_fetched - 11)
+
+    with cache.pinned(pinned):
+        for url in ('d', 'e', 'f'):
+            cache.add(TorrentPage(url, None))
+
+        assert cache.get('p') is pinned
+        assert cache.get('d') is None
+
+    assert cache.get('e') is None
+    assert cache.get('f')
+
+    # Expired when unpinned.
+    assert cache.get('p') is None
+
+
+def test_pages_concurrent(response_mock):
+    tracker = EniaHDTracker()
+    urls = [f'https://eniahd.com/viewtopic.php?t={idx}' for idx in range(20)]
+
+    with response_mock([
+        f'GET {url} -> 200:<title>topic {idx}</title><a href="dl.php?id={idx}">dl</a>'
+        for idx, url in enumerate(urls)
+    ]):
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            results = list(executor.map(
+                lambda url: (tracker.get_download_link(url), tracker.extract_page_title(url)), urls))
+
+    assert results == [
+        (f'https://eniahd.com/dl.php?id={idx}', f'topic {idx}')
+        for idx in range(20)
+    ]
+
+
+def test_login_single_flight(monkeypatch):
+    tracker = NNMClubTracker(username='user', password='pass')
+    attempts = []
+
+    def login(domain):
+        attempts.append(domain)
+        sleep(0.05)
+        return True
+
+    monkeypatch.setattr(tracker, '_login', login)
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        results = list(executor.map(tracker.login, ['nnmclub.to'] * 8))
+
+    assert all(results)
+    assert len(attempts) == 1
+    assert not tracker.session_expired()
+
+    # Session expired.
+    tracker.session_lifetime = 10
+    tracker.time_logged_in -= 20
+    tracker.time_login_attempt -= tracker.relogin_interval
+    assert tracker.session_expired()
+
+    assert tracker.login('nnmclub.to')
+    assert len(attempts) == 2
+    assert not tracker.session_expired()
+
+
+def test_session_cookies_expiry(monkeypatch):
+    now = int(time())
+
+    tracker = NNMClubTracker(
+        username='user',
+        password='pass',
+        cookies={'phpbb2mysql_4_sid': 'old', 'phpbb2mysql_4_data': 'data', 'gone': '1'},
+        cookies_expires={'phpbb2mysql_4_data': now + 60, 'gone': now - 60},
+    )
+    # Expired cookies are dropped.
+    assert tracker.cookies == {'phpbb2mysql_4_sid': 'old', 'phpbb2mysql_4_data': 'data'}
+    assert tracker.cookies_expires == {'phpbb2mysql_4_data': now + 60}
+
+    # Auth cookie is about to expire.
+    assert tracker.session_expired()
+
+    def login(domain):
+        # Short-lived cookies other than the auth one do not matter.
+        tracker.cookies_expires = {'phpbb2mysql_4_data': now + 3600, 'phpbb2mysql_4_sid': now + 60}
+        return True
+
+    monkeypatch.setattr(tracker, '_login', login)
+
+    pages = []
+    monkeypatch.setattr(tracker, 'get_response', lambda url, **kwargs: pages.append(url))
+
+    tracker.get_page('https://nnmclub.to/forum/viewtopic.php?t=1')
+
+    assert tracker.logged_in
+    assert not tracker.session_expired()
+    assert pages == ['https://nnmclub.to/forum/viewtopic.php?t=1']
+
+    # Auth cookie is unknown.
+    monkeypatch.setattr(tracker, 'auth_cookie_name', None)
+    assert tracker.get_session_expires() == 0
+
+
+class LocalTracker(GenericPublicTracker):
+
+    alias = '127.0.0.1'
+    active = False  # Not to be registered globally.
+
+    def get_download_link(self, url: str) -> str:
+        return f'{url}/dl'
+
+
+@pytest.fixture
+def local_tracker(datafix_dir):
+    """Serves topics pages and .torrent files (unique for every topic) on a local HTTP server."""
+
+    torrents = {}
+
+    for idx in range(200):
+        torrent = Torrent.from_file(datafix_dir / 'torr_two.torrent')
+        torrent.name = f'topic-{idx}'
+        torrents[f'/topic/{idx}'] = (torrent.to_string(), torrent.info_hash)
+
+    requested = Counter()
+    lock = Lock()
+
+    class Handler(BaseHTTPRequestHandler):
+
+        protocol_version = 'HTTP/1.1'
+        disable_nagle_algorithm = True
+
+        def log_message(self, format, *args):
+            pass
+
+        def do_GET(self):
+            path = self.path.removesuffix('/dl')
+            download = path != self.path
+
+            with lock:
+                requested['download' if download else path] += 1
+
+            if path == '/':
+                body = b'<html>index</html>'
+
+            elif download:
+                body = torrents[path][0]
+
+            else:
+                body = f'<html><title>{path}</title>{"<p>text</p>" * 500}</html>'.encode()
+
+            self.send_response(200)
+            self.send_header('Content-Length', f'{len(body)}')
+            self.end_headers()
+            self.wfile.write(body)
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    server.daemon_threads = True
+    Thread(target=server.serve_forever, daemon=True).start()
+
+    base_url = f'http://127.0.0.1:{server.server_address[1]}'
+
+    tracker = LocalTracker()
+    tracker.mirrors = [base_url.removeprefix('http://')]
+
+    yield tracker, {f'{base_url}{path}': info_hash for path, (_, info_hash) in torrents.items()}, requested
+
+    server.shutdown()
+
+
+def test_get_torrent_concurrent(local_tracker):
+    tracker, expected, requested = local_tracker
+
+    # Concurrent walk threads share a single tracker object.
+    with ThreadPoolExecutor(max_workers=16) as executor:
+        results = dict(zip(expected, executor.map(lambda url: tracker.get_torrent(url), expected), strict=True))
+
+    assert {url: torrent and torrent.hash for url, torrent in results.items()} == expected
+    assert all(torrent.url_file == f'{url}/dl' for url, torrent in results.items())
+
+    # Mirror is probed once.
+    assert requested['/'] == 1
+    assert requested['download'] == 200
+    assert all(requested[f'/topic/{idx}'] == 1 for idx in range(200))
+    assert tracker.client.last_error == ''
@@ -1,4 +1,12 @@
+import json
+import sys
+from threading import Thread
+
+import pytest
+from requests.cookies import RequestsCookieJar
+
 import torrt.utils as utils
+from torrt import toolbox
 from torrt.trackers.rutracker import RuTrackerTracker
 
 
@@ -25,5 +33,183 @@ def test_save_settings(mock_config):
         'username': 'user',
         'password': 'pass',
         'cookies': {},
+        'cookies_expires': {},
         'query_string': 'qs',
     }
+
+
+def test_config_deferred():
+    config = utils.TorrtConfig
+    config_file = config.USER_SETTINGS_FILE
+
+    with config.deferred():
+        RuTrackerTracker(username='user', password='pass').save_settings()
+        config.update({'walk_interval_hours': 5})
+
+        assert config.load()['trackers']['rutracker.org']['username'] == 'user'
+        assert 'rutracker.org' not in config_file.read_text()
+
+    settings = config.load()
+    assert settings['trackers']['rutracker.org']['username'] == 'user'
+    assert settings['walk_interval_hours'] == 5
+
+
+def test_config_deferred_concurrent():
+    config = utils.TorrtConfig
+    config_file = config.USER_SETTINGS_FILE
+    config.update({'torrents': {'a': {'hash': 'a'}, 'b': {'hash': 'b'}}})
+
+    with config.deferred():
+        config.update({'walk_interval_hours': 5, 'torrents': {'d': {'hash': 'd'}}})
+        config.drop_section('torrents', 'a')
+
+        # Changed by another process meanwhile.
+        settings = json.loads(config_file.read_text())
+        settings['torrents']['c'] = {'hash': 'c'}
+        settings['walk_interval_hours'] = 2
+        settings['full_check_interval_hours'] = 12
+        config_file.write_text(json.dumps(settings))
+
+    settings = config.load()
+    assert sorted(settings['torrents']) == ['b', 'c', 'd']
+    assert settings['walk_interval_hours'] == 5
+    assert settings['full_check_interval_hours'] == 12
+
+
+def test_config_cached():
+    config = utils.TorrtConfig
+    config_file = config.USER_SETTINGS_FILE
+
+    settings = config.load_cached()
+    assert config.load_cached() is settings
+
+    # Invalidated on write.
+    config.update({'walk_interval_hours': 5})
+    settings = config.load_cached()
+    assert settings['walk_interval_hours'] == 5
+    assert config.load_cached() is settings
+
+    # Changed by another process.
+    changed = json.loads(config_file.read_text())
+    changed['walk_interval_hours'] = 2
+    config_file.write_text(json.dumps(changed, indent=8))
+    assert config.load_cached()['walk_interval_hours'] == 2
+
+    with config.deferred():
+        config.update({'walk_interval_hours': 3})
+        assert config.load_cached()['walk_interval_hours'] == 3
+
+    assert config.load_cached()['walk_interval_hours'] == 3
+
+
+def test_split_cookie_jar():
+    jar = RequestsCookieJar()
+    jar.set('session', 'abc', expires=1700000000)
+    jar.set('lang', 'ru')
+
+    assert utils.split_cookie_jar(jar) == ({'session': 'abc', 'lang': 'ru'}, {'session': 1700000000})
+    assert utils.split_cookie_jar({'lang': 'ru'}) == ({'lang': 'ru'}, {})
+
+
+def test_get_info_hash_from_magnet():
+    get_hash = utils.get_info_hash_from_magnet
+
+    assert get_hash('') == ''
+    assert get_hash('magnet:?dn=some') == ''
+    assert get_hash(
+        'magnet:?xt=urn:btih:8DB224FD90238B067E35CEF6EDB5EF0B0CD56FC7&tr=http://some'
+    ) == '8db224fd90238b067e35cef6edb5ef0b0cd56fc7'
+    # base32 form
+    assert get_hash(
+        'magnet:?xt=urn:btih:RXZCJ7MQEOFQM7RVZ33O3NPPBMGNK36H'
+    ) == '8df224fd90238b067e35cef6edb5ef0b0cd56fc7'
+
+
+def test_get_links_from_feed():
+    assert utils.get_links_from_feed(b'garbage') == []
+
+    assert utils.get_links_from_feed(
+        b'<?xml version="1.0"?><feed xmlns="http://www.w3.org/2005/Atom">'
+        b'<entry><link href="https://some.local/topic?t=1"/></entry>'
+        b'<entry><title>nolink</title></entry>'
+        b'</feed>'
+    ) == ['https://some.local/topic?t=1']
+
+
+def test_parse_duration():
+    assert utils.parse_duration('90') == 90
+    assert utils.parse_duration('30s') == 30
+    assert utils.parse_duration('15m') == 900
+    assert utils.parse_duration(' 2H ') == 7200
+
+    with pytest.raises(ValueError, match='Unsupported'):
+        utils.parse_duration('m')
+
+    with pytest.raises(ValueError, match='Negative'):
+        utils.parse_duration('-5m')
+
+
+def test_registry_concurrent():
+    registry = utils.ObjectsRegistry()
+
+    class Item:
+        def __init__(self, alias):
+            self.alias = alias
+
+    registry.add(Item('first'))
+    items = registry.get()
+
+    # Items got are not changed by additions.
+    registry.add(Item('second'))
+    assert list(items) == ['first']
+    assert list(registry.get()) == ['first', 'second']
+
+
+def test_http_client_thread_local(response_mock):
+    client = utils.HttpClient(silence_exceptions=True)
+    client.last_error = 'main'
+
+    with response_mock('GET https://some.url -> 200:ok'):
+        thread = Thread(target=client.request, args=('https://some.url',))
+        thread.start()
+        thread.join()
+
+    assert client.last_error == 'main'
+    assert client.last_response is None
+
+
+def test_hits_counter_concurrent():
+    counter = utils.HitsCounter()
+
+    def register():
+        for idx in range(20000):
+            counter.register(('tracker', 'title'), hit=bool(idx % 2))
+
+    threads = [Thread(target=register) for _ in range(8)]
+
+    # Frequent threads switches make lost increments likely.
+    switch_interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+
+    try:
+        for thread in threads:
+            thread.start()
+
+        for thread in threads:
+            thread.join()
+
+    finally:
+        sys.setswitchinterval(switch_interval)
+
+    assert counter._counter == {('tracker', 'title', True): 80000, ('tracker', 'title', False): 80000}
+    assert counter.get_rates() == {('tracker', 'title'): 0.5}
+
+
+def test_tunnel(monkeypatch):
+    monkeypatch.setattr(toolbox, 'environ', {'TORRT_TUNNEL': 'local'})
+    monkeypatch.setattr(utils.HttpClient, 'proxies', {})
+
+    toolbox.tunnel()
+
+    assert toolbox.environ == {'TORRT_TUNNEL': 'local'}
+    assert utils.HttpClient.proxies == {'http': 'socks5://127.0.0.1:9150', 'https': 'socks5://127.0.0.1:9150'}
@@ -0,0 +1,93 @@
+from threading import Thread
+
+from torrt.toolbox import register_torrent
+from torrt.utils import RPCObjectsRegistry, config
+from torrt.workqueue import WorkQueue, collect, walk, work
+
+
+def test_leases(tmp_path, monkeypatch):
+    path = tmp_path / 'queue.sqlite'
+    torrents = {f'{idx:040}': {'url': f'http://some.local/{idx}'} for idx in range(5)}
+    torrents['x' * 40] = {'url': 'http://some.local/1'}  # Same page.
+
+    queue_a = WorkQueue(path, owner='a')
+    queue_b = WorkQueue(path, owner='b')
+
+    assert queue_a.fill(torrents) == 5
+    assert queue_a.get_stats() == {'pending': 5, 'leased': 0, 'done': 0}
+
+    leased_a = queue_a.lease(2)
+    assert set(leased_a) == {f'{0:040}', f'{1:040}', 'x' * 40}
+
+    leased_b = queue_b.lease(10)
+    assert len(leased_b) == 3
+    assert not queue_b.lease(10)
+
+    assert queue_a.get_stats() == {'pending': 0, 'leased': 5, 'done': 0}
+    assert queue_a.heartbeat() == 2
+
+    # Not leased.
+    assert not queue_a.confirm('http://some.local/3')
+
+    queue_b.complete('http://some.local/3', {'hashes': [f'{3:040}'], 'updated': {}, 'failed': {}})
+    assert queue_a.get_stats() == {'pending': 0, 'leased': 4, 'done': 1}
+
+    # Worker `a` has gone. Its leases expire and are reclaimed.
+    monkeypatch.setattr(WorkQueue, 'lease_time', -1)
+    queue_b.heartbeat()
+    queue_a.heartbeat()
+
+    assert queue_a.get_stats() == {'pending': 4, 'leased': 0, 'done': 1}
+
+    monkeypatch.setattr(WorkQueue, 'lease_time', 300)
+    assert set(queue_b.lease(2)) == set(leased_a)
+    assert not queue_a.confirm('http://some.local/0')
+    assert queue_b.confirm('http://some.local/0')
+
+    assert queue_a.collect() == [{'hashes': [f'{3:040}'], 'updated': {}, 'failed': {}}]
+    assert queue_a.get_stats()['done'] == 0
+
+
+def test_distributed_walk(tmp_path, pipe_env, torrent_two_hash):
+    _, make_torrents = pipe_env
+    torrents = make_torrents(30)
+
+    for hash_str, data in torrents.items():
+        register_torrent(hash_str, url=data['url'])
+
+    path = tmp_path / 'queue.sqlite'
+    walk(WorkQueue(path), forced=True)
+
+    assert WorkQueue(path).get_stats()['pending'] == 30
+
+    # Previous walk is in progress.
+    walk(WorkQueue(path), forced=True)
+    assert WorkQueue(path).get_stats()['pending'] == 30
+
+    performed = []
+
+    def run_worker(name):
+        performed.append(work(WorkQueue(path, owner=name), batch=4, poll_interval=0.05))
+
+    workers = [Thread(target=run_worker, args=(f'worker{idx}',)) for idx in range(3)]
+
+    for worker in workers:
+        worker.start()
+
+    for worker in workers:
+        worker.join()
+
+    assert sum(performed) == 30
+    assert all(performed)
+
+    # Every update is applied once for every RPC.
+    for rpc in RPCObjectsRegistry.get().values():
+        assert sorted(rpc.added) == sorted(data['url'] for data in torrents.values())
+
+    # Registry is left to the coordinator.
+    assert set(config.load()['torrents']) == set(torrents)
+
+    collect(WorkQueue(path))
+
+    assert list(config.load()['torrents']) == [torrent_two_hash]
+    assert WorkQueue(path).get_stats() == {'pending': 0, 'leased': 0, 'done': 0}
@@ -1,3 +1,4 @@
+from torrt.base_tracker import FastPathHits
 from torrt.trackers.eniahd import EniaHDTracker
 
 
@@ -24,3 +25,33 @@ def test_get_torrent(response_mock, datafix_read, datafix_dir):
             '[2020, Канада, США, фантастика, триллер, драма, детектив, WEB-DL 720p] MVO (LostFilm) + '
             'Original + Sub (Rus, Eng) :: eniahd.com'
         )
+
+
+def test_get_torrent_known_hash(response_mock, datafix_read):
+
+    tracker = EniaHDTracker()
+    tracker.raise_on_error_response = True
+
+    with response_mock([
+        f"GET https://eniatv.com/viewtopic.php?t=1558 -> 200: {datafix_read('eniahd.html', encoding='utf-8')}",
+    ]) as _:
+        # Info hash from magnet link is the same: no torrent file download.
+        torr = tracker.get_torrent(
+            'https://eniatv.com/viewtopic.php?t=1558', known_hash='3F6FA24B258BA5CCD2C9E599779B3F8897329D6A')
+        assert torr.hash == '3f6fa24b258ba5ccd2c9e599779b3f8897329d6a'
+        assert torr.url_file == 'https://eniatv.com/dl.php?id=5669'
+        assert not torr.raw
+
+
+def test_get_download_link_fallback(response_mock):
+
+    tracker = EniaHDTracker()
+    FastPathHits.clear()
+
+    with response_mock(
+        # Markup unexpected by fast path extractor.
+        'GET https://eniatv.com/viewtopic.php?t=1 -> 200: <a class="dl" href = "dl.php?id=5">Download</a>',
+    ):
+        assert tracker.get_download_link('https://eniatv.com/viewtopic.php?t=1') == 'https://eniatv.com/dl.php?id=5'
+
+    assert FastPathHits.get_rates() == {('eniahd.com', 'download_link'): 0.0}
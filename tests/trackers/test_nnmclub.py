@@ -1,5 +1,6 @@
 from datetime import datetime
 
+from torrt.base_tracker import FastPathHits
 from torrt.trackers.nnmclub import NNMClubTracker
 
 
@@ -25,3 +26,69 @@ def test_get_torrent(response_mock, datafix_read, datafix_dir):
         assert torr.page.cover == 'http://funkyimg.com/i/VZL6.jpg'
         assert torr.page.date_updated == datetime(2015, 4, 17, 17, 50, 51)
         assert torr.page.title == 'Реймонд Хеттинджер | Super — это супер! (2015) HDTV :: NNM-Club'
+
+
+def test_extract_fast(response_mock, datafix_read):
+
+    tracker = NNMClubTracker()
+    FastPathHits.clear()
+
+    with response_mock(
+        f"GET https://nnmclub.to/forum/viewtopic.php?t=889443&sid= -> 200: {datafix_read('nnmclub.html')}",
+    ):
+        url = 'https://nnmclub.to/forum/viewtopic.php?t=889443'
+        assert tracker.get_download_link(url) == 'https://nnmclub.to/forum/download.php?id=762672'
+        assert tracker.extract_fast('date_updated', url) == '17 Апр 2015 17:50:51'
+        assert tracker.extract_page_cover(url) == 'http://funkyimg.com/i/VZL6.jpg'
+        assert tracker.extract_page_title(url) == 'Реймонд Хеттинджер | Super — это супер! (2015) HDTV :: NNM-Club'
+        assert tracker.extract_fast('unknown', url) is None
+
+    # No soup was required.
+    assert tracker.pages.get(url).soup is None
+    assert FastPathHits.get_rates() == {
+        ('nnm-club.me', 'download_link'): 1.0,
+        ('nnm-club.me', 'date_updated'): 1.0,
+        ('nnm-club.me', 'cover'): 1.0,
+        ('nnm-club.me', 'title'): 1.0,
+    }
+
+
+def test_extract_fast_date_updated(response_mock):
+
+    tracker = NNMClubTracker()
+    url = 'https://nnmclub.to/forum/viewtopic.php?t=1'
+
+    # The first post date is in another format, a comment below has a matching one.
+    page = (
+        '<span class="postdata"><a href="viewtopic.php?p=1">Вчера 17:50</a></span>'
+        '<span class="postdetails">Topic</span>'
+        '<span class="postdata"><a href="viewtopic.php?p=2">18 Апр 2015 10:00:00</a></span>'
+    )
+
+    with response_mock(f'GET {url}&sid= -> 200:{page}'):
+        assert tracker.extract_fast('date_updated', url) is None
+
+    page = page.replace('Вчера 17:50', '17 Апр 2015 17:50:51')
+    tracker.pages.clear()
+
+    with response_mock(f'GET {url}&sid= -> 200:{page}'):
+        assert tracker.extract_fast('date_updated', url) == '17 Апр 2015 17:50:51'
+
+
+def test_extract_offline(datafix_dir):
+    url = 'https://nnmclub.to/forum/viewtopic.php?t=889443'
+    page = (datafix_dir / 'nnmclub.html').read_bytes()
+
+    handled, torr = NNMClubTracker.extract_offline({}, url, page, encoding='utf-8')
+
+    assert handled
+    assert torr.url_file == 'https://nnmclub.to/forum/download.php?id=762672'
+    assert torr.page.date_updated == datetime(2015, 4, 17, 17, 50, 51)
+    assert not torr.raw
+
+    # Page for anonymous requires login.
+    handled, torr = NNMClubTracker.extract_offline(
+        {'username': 'user', 'password': 'pass'}, url, b'<html></html>', encoding='utf-8')
+
+    assert not handled
+    assert torr is None
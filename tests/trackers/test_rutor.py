@@ -13,3 +13,16 @@ def test_get_id_from_link():
 
     for expect_id, url in idUrls.items():
         assert tracker.get_id_from_link(url) == expect_id
+
+
+def test_get_feed_ids(response_mock, datafix_read):
+    tracker = RutorTracker()
+    tracker.mirror_picked = 'rutor.info'
+
+    with response_mock(
+        f"GET https://rutor.info/rss.php?full=1 -> 200: {datafix_read('rutor_rss.xml', encoding='utf-8')}",
+    ):
+        assert tracker.get_feed_ids() == {'41', '795039'}
+
+    with response_mock('GET https://rutor.info/rss.php?full=1 -> 500:'):
+        assert tracker.get_feed_ids() is None
@@ -0,0 +1,22 @@
+from torrt.trackers.rutracker import RuTrackerTracker
+
+
+def test_get_info_hashes(response_mock, datafix_read):
+
+    tracker = RuTrackerTracker()
+    tracker.api_chunk_size = 2
+
+    url_1 = 'https://rutracker.org/forum/viewtopic.php?t=4430338'
+    url_2 = 'https://rutracker.org/forum/viewtopic.php?t=6543210'
+    url_3 = 'https://rutracker.org/forum/viewtopic.php?t=1234567'
+
+    with response_mock([
+        (
+            'GET https://api.rutracker.cc/v1/get_tor_hash?by=topic_id&val=4430338,6543210 -> 200:'
+            f"{datafix_read('rutracker_tor_hash.json')}"
+        ),
+        'GET https://api.rutracker.cc/v1/get_tor_hash?by=topic_id&val=1234567 -> 200:{"result":{}}',
+    ]) as _:
+        info_hashes = tracker.get_info_hashes([url_1, url_2, url_3])
+
+    assert info_hashes == {url_1: 'c815be93f20bf8b12fed14bee35c14b19b1d1984'}